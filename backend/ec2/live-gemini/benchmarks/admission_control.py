@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import os
+import time
+
+import httpx
+import websockets
+
+from load_test import Session, add_load_arguments, fake_upstreams, parse_load_arguments, percentile, running_app, \
+    tree_rss_bytes
+from live_gemini.utils.admission import ADMISSION_CLOSE_CODE
+
+
+def rejected(outcome) -> bool:
+    return isinstance(outcome, websockets.exceptions.ConnectionClosed) and outcome.rcvd is not None \
+        and outcome.rcvd.code == ADMISSION_CLOSE_CODE
+
+
+async def sample_peak_rss(pid: int, peak: list[int]):
+    while True:
+        peak[0] = max(peak[0], tree_rss_bytes(pid))
+        await asyncio.sleep(0.2)
+
+
+async def spike(args, urls: dict, cert_path: str, directory: str, name: str, env: dict) -> dict:
+    # Every session connects at once and starts talking as soon as it is admitted, like a traffic spike
+    log_path = args.app_log or os.path.join(directory, f"app-{name}.log")
+    async with running_app(args, urls, cert_path, log_path, env) as (process, base_url):
+        baseline_rss = tree_rss_bytes(process.pid)
+        peak = [baseline_rss]
+        sampler = asyncio.create_task(sample_peak_rss(process.pid, peak))
+        ready = asyncio.Event()
+        ready.set()
+        sessions = [Session(index, args.turns, args.answer_bytes) for index in range(args.sessions)]
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(session.run(base_url.replace("http", "ws"), asyncio.Barrier(1), ready,
+                                                      args.turn_timeout) for session in sessions),
+                                        return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        sampler.cancel()
+        async with httpx.AsyncClient() as client:
+            admission = (await client.get(f"{base_url}/stats/admission")).json()
+
+    served = [session for session, outcome in zip(sessions, outcomes) if not isinstance(outcome, BaseException)]
+    failed = [outcome for outcome in outcomes if isinstance(outcome, BaseException) and not rejected(outcome)]
+    for outcome in failed[:3]:
+        print(f"session failed: {outcome!r}")
+    connects = [session.connect_latency for session in served]
+    first_audio = [sample for session in served for sample in session.first_audio]
+    return {
+        "scenario": name,
+        "served": len(served),
+        "rejected": sum(rejected(outcome) for outcome in outcomes),
+        "failed": len(failed),
+        "queued": admission["queued"],
+        "timed_out_turns": sum(session.errors for session in sessions),
+        "connect_p95_ms": percentile(connects, 0.95) * 1000,
+        "first_audio_p50_ms": percentile(first_audio, 0.50) * 1000,
+        "first_audio_p95_ms": percentile(first_audio, 0.95) * 1000,
+        "first_audio_p99_ms": percentile(first_audio, 0.99) * 1000,
+        "peak_rss_mb": peak[0] / 2 ** 20,
+        "elapsed_s": elapsed,
+    }
+
+
+async def main(args):
+    scenarios = {
+        "uncapped": {"MAX_SESSIONS_PER_WORKER": "0"},
+        "capped": {
+            "MAX_SESSIONS_PER_WORKER": str(args.cap),
+            "ADMISSION_QUEUE_SIZE": str(args.queue),
+            "ADMISSION_QUEUE_TIMEOUT": str(args.queue_timeout),
+        },
+    }
+    async with fake_upstreams(args) as (urls, cert_path, directory):
+        rows = [await spike(args, urls, cert_path, directory, name, env) for name, env in scenarios.items()]
+
+    print(f"spike of {args.sessions} sessions x {args.turns} turns, cap={args.cap} queue={args.queue} "
+          f"queue timeout={args.queue_timeout:.0f}s")
+    print(f"{'metric':<20}" + "".join(f"{row['scenario']:>12}" for row in rows))
+    for key in rows[0]:
+        if key == "scenario":
+            continue
+        values = [row[key] for row in rows]
+        print(f"{key:<20}" + "".join(f"{value:>12.1f}" if isinstance(value, float) else f"{value:>12}"
+                                     for value in values))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a connection spike with and without admission control.")
+    add_load_arguments(parser)
+    parser.set_defaults(sessions=150)
+    parser.add_argument("--cap", type=int, default=50, help="MAX_SESSIONS_PER_WORKER for the capped run")
+    parser.add_argument("--queue", type=int, default=50, help="ADMISSION_QUEUE_SIZE for the capped run")
+    parser.add_argument("--queue-timeout", type=float, default=10.0, help="ADMISSION_QUEUE_TIMEOUT for the capped run")
+    asyncio.run(main(parse_load_arguments(parser)))
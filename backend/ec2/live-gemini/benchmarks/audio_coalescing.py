@@ -0,0 +1,76 @@
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import websockets
+from fastapi import FastAPI, WebSocket
+
+from live_gemini.enums.message_types import MessageType
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.utils.audio_coalescer import AudioCoalescer, BYTES_PER_SAMPLE
+from live_gemini.utils.audio_protocol import AudioSocket, OUTPUT_SAMPLE_RATE, negotiate_protocol
+
+
+def create_app(parts: int, part: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/")
+    async def stream_audio(websocket: WebSocket):
+        await websocket.accept()
+        initial_data = await websocket.receive_json()
+        audio_socket = AudioSocket(websocket, negotiate_protocol(initial_data))
+        coalescer = AudioCoalescer(OUTPUT_SAMPLE_RATE, initial_data["frame-ms"])
+
+        async def send(frame: bytes):
+            await audio_socket.send({
+                "type": MessageType.AUDIO.value,
+                "audio": frame,
+                "transcript": None,
+                "mimeType": f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}"
+            })
+
+        for _ in range(parts):
+            frame = coalescer.add(part)
+            if frame:
+                await send(frame)
+        frame = coalescer.flush()
+        if frame:
+            await send(frame)
+        await websocket.close()
+
+    return app
+
+
+async def receive_all(url: str, protocol: str, frame_ms: int) -> tuple[int, int, float]:
+    messages, wire_bytes = 0, 0
+    async with websockets.connect(url.replace("http", "ws"), max_size=None) as client:
+        start = time.perf_counter()
+        await client.send(json.dumps({"company-id": "benchmark", "protocol": protocol, "frame-ms": frame_ms}))
+        async for message in client:
+            messages += 1
+            wire_bytes += len(message)
+        return messages, wire_bytes, time.perf_counter() - start
+
+
+async def main(parts: int, part_ms: int, frame_sizes: list[int], protocol: str):
+    part = os.urandom(OUTPUT_SAMPLE_RATE * BYTES_PER_SAMPLE * part_ms // 1000)
+    audio_seconds = parts * part_ms / 1000
+    print(f"parts={parts} part={len(part)}B ({part_ms}ms) protocol={protocol} audio={audio_seconds:.0f}s")
+    print(f"{'frame ms':>8} {'messages':>9} {'bytes/frame':>12} {'messages/s':>11} {'audio x realtime':>17}")
+    async with FakeServer(create_app(parts, part)) as url:
+        for frame_ms in frame_sizes:
+            messages, wire_bytes, elapsed = await receive_all(url, protocol, frame_ms)
+            print(f"{frame_ms:>8} {messages:>9} {wire_bytes / messages:>12.0f} {messages / elapsed:>11.0f} "
+                  f"{audio_seconds / elapsed:>17.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outbound messages and throughput with and without frame coalescing.")
+    parser.add_argument("--parts", type=int, default=30000)
+    parser.add_argument("--part-ms", type=int, default=10)
+    parser.add_argument("--frame-ms", type=int, nargs="+", default=[0, 40, 60, 100])
+    parser.add_argument("--protocol", choices=["json", "binary"], default="json")
+    args = parser.parse_args()
+    asyncio.run(main(args.parts, args.part_ms, args.frame_ms, args.protocol))
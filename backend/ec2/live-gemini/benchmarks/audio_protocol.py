@@ -0,0 +1,69 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+
+import websockets
+from fastapi import FastAPI, WebSocket
+
+from live_gemini.enums.message_types import MessageType
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.utils.audio_protocol import (
+    AudioSocket, BINARY_PROTOCOL, JSON_PROTOCOL, negotiate_protocol, unpack_frame
+)
+
+
+def create_app(frames: int, chunk: bytes) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/")
+    async def stream_audio(websocket: WebSocket):
+        await websocket.accept()
+        audio_socket = AudioSocket(websocket, negotiate_protocol(await websocket.receive_json()))
+        for index in range(frames):
+            await audio_socket.send({
+                "type": MessageType.AUDIO.value,
+                "audio": chunk,
+                "transcript": "word" if index % 10 == 0 else None,
+                "mimeType": "audio/pcm;rate=24000"
+            })
+        await websocket.close()
+
+    return app
+
+
+async def receive_all(url: str, protocol: str) -> tuple[int, int, float]:
+    audio_bytes, wire_bytes = 0, 0
+    async with websockets.connect(url.replace("http", "ws"), max_size=None) as client:
+        start = time.perf_counter()
+        await client.send(json.dumps({"company-id": "benchmark", "protocol": protocol}))
+        async for message in client:
+            wire_bytes += len(message)
+            if isinstance(message, bytes):
+                audio_bytes += len(unpack_frame(message)[3])
+                continue
+            response = json.loads(message)["response"]
+            if response["type"] == MessageType.AUDIO.value:
+                audio_bytes += len(base64.b64decode(response["message"]))
+        return audio_bytes, wire_bytes, time.perf_counter() - start
+
+
+async def main(frames: int, chunk_bytes: int):
+    chunk = os.urandom(chunk_bytes)
+    print(f"frames={frames} chunk={chunk_bytes}B ({chunk_bytes / 48:.0f}ms of 24kHz PCM)")
+    print(f"{'protocol':<8} {'frames/s':>10} {'audio MB/s':>11} {'wire bytes':>12} {'overhead':>9}")
+    async with FakeServer(create_app(frames, chunk)) as url:
+        for protocol in (JSON_PROTOCOL, BINARY_PROTOCOL):
+            audio_bytes, wire_bytes, elapsed = await receive_all(url, protocol)
+            print(f"{protocol:<8} {frames / elapsed:>10.0f} {audio_bytes / elapsed / 1e6:>11.1f} "
+                  f"{wire_bytes:>12} {(wire_bytes / audio_bytes - 1) * 100:>8.1f}%")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outbound audio throughput with base64 JSON versus binary frames.")
+    parser.add_argument("--frames", type=int, default=20000)
+    parser.add_argument("--chunk-bytes", type=int, default=960)
+    args = parser.parse_args()
+    asyncio.run(main(args.frames, args.chunk_bytes))
@@ -0,0 +1,96 @@
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import websockets
+from fastapi import FastAPI, WebSocket
+
+from live_gemini.duplex_session import DuplexSession
+from live_gemini.enums.frame_types import FrameType
+from live_gemini.enums.message_types import MessageType
+from live_gemini.fakes.fake_llm_api import FakeLLMApi
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.utils.audio_protocol import AudioSocket, BINARY_PROTOCOL, negotiate_protocol, pack_frame
+from live_gemini.utils.session_context import SessionContext
+
+QUESTION = {"request": {"message": "Tell me a long story please", "mimeType": "text/plain"}}
+
+
+def create_app(audio_chunks: int, frame_seconds: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.websocket("/")
+    async def duplex(websocket: WebSocket):
+        await websocket.accept()
+        audio_socket = AudioSocket(websocket, negotiate_protocol(await websocket.receive_json()))
+        session_context = SessionContext()
+        llm_live_api = FakeLLMApi(session_context, reply="Once upon a time", delay=frame_seconds,
+                                  audio_chunks=audio_chunks)
+        try:
+            await DuplexSession(audio_socket, llm_live_api, session_context).run()
+        finally:
+            session_context.clear()
+
+    return app
+
+
+async def barge_in(url: str, frames_before: int, quiet_seconds: float) -> tuple[float, int, int]:
+    async with websockets.connect(url.replace("http", "ws")) as client:
+        await client.send(json.dumps({"company-id": "benchmark", "protocol": BINARY_PROTOCOL}))
+        await client.send(json.dumps(QUESTION))
+
+        frames = 0
+        while frames < frames_before:
+            if isinstance(await client.recv(), bytes):
+                frames += 1
+
+        # The shopper starts talking over the answer
+        start = time.perf_counter()
+        await client.send(pack_frame(FrameType.AUDIO_CHUNK, 0, 16000, b"wait"))
+
+        stale_frames, silence = 0, None
+        while silence is None:
+            message = await client.recv()
+            if isinstance(message, bytes):
+                stale_frames += 1
+            elif json.loads(message)["response"].get("interrupted"):
+                silence = time.perf_counter() - start
+
+        late_frames = 0
+        try:
+            while True:
+                if isinstance(await asyncio.wait_for(client.recv(), quiet_seconds), bytes):
+                    late_frames += 1
+        except asyncio.TimeoutError:
+            pass
+        return silence, stale_frames, late_frames
+
+
+async def main(trials: int, audio_chunks: int, frame_ms: int, frames_before: int):
+    frame_seconds = frame_ms / 1000
+    async with FakeServer(create_app(audio_chunks, frame_seconds)) as url:
+        results = [await barge_in(url, frames_before, frame_seconds * 5) for _ in range(trials)]
+
+    silences = sorted(result[0] for result in results)
+    remaining = (audio_chunks - frames_before) * frame_seconds
+    print(f"trials={trials} answer={audio_chunks * frame_seconds:.1f}s of {frame_ms}ms frames")
+    print(f"barge-in to silence: p50={silences[len(silences) // 2] * 1000:.2f}ms "
+          f"p95={silences[int(len(silences) * 0.95) - 1] * 1000:.2f}ms max={silences[-1] * 1000:.2f}ms")
+    print(f"stale frames before the interrupted status: mean={statistics.mean(r[1] for r in results):.2f}")
+    print(f"serial loop would keep talking for ~{remaining:.1f}s")
+    late = sum(result[2] for result in results)
+    print(f"frames after the interrupted status: {late}")
+    if late:
+        raise SystemExit("cancelled turn kept streaming audio")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time from a barge-in to the end of the interrupted answer's audio.")
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--audio-chunks", type=int, default=500)
+    parser.add_argument("--frame-ms", type=int, default=20)
+    parser.add_argument("--frames-before", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.trials, args.audio_chunks, args.frame_ms, args.frames_before))
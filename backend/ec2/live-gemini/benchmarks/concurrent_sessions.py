@@ -0,0 +1,80 @@
+import argparse
+import asyncio
+import os
+import re
+import time
+
+from load_test import Session, add_load_arguments, fake_upstreams, parse_load_arguments, running_app
+
+# Every session speaks as its own shopper to its own company; the fake model echoes both tags back in its reply
+ECHO_PATTERN = r"(?:shopper|store)-\d+"
+
+
+def utterances(index: int) -> list[str]:
+    return [
+        f"Where can I find the oat milk for shopper-{index}?",
+        f"Compare the two almond butters for shopper-{index}.",
+        f"What does the organic peanut butter taste like, asks shopper-{index}?",
+    ]
+
+
+def leaks(session: Session) -> list[str]:
+    # Anything tagged with another shopper or store reached this session through shared state
+    own = {f"shopper-{session.index}", f"store-{session.index}"}
+    problems = []
+    replies = 0
+    for role, text in session.transcripts:
+        tags = set(re.findall(ECHO_PATTERN, text))
+        if tags - own:
+            problems.append(f"{role} transcript {text!r}")
+        if role == "assistant" and own <= tags:
+            replies += 1
+    if replies != session.turns:
+        problems.append(f"{replies}/{session.turns} replies carried this session's shopper and store")
+    return problems
+
+
+async def main(args):
+    configs = {
+        f"store-{index}": {"companyId": f"store-{index}", "companyName": f"store-{index}", "industry": "Grocery"}
+        for index in range(args.sessions)
+    }
+    async with fake_upstreams(args, configs, ECHO_PATTERN) as (urls, cert_path, directory):
+        log_path = args.app_log or os.path.join(directory, "app.log")
+        async with running_app(args, urls, cert_path, log_path) as (_, base_url):
+            sessions = [Session(index, args.turns, args.answer_bytes, company_id=f"store-{index}",
+                                utterances=utterances(index), keep_transcripts=True)
+                        for index in range(args.sessions)]
+            connected = asyncio.Barrier(args.sessions + 1)
+            ready = asyncio.Event()
+            clients = [asyncio.create_task(session.run(base_url.replace("http", "ws"), connected, ready,
+                                                       args.turn_timeout)) for session in sessions]
+            # Every session is open before any of them talks, so all their turns overlap
+            await connected.wait()
+            start = time.perf_counter()
+            ready.set()
+            outcomes = await asyncio.gather(*clients, return_exceptions=True)
+            elapsed = time.perf_counter() - start
+
+    failed = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for outcome in failed[:3]:
+        print(f"session failed: {outcome!r}")
+    problems = {session.index: leaks(session) for session, outcome in zip(sessions, outcomes)
+                if not isinstance(outcome, BaseException)}
+    for index, found in list(problems.items())[:5]:
+        for problem in found[:3]:
+            print(f"session {index}: {problem}")
+
+    isolated = sum(not found for found in problems.values())
+    print(f"workers={args.workers} sessions={args.sessions} turns={args.turns} elapsed={elapsed:.3f}s "
+          f"timed out turns={sum(session.errors for session in sessions)}")
+    print(f"isolated sessions: {isolated}/{args.sessions}")
+    if isolated != args.sessions:
+        raise SystemExit("conversation state leaked between sessions")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hold many concurrent WebSocket sessions, each for its own company, "
+                                                 "against the app and check no session sees another's state.")
+    add_load_arguments(parser)
+    asyncio.run(main(parse_load_arguments(parser)))
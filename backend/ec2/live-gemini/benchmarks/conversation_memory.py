@@ -0,0 +1,65 @@
+import argparse
+import time
+
+from live_gemini.agents.router_agent import FORMATTED_AGENTS
+from live_gemini.constants.prompts import AGENT_ROUTER_PROMPT, PRODUCT_INFO_PROMPT
+from live_gemini.utils.conversation_memory import ConversationMemory, estimate_tokens
+
+USER_TURNS = [
+    "Where can I find peanut butter?",
+    "Is the crunchy one in stock?",
+    "What's the difference between the organic and the regular jar?",
+    "Do you have anything cheaper?",
+    "Where are the dog treats?",
+]
+ASSISTANT_REPLY = (
+    "Sure! The peanut butter is in aisle 4, in the pantry section on the second shelf. We carry a creamy and a "
+    "crunchy version from two brands, and both are in stock today. The organic jar has no added sugar or palm oil, "
+    "while the regular one is a little sweeter and about two dollars cheaper. Anything else I can help you find?"
+)
+
+
+def turn_prompts(query: str, history: str, legacy: bool) -> str:
+    router = AGENT_ROUTER_PROMPT.format(query=query, agents_info=FORMATTED_AGENTS, conversation_history=history)
+    if legacy:
+        # The router prompt used to repeat the history in its instructions
+        router += f"\n4. Use this conversation history for context: {history}"
+    agent = PRODUCT_INFO_PROMPT.format(user_query=query, conversation_history=history, retrieve_products="")
+    return router + agent
+
+
+def main(turns: int, token_budget: int, summary_tokens: int):
+    legacy_history = []
+    memory = ConversationMemory(token_budget=token_budget, summary_tokens=summary_tokens)
+    legacy_tokens, memory_tokens, render_seconds = [], [], 0.0
+
+    for turn in range(turns):
+        query = USER_TURNS[turn % len(USER_TURNS)]
+        legacy_history.append({'role': 'user', 'content': query})
+        memory.append("user", query)
+
+        legacy_tokens.append(estimate_tokens(turn_prompts(query, str(legacy_history), legacy=True)))
+        start = time.perf_counter()
+        history = memory.render()
+        render_seconds += time.perf_counter() - start
+        memory_tokens.append(estimate_tokens(turn_prompts(query, history, legacy=False)))
+
+        legacy_history.append({'role': 'system', 'content': ASSISTANT_REPLY})
+        memory.append("assistant", ASSISTANT_REPLY)
+
+    print(f"turns={turns} token_budget={token_budget} summary_tokens={summary_tokens}")
+    print(f"{'turn':>5} {'legacy tokens':>14} {'memory tokens':>14}")
+    for turn in sorted({0, 4, 9, 24, turns - 1}):
+        if turn < turns:
+            print(f"{turn + 1:>5} {legacy_tokens[turn]:>14} {memory_tokens[turn]:>14}")
+    print(f"{'total':>5} {sum(legacy_tokens):>14} {sum(memory_tokens):>14}")
+    print(f"mean render time: {render_seconds / turns * 1e6:.1f}us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn with the full history versus bounded memory.")
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--token-budget", type=int, default=600)
+    parser.add_argument("--summary-tokens", type=int, default=200)
+    args = parser.parse_args()
+    main(args.turns, args.token_budget, args.summary_tokens)
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+
+from live_gemini.fakes.fake_llm_api import FakeLLMApi
+from live_gemini.graph import run_graph
+from live_gemini.utils.conversation_memory import estimate_tokens
+from live_gemini.utils.prompt_blocks import PromptBlocks
+from live_gemini.utils.session_context import SessionContext
+
+USER_TURNS = [
+    "Where can I find peanut butter?",
+    "Is the crunchy one in stock?",
+    "What's the difference between the organic and the regular jar?",
+    "Do you have anything cheaper?",
+    "Where are the dog treats?",
+]
+ASSISTANT_REPLY = (
+    "Sure! The peanut butter is in aisle 4, in the pantry section on the second shelf. We carry a creamy and a "
+    "crunchy version from two brands, and both are in stock today. Anything else I can help you find?"
+)
+
+
+async def tokens_per_turn(turns: int, mode: str) -> list[int]:
+    session_context = SessionContext()
+    llm_live_api = FakeLLMApi(session_context, reply=ASSISTANT_REPLY)
+    llm_live_api.prompt_blocks = PromptBlocks(mode)
+    await llm_live_api.get_session()
+
+    samples = []
+    for turn in range(turns):
+        sent = len(llm_live_api.prompts)
+        async for _ in run_graph(llm_live_api, session_context, USER_TURNS[turn % len(USER_TURNS)]):
+            pass
+        samples.append(sum(estimate_tokens(prompt) for prompt in llm_live_api.prompts[sent:]))
+    session_context.clear()
+    return samples
+
+
+async def main(turns: int):
+    full = await tokens_per_turn(turns, "full")
+    delta = await tokens_per_turn(turns, "delta")
+
+    print(f"turns={turns}")
+    print(f"{'turn':>5} {'full tokens':>12} {'delta tokens':>13}")
+    for turn in sorted({0, 1, 4, 9, 24, turns - 1}):
+        if turn < turns:
+            print(f"{turn + 1:>5} {full[turn]:>12} {delta[turn]:>13}")
+    print(f"{'total':>5} {sum(full):>12} {sum(delta):>13}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Input tokens sent per turn with full versus delta prompting.")
+    parser.add_argument("--turns", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns))
@@ -0,0 +1,71 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from live_gemini.fakes.fake_llm_api import FakeLLMApi
+from live_gemini.graph import AGENT_NODES, build_graph, get_graph, run_graph
+from live_gemini.utils.session_context import SessionContext
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<32} mean={statistics.mean(samples) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms")
+
+
+async def timed_turns(turns: int, per_turn_compile: bool) -> list[float]:
+    session_context = SessionContext()
+    llm_live_api = FakeLLMApi(session_context)
+    chunks = []
+    config = {"configurable": {"llm_live_api": llm_live_api, "session_context": session_context,
+                               "writer": chunks.append}}
+    initial_state = {"request": "Where is the shampoo?", "response": "", "current_agent": "", "retrieved_products": {}}
+
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        if per_turn_compile:
+            graph = build_graph(frozenset(AGENT_NODES))
+        else:
+            graph = get_graph()
+        await graph.ainvoke(initial_state, config=config)
+        chunks.clear()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main(turns: int):
+    compile_samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        build_graph(frozenset(AGENT_NODES))
+        compile_samples.append(time.perf_counter() - start)
+
+    lookup_samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        get_graph()
+        lookup_samples.append(time.perf_counter() - start)
+
+    report("build + compile", compile_samples)
+    report("registry lookup", lookup_samples)
+    report("turn, compile per turn", await timed_turns(turns, per_turn_compile=True))
+    report("turn, precompiled graph", await timed_turns(turns, per_turn_compile=False))
+
+    session_context = SessionContext()
+    llm_live_api = FakeLLMApi(session_context)
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        async for _ in run_graph(llm_live_api, session_context, "Where is the shampoo?"):
+            pass
+        samples.append(time.perf_counter() - start)
+    report("run_graph (fake LLM)", samples)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure per-turn graph overhead with and without precompilation.")
+    parser.add_argument("--turns", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns))
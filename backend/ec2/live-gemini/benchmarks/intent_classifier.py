@@ -0,0 +1,77 @@
+import argparse
+import statistics
+import time
+
+from live_gemini.agents.intent_classifier import IntentClassifier
+from live_gemini.constants.agent_info import AGENTS_INFO
+
+# Held-out shopper questions, none of them appear in AGENTS_INFO
+LABELED_QUERIES = [
+    ("Where can I find toothpaste?", "Navigation"),
+    ("What aisle is the dog food in?", "Navigation"),
+    ("Where are the batteries?", "Navigation"),
+    ("How do I get to the bakery section?", "Navigation"),
+    ("Which aisle has cereal?", "Navigation"),
+    ("Where is the checkout?", "Navigation"),
+    ("Can you take me to the frozen food aisle?", "Navigation"),
+    ("Where do you keep the paper towels?", "Navigation"),
+    ("Is the cat litter in stock?", "ProductInfo"),
+    ("Does this blender have a warranty?", "ProductInfo"),
+    ("What is this jacket made of?", "ProductInfo"),
+    ("Is this safe for kids?", "ProductInfo"),
+    ("Does this come in a bigger size?", "ProductInfo"),
+    ("Can I return this if it doesn't fit?", "ProductInfo"),
+    ("How do I use this product?", "ProductInfo"),
+    ("Is this available in blue?", "ProductInfo"),
+    ("Which is cheaper, the red one or the blue one?", "Comparison"),
+    ("What's the difference between these two blenders?", "Comparison"),
+    ("Is there a cheaper alternative to this shampoo?", "Comparison"),
+    ("Which one is better for dry skin?", "Comparison"),
+    ("Can you recommend something similar?", "Comparison"),
+    ("Compare these two vacuums for me.", "Comparison"),
+    ("What's a good alternative to this dog food?", "Comparison"),
+    ("Show me similar jackets.", "Comparison"),
+    ("Hi there!", "Fallback"),
+    ("I need some help.", "Fallback"),
+    ("Are there any sales today?", "Fallback"),
+    ("What would you suggest?", "Fallback"),
+    ("I'm just browsing.", "Fallback"),
+    ("Tell me a joke.", "Fallback"),
+]
+
+
+def evaluate(classifier: IntentClassifier, repeats: int):
+    confident = correct = 0
+    latencies = []
+    for _ in range(repeats):
+        for query, _ in LABELED_QUERIES:
+            start = time.perf_counter()
+            classifier.classify(query)
+            latencies.append(time.perf_counter() - start)
+
+    for query, label in LABELED_QUERIES:
+        result = classifier.classify(query)
+        if result.confident:
+            confident += 1
+            correct += result.agent_type == label
+    return confident, correct, latencies
+
+
+def main(repeats: int):
+    start = time.perf_counter()
+    IntentClassifier.from_agents_info(AGENTS_INFO)
+    print(f"build time: {(time.perf_counter() - start) * 1000:.2f}ms")
+    print(f"{'threshold':>9} {'hit rate':>9} {'precision':>9} {'mean us':>8}")
+    for threshold in (0.0, 0.05, 0.1, 0.12, 0.15, 0.2, 0.3):
+        classifier = IntentClassifier.from_agents_info(AGENTS_INFO, threshold=threshold)
+        confident, correct, latencies = evaluate(classifier, repeats)
+        precision = correct / confident if confident else 0.0
+        print(f"{threshold:>9.2f} {confident / len(LABELED_QUERIES):>9.2f} {precision:>9.2f} "
+              f"{statistics.mean(latencies) * 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline accuracy and latency of the local intent classifier.")
+    parser.add_argument("--repeats", type=int, default=100)
+    args = parser.parse_args()
+    main(args.repeats)
@@ -0,0 +1,383 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+
+import httpx
+import websockets
+
+from live_gemini.enums.frame_types import FrameType
+from live_gemini.enums.message_types import MessageType
+from live_gemini.fakes.fake_catalog import generate_catalog
+from live_gemini.fakes.fake_config_host import create_fake_config_host
+from live_gemini.fakes.fake_credentials import create_service_account_info, create_tls_certificate
+from live_gemini.fakes.fake_deepgram import create_fake_deepgram
+from live_gemini.fakes.fake_gemini_live import create_fake_gemini_live
+from live_gemini.fakes.fake_opensearch import create_fake_opensearch
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.fakes.fake_vertex import create_fake_vertex
+from live_gemini.utils.audio_protocol import BINARY_PROTOCOL, OUTPUT_SAMPLE_RATE, pack_frame, unpack_frame
+
+COMPANY_ID = "load-test"
+COMPANY_CONFIG = {"companyId": COMPANY_ID, "companyName": "Load Test Foods", "industry": "Grocery"}
+UTTERANCES = [
+    "What does the organic peanut butter taste like?",
+    "Where can I find the oat milk?",
+    "Compare the two almond butters for me.",
+]
+# Local run history, git-ignored
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "load_test.jsonl")
+SOURCE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+
+def percentile(samples: list[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered) - 1)]
+
+
+def rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def tree_rss_bytes(pid: int) -> int:
+    # With several workers the app is a supervisor plus its children
+    children = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                with open(f"/proc/{entry}/stat") as stat:
+                    parent = int(stat.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            children.setdefault(parent, []).append(int(entry))
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += rss_bytes(current)
+        pending.extend(children.get(current, []))
+    return total
+
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                  check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True,
+                               text=True, check=True).stdout.strip()
+        return f"{revision}-dirty" if dirty else revision
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+class Session:
+    def __init__(self, index: int, turns: int, answer_bytes: int, company_id: str = COMPANY_ID,
+                 utterances: list[str] = UTTERANCES, keep_transcripts: bool = False):
+        self.index = index
+        self.turns = turns
+        self.answer_bytes = answer_bytes
+        self.company_id = company_id
+        self.utterances = utterances
+        # (role, text) of every final transcript, both the shopper's and the assistant's
+        self.transcripts: list[tuple[str, str]] | None = [] if keep_transcripts else None
+        self.connect_latency = None
+        self.first_audio: list[float] = []
+        self.turn_seconds: list[float] = []
+        self.errors = 0
+
+    async def run(self, url: str, connected: asyncio.Barrier, measured: asyncio.Event, turn_timeout: float):
+        start = time.perf_counter()
+        async with websockets.connect(url, max_size=None) as client:
+            await client.send(json.dumps({"company-id": self.company_id, "protocol": BINARY_PROTOCOL}))
+            # The server acknowledges the binary protocol once its live session is up
+            ack = json.loads(await client.recv())
+            if ack.get("protocol") != BINARY_PROTOCOL:
+                raise RuntimeError(f"Unexpected handshake {ack}")
+            self.connect_latency = time.perf_counter() - start
+
+            await connected.wait()
+            await measured.wait()
+            for turn in range(self.turns):
+                try:
+                    await asyncio.wait_for(
+                        self.speak(client, self.utterances[(self.index + turn) % len(self.utterances)]),
+                        turn_timeout
+                    )
+                except asyncio.TimeoutError:
+                    self.errors += 1
+
+    async def speak(self, client, utterance: str):
+        # The fake Deepgram transcribes UTF-8 "audio", so the utterance streams as two chunks of text
+        payload = utterance.encode("utf-8")
+        middle = len(payload) // 2
+        await client.send(pack_frame(FrameType.AUDIO_CHUNK, 0, 16000, payload[:middle]))
+        await client.send(pack_frame(FrameType.AUDIO_CHUNK, 1, 16000, payload[middle:]))
+        await client.send(pack_frame(FrameType.AUDIO_END, 2, 16000, b""))
+        start = time.perf_counter()
+
+        received = 0
+        while received < self.answer_bytes:
+            message = await client.recv()
+            if isinstance(message, bytes):
+                if not received:
+                    self.first_audio.append(time.perf_counter() - start)
+                received += len(unpack_frame(message)[3])
+            elif self.transcripts is not None:
+                response = json.loads(message)["response"]
+                if response.get("type") == MessageType.TRANSCRIPT.value and response.get("final"):
+                    self.transcripts.append((response.get("role", "user"), response["message"]))
+        self.turn_seconds.append(time.perf_counter() - start)
+
+
+async def wait_until_ready(base_url: str, process: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"App exited with {process.returncode}")
+            try:
+                if (await client.get(f"{base_url}/stats/sessions")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("App did not start")
+
+
+@asynccontextmanager
+async def running_app(args, urls: dict, cert_path: str, log_path: str, extra_env: dict | None = None):
+    port = free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [SOURCE_PATH, os.environ.get("PYTHONPATH")])),
+        "GOOGLE_SERVICE_ACCOUNT": json.dumps(create_service_account_info(f"{urls['vertex']}/token")),
+        "GOOGLE_PROJECT_ID": "fake-project",
+        "GEMINI_BASE_URL": urls["gemini"],
+        # Only the fake Gemini speaks TLS, every other stand-in is plain HTTP
+        "SSL_CERT_FILE": cert_path,
+        "VERTEX_ENDPOINT": urls["vertex"],
+        "DEEPGRAM_URL": urls["deepgram"],
+        "DEEPGRAM_API_KEY": "fake",
+        "STT_BACKEND": "deepgram",
+        "OPENSEARCH_URL": urls["opensearch"],
+        "INDEX_NAME": "products",
+        "RETRIEVAL_BACKEND": "opensearch",
+        "AWS_ACCESS_KEY": "fake",
+        "AWS_SECRET_KEY": "fake",
+        "AWS_ACCESS_KEY_ID": "fake",
+        "AWS_SECRET_ACCESS_KEY": "fake",
+        "AWS_REGION": "us-east-1",
+        "COMPANY_CONFIG_URL": f"{urls['config']}/{{company_id}}/config.json",
+        "LIVE_SESSION_POOL_SIZE": "0",
+        "SESSION_RECORDING_DIR": "",
+        # Admission caps would turn a capacity measurement into a measurement of the caps
+        "MAX_SESSIONS_PER_WORKER": "0",
+        **(extra_env or {}),
+    }
+    if args.workers > 1:
+        command = ["-m", "live_gemini.server", "--workers", str(args.workers)]
+        env["LOG_LEVEL"] = "warning"
+    else:
+        command = ["-m", "uvicorn", "live_gemini.main:app", "--log-level", "warning"]
+    with open(log_path, "w") as log:
+        process = subprocess.Popen(
+            [sys.executable, *command, "--host", "127.0.0.1", "--port", str(port)],
+            env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        await wait_until_ready(base_url, process)
+        # Warm-up sessions first, so imports, graph compilation and pools are warm before the baseline; with
+        # several workers there is no way to pick one, so each gets a few chances
+        ready = asyncio.Event()
+        ready.set()
+        warmups = [Session(-1 - index, 1, args.answer_bytes) for index in range(args.workers * 2 - 1)]
+        await asyncio.gather(*(warmup.run(base_url.replace("http", "ws"), asyncio.Barrier(1), ready,
+                                          args.turn_timeout) for warmup in warmups))
+        yield process, base_url
+    finally:
+        process.terminate()
+        # The fakes share this event loop, and the app's sessions need them to finish their close handshakes
+        await asyncio.to_thread(process.wait, 10)
+
+
+async def run_load(args, urls: dict, cert_path: str, log_path: str) -> dict:
+    async with running_app(args, urls, cert_path, log_path) as (process, base_url):
+        baseline_rss = tree_rss_bytes(process.pid)
+
+        sessions = [Session(index, args.turns, args.answer_bytes) for index in range(args.sessions)]
+        connected = asyncio.Barrier(args.sessions + 1)
+        measured = asyncio.Event()
+        tasks = [asyncio.create_task(session.run(base_url.replace("http", "ws"), connected, measured, args.turn_timeout))
+                 for session in sessions]
+        await connected.wait()
+        connected_rss = tree_rss_bytes(process.pid)
+        start = time.perf_counter()
+        measured.set()
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+        elapsed = time.perf_counter() - start
+        peak_rss = tree_rss_bytes(process.pid)
+
+        async with httpx.AsyncClient() as client:
+            metrics = (await client.get(f"{base_url}/metrics")).text
+
+    failed = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for outcome in failed[:3]:
+        print(f"session failed: {outcome!r}")
+    connects = [session.connect_latency for session in sessions if session.connect_latency is not None]
+    first_audio = [sample for session in sessions for sample in session.first_audio]
+    turn_seconds = [sample for session in sessions for sample in session.turn_seconds]
+    answer_seconds = args.answer_bytes / (OUTPUT_SAMPLE_RATE * 2)
+
+    return {
+        "sessions": args.sessions,
+        "turns_per_session": args.turns,
+        "failed_sessions": len(failed),
+        "timed_out_turns": sum(session.errors for session in sessions),
+        "connect_p50_ms": percentile(connects, 0.50) * 1000,
+        "connect_p95_ms": percentile(connects, 0.95) * 1000,
+        "connect_p99_ms": percentile(connects, 0.99) * 1000,
+        "first_audio_p50_ms": percentile(first_audio, 0.50) * 1000,
+        "first_audio_p95_ms": percentile(first_audio, 0.95) * 1000,
+        "first_audio_p99_ms": percentile(first_audio, 0.99) * 1000,
+        "turn_p50_ms": percentile(turn_seconds, 0.50) * 1000,
+        "turns_per_second": len(turn_seconds) / elapsed,
+        "audio_realtime_factor": len(turn_seconds) * answer_seconds / elapsed,
+        "baseline_rss_mb": baseline_rss / 2 ** 20,
+        "rss_per_session_kb": (max(connected_rss, peak_rss) - baseline_rss) / args.sessions / 1024,
+        # Metrics are per worker, so with several workers this is whichever one answered the scrape
+        "stt_mean_ms": metric_mean(metrics, "voice_stt_seconds") * 1000,
+    }
+
+
+def metric_mean(exposition: str, name: str) -> float:
+    total = count = 0.0
+    for line in exposition.splitlines():
+        if line.startswith(f"{name}_sum"):
+            total += float(line.rsplit(" ", 1)[1])
+        elif line.startswith(f"{name}_count"):
+            count += float(line.rsplit(" ", 1)[1])
+    return total / count if count else float("nan")
+
+
+def store(result: dict, params: dict) -> dict | None:
+    # Appends this run and returns the previous one with the same parameters, if any
+    previous = None
+    if os.path.exists(RESULTS_PATH):
+        with open(RESULTS_PATH) as file:
+            for line in file:
+                entry = json.loads(line)
+                if entry.get("params") == params:
+                    previous = entry
+    os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+    with open(RESULTS_PATH, "a") as file:
+        file.write(json.dumps({
+            "revision": git_revision(),
+            "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "params": params,
+            "result": result,
+        }) + "\n")
+    return previous
+
+
+def print_result(result: dict, previous: dict | None):
+    baseline = previous["result"] if previous else {}
+    label = f" (vs {previous['revision']})" if previous else ""
+    print(f"{'metric':<24} {'value':>10}{label}")
+    for key, value in result.items():
+        line = f"{key:<24} {value:>10.1f}" if isinstance(value, float) else f"{key:<24} {value:>10}"
+        if isinstance(baseline.get(key), (int, float)) and isinstance(value, (int, float)) and key in baseline:
+            line += f" {value - baseline[key]:+10.1f}"
+        print(line)
+
+
+@asynccontextmanager
+async def fake_upstreams(args, configs: dict | None = None, echo_pattern: str | None = None):
+    catalog = generate_catalog(COMPANY_ID, args.products)
+    with tempfile.TemporaryDirectory() as directory:
+        cert_path, key_path = create_tls_certificate(directory)
+        servers = {
+            "vertex": FakeServer(create_fake_vertex()),
+            "gemini": FakeServer(create_fake_gemini_live(first_output_delay=args.model_delay,
+                                                         audio_chunks=args.audio_chunks, chunk_ms=args.chunk_ms,
+                                                         echo_pattern=echo_pattern),
+                                 ssl_certfile=cert_path, ssl_keyfile=key_path),
+            "deepgram": FakeServer(create_fake_deepgram(delay=args.stt_delay)),
+            "opensearch": FakeServer(create_fake_opensearch(catalog)),
+            "config": FakeServer(create_fake_config_host({COMPANY_ID: COMPANY_CONFIG, **(configs or {})})),
+        }
+        urls = {name: await server.start() for name, server in servers.items()}
+        try:
+            yield urls, cert_path, directory
+        finally:
+            for server in servers.values():
+                await server.stop()
+
+
+async def run_logged(args, urls: dict, cert_path: str, directory: str) -> dict:
+    log_path = args.app_log or os.path.join(directory, "app.log")
+    try:
+        return await run_load(args, urls, cert_path, log_path)
+    except Exception:
+        with open(log_path) as log:
+            print(log.read()[-4000:])
+        raise
+
+
+async def main(args):
+    params = {key: value for key, value in vars(args).items() if key not in ("no_store", "app_log")}
+    async with fake_upstreams(args) as (urls, cert_path, directory):
+        result = await run_logged(args, urls, cert_path, directory)
+
+    print(f"workers={args.workers} sessions={args.sessions} turns={args.turns} model delay={args.model_delay * 1000:.0f}ms "
+          f"answer={args.audio_chunks}x{args.chunk_ms}ms")
+    previous = None if args.no_store else store(result, params)
+    print_result(result, previous)
+
+
+def add_load_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--model-delay", type=float, default=0.3, help="Seconds before each model turn's output")
+    parser.add_argument("--stt-delay", type=float, default=0.02)
+    parser.add_argument("--audio-chunks", type=int, default=25)
+    parser.add_argument("--chunk-ms", type=int, default=40)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--turn-timeout", type=float, default=30.0)
+    parser.add_argument("--workers", type=int, default=1, help="Run the app through live_gemini.server")
+    parser.add_argument("--app-log", help="Keep the app's output in this file")
+
+
+def parse_load_arguments(parser: argparse.ArgumentParser):
+    args = parser.parse_args()
+    args.answer_bytes = int(OUTPUT_SAMPLE_RATE * 2 * args.chunk_ms / 1000) * args.audio_chunks
+    return args
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load the app with concurrent voice sessions against local fakes "
+                                                 "of Gemini, Deepgram, Vertex, OpenSearch and the S3 config host.")
+    add_load_arguments(parser)
+    parser.add_argument("--no-store", action="store_true", help="Do not append this run to the results file")
+    asyncio.run(main(parse_load_arguments(parser)))
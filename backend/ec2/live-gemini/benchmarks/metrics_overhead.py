@@ -0,0 +1,94 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from live_gemini.enums.agent_types import AgentType
+from live_gemini.fakes.fake_llm_api import FakeLLMApi
+from live_gemini.graph import run_graph
+from live_gemini.utils import metrics as metrics_module
+from live_gemini.utils.metrics import MetricsRegistry, metrics
+from live_gemini.utils.session_context import SessionContext
+
+QUERIES = [
+    "What does the organic peanut butter taste like?",
+    "Is the crunchy one in stock?",
+    "Does it have any added sugar?",
+]
+
+
+def per_call_ns(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations * 1e9
+
+
+def micro(iterations: int, companies: int):
+    registry = MetricsRegistry()
+    histogram = registry.histogram("bench_seconds", "Benchmark histogram", ("company", "agent"))
+    counter = registry.counter("bench_total", "Benchmark counter", ("company",))
+
+    def timed():
+        with histogram.time("acme", "product_info"):
+            pass
+
+    print(f"{'operation':<22} {'ns/call':>9}")
+    print(f"{'histogram.observe':<22} {per_call_ns(lambda: histogram.observe(0.042, 'acme', 'product_info'), iterations):>9.0f}")
+    print(f"{'counter.inc':<22} {per_call_ns(lambda: counter.inc('acme'), iterations):>9.0f}")
+    print(f"{'histogram.time':<22} {per_call_ns(timed, iterations):>9.0f}")
+
+    for company in range(companies):
+        for agent in AgentType:
+            histogram.observe(0.1, f"company-{company}", agent.value)
+    start = time.perf_counter()
+    body = registry.render()
+    print(f"render {len(histogram._series)} series: {(time.perf_counter() - start) * 1000:.2f}ms, "
+          f"{len(body) / 1024:.0f}KB")
+
+
+async def turns_per_second(turns: int) -> float:
+    session_context = SessionContext()
+    session_context.set("company_id", "acme")
+    llm_live_api = FakeLLMApi(session_context, agent_type=AgentType.PRODUCT_INFO.value,
+                              reply="It is smooth and nutty with a little salt.")
+    start = time.perf_counter()
+    for turn in range(turns):
+        async for _ in run_graph(llm_live_api, session_context, QUERIES[turn % len(QUERIES)]):
+            pass
+    return turns / (time.perf_counter() - start)
+
+
+async def macro(turns: int, rounds: int):
+    # Alternate so warm-up and drift land on both sides equally
+    results = {True: [], False: []}
+    for _ in range(rounds):
+        for enabled in (False, True):
+            metrics_module.METRICS_ENABLED = enabled
+            results[enabled].append(await turns_per_second(turns))
+    metrics_module.METRICS_ENABLED = True
+
+    disabled, enabled = statistics.median(results[False]), statistics.median(results[True])
+    print(f"run_graph with zero model latency, {turns} turns x {rounds} rounds")
+    print(f"metrics off: {disabled:.0f} turns/s ({1e6 / disabled:.0f}us/turn)")
+    print(f"metrics on:  {enabled:.0f} turns/s ({1e6 / enabled:.0f}us/turn)")
+    print(f"overhead: {1e6 / enabled - 1e6 / disabled:+.1f}us/turn")
+
+
+async def main(iterations: int, companies: int, turns: int, rounds: int):
+    micro(iterations, companies)
+    print()
+    await macro(turns, rounds)
+    print()
+    print("sample exposition:")
+    print("\n".join(line for line in metrics.render().splitlines() if "voice_routing_seconds" in line)[:1200])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cost of recording and exporting the turn pipeline metrics.")
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--companies", type=int, default=200)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(main(args.iterations, args.companies, args.turns, args.rounds))
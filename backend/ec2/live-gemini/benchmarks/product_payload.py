@@ -0,0 +1,73 @@
+import argparse
+import asyncio
+
+import numpy as np
+
+from live_gemini.api.retrieve_products_api import SEARCH_FILTER_PATH, build_knn_query
+from live_gemini.constants.prompts import COMPARISON_PROMPT, LOCATION_PROMPT, PRODUCT_INFO_PROMPT
+from live_gemini.fakes.fake_catalog import generate_catalog
+from live_gemini.fakes.fake_opensearch import create_fake_opensearch
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.utils.http_clients import HttpClients
+from live_gemini.utils.product_record import render_products, to_product_records
+
+COMPANY_ID = "bench-company"
+
+
+def legacy_prompts(hits):
+    retrieve_products = {"results": hits}
+    return {
+        "ProductInfo": PRODUCT_INFO_PROMPT.format(user_query="", conversation_history=[], retrieve_products=retrieve_products),
+        "Comparison": COMPARISON_PROMPT.format(user_query="", conversation_history=[], retrieve_products=retrieve_products),
+        "Navigation": LOCATION_PROMPT.format(user_query="", conversation_history=[], retrieve_products=retrieve_products,
+                                             locations_str=""),
+    }
+
+
+def compact_prompts(hits):
+    products = to_product_records(hits)
+    return {
+        "ProductInfo": PRODUCT_INFO_PROMPT.format(user_query="", conversation_history=[],
+                                                  retrieve_products=render_products(products, "info")),
+        "Comparison": COMPARISON_PROMPT.format(user_query="", conversation_history=[],
+                                               retrieve_products=render_products(products, "comparison")),
+        "Navigation": LOCATION_PROMPT.format(user_query="", conversation_history=[],
+                                             retrieve_products=render_products(products, "summary"),
+                                             locations_str=render_products(products, "location")),
+    }
+
+
+async def main(products: int, k: int, dimensions: int):
+    catalog = generate_catalog(COMPANY_ID, products, dimensions)
+    embedding = np.random.default_rng(1).standard_normal(dimensions, dtype=np.float32)
+    client = HttpClients.get("opensearch")
+
+    async with FakeServer(create_fake_opensearch(catalog)) as url:
+        legacy_body = build_knn_query(embedding, k, COMPANY_ID)
+        del legacy_body["_source"]
+        legacy = await client.post(f"{url}/products/_search", json=legacy_body)
+        compact = await client.post(f"{url}/products/_search", json=build_knn_query(embedding, k, COMPANY_ID),
+                                    params={"filter_path": SEARCH_FILTER_PATH})
+
+    legacy_hits = legacy.json()["hits"]["hits"]
+    for hit in legacy_hits:
+        del hit["_source"]["embedding"]
+    compact_hits = compact.json()["hits"]["hits"]
+
+    print(f"k={k} dimensions={dimensions}")
+    print(f"{'response bytes':<26} legacy={len(legacy.content):>8} compact={len(compact.content):>8}")
+    legacy_prompt, compact_prompt = legacy_prompts(legacy_hits), compact_prompts(compact_hits)
+    for agent in legacy_prompt:
+        # ~4 characters per token is close enough to compare prompt sizes
+        print(f"{agent + ' prompt tokens':<26} legacy={len(legacy_prompt[agent]) // 4:>8} "
+              f"compact={len(compact_prompt[agent]) // 4:>8}")
+    await HttpClients.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare OpenSearch response size and agent prompt size per turn.")
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--dimensions", type=int, default=768)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.k, args.dimensions))
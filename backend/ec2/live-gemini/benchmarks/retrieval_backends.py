@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from live_gemini.api import retrieve_products_api as opensearch_api
+from live_gemini.api.local_products_api import retrieve_local_products_api
+from live_gemini.fakes.fake_catalog import generate_catalog
+from live_gemini.fakes.fake_opensearch import create_fake_opensearch
+from live_gemini.fakes.fake_server import FakeServer
+from live_gemini.utils import product_index
+from live_gemini.utils.embedding_cache import embedding_cache
+from live_gemini.utils.product_index import ProductIndexRegistry, write_snapshot
+from live_gemini.utils.semantic_result_cache import semantic_result_cache
+from live_gemini.utils.session_context import SessionContext
+
+COMPANY_ID = "bench-company"
+
+
+def report(label: str, samples: list[float]):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<24} mean={statistics.mean(samples) * 1000:8.3f}ms p95={p95 * 1000:8.3f}ms")
+
+
+async def timed(retrieve, queries: list[str], k: int, session_context: SessionContext) -> list[float]:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        result = await retrieve(query, k, session_context)
+        samples.append(time.perf_counter() - start)
+        if not result.get("results"):
+            raise SystemExit(f"{retrieve.__name__} returned no results: {result}")
+    return samples
+
+
+async def main(products: int, queries: int, k: int, dimensions: int):
+    catalog = generate_catalog(COMPANY_ID, products, dimensions)
+    rng = np.random.default_rng(1)
+    texts = [f"query {i}" for i in range(queries)]
+    for text in texts:
+        embedding_cache.put(text, "RETRIEVAL_QUERY", rng.standard_normal(dimensions, dtype=np.float32))
+    # Every query should reach the backend
+    semantic_result_cache.max_distance = -1.0
+
+    session_context = SessionContext()
+    session_context.set("company_info", {"companyId": COMPANY_ID})
+
+    with tempfile.TemporaryDirectory() as snapshot_dir:
+        product_index.PRODUCT_INDEX_DIR = snapshot_dir
+        start = time.perf_counter()
+        write_snapshot(ProductIndexRegistry.snapshot_directory(COMPANY_ID), catalog)
+        index = ProductIndexRegistry.refresh(COMPANY_ID)
+        print(f"snapshot write + load: {(time.perf_counter() - start) * 1000:.1f}ms, ann={index.ann is not None}")
+
+        async with FakeServer(create_fake_opensearch(catalog)) as url:
+            opensearch_api.OPENSEARCH_URL = url
+            opensearch_api.INDEX_NAME = "products"
+            opensearch_api.AWS_ACCESS_KEY = opensearch_api.AWS_SECRET_KEY = "bench"
+            opensearch_api.AWS_REGION = "us-east-1"
+
+            print(f"products={products} queries={queries} k={k} dimensions={dimensions}")
+            report("opensearch (local fake)", await timed(opensearch_api.retrieve_products_api, texts, k, session_context))
+            report("in-process index", await timed(retrieve_local_products_api, texts, k, session_context))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the OpenSearch and in-process retrieval backends.")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=4)
+    parser.add_argument("--dimensions", type=int, default=768)
+    args = parser.parse_args()
+    asyncio.run(main(args.products, args.queries, args.k, args.dimensions))
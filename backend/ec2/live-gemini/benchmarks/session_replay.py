@@ -0,0 +1,135 @@
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+# The scripted model answers every turn, so the local classifier must not skip the router
+os.environ["INTENT_FAST_PATH_ENABLED"] = "false"
+
+from fastapi import WebSocketDisconnect
+from google.genai.types import LiveServerMessage, Modality
+
+from live_gemini.api.live_llm_api import LLMApi
+from live_gemini.duplex_session import DuplexSession
+from live_gemini.enums.agent_types import AgentType
+from live_gemini.fakes.fake_catalog import generate_catalog
+from live_gemini.fakes.fake_stt import FakeSpeechToText
+from live_gemini.fakes.replay_upstreams import ReplayClient, ReplayLiveSession, ReplayRetrieval, ReplayTurn
+from live_gemini.replay import print_report, replay
+from live_gemini.utils.session_context import SessionContext
+from live_gemini.utils.session_recorder import SessionRecorder, binary_path
+
+QUERIES = [
+    "What does the organic peanut butter taste like?",
+    "Is the crunchy one in stock?",
+    "Does it have any added sugar?",
+]
+COMPANY_INFO = {"companyId": "replay-bench", "companyName": "Replay Foods", "industry": "Grocery"}
+
+
+def scripted_turns(turns: int, router_delay: float, answer_delay: float, frames: int,
+                   frame_seconds: float) -> list[ReplayTurn]:
+    # A live model that routes with two tool calls and answers with audio, standing in for production
+    frame = b"\x00" * int(24000 * 2 * frame_seconds)
+    script = []
+    for turn in range(turns):
+        router = ReplayTurn(speed=1.0)
+        router.segments[0] = [
+            (router_delay, LiveServerMessage.model_validate({"tool_call": {"function_calls": [
+                {"id": "1", "name": "set_agent", "args": {"agent_type": AgentType.PRODUCT_INFO.value}},
+                {"id": "2", "name": "retrieve_products", "args": {"query": QUERIES[turn % len(QUERIES)], "k": 4}},
+            ]}})),
+            (router_delay, LiveServerMessage.model_validate({"server_content": {"turn_complete": True}})),
+        ]
+        answer = ReplayTurn(speed=1.0)
+        answer.segments[0] = [
+            (answer_delay + index * frame_seconds, LiveServerMessage.model_validate({"server_content": {
+                "output_transcription": {"text": f"part {index} "},
+                "model_turn": {"parts": [{"inline_data": {"data": frame, "mime_type": "audio/pcm"}}]},
+            }}))
+            for index in range(frames)
+        ] + [(answer_delay + frames * frame_seconds,
+              LiveServerMessage.model_validate({"server_content": {"turn_complete": True}}))]
+        script.extend([router, answer])
+    return script
+
+
+class ScriptedSocket:
+    # Asks each question, then waits out the answer before the next one, like a polite shopper
+    def __init__(self, gap: float):
+        self.questions = list(QUERIES)
+        self.gap = gap
+        self.asked = 0
+
+    async def receive(self):
+        if self.asked:
+            await asyncio.sleep(self.gap)
+        if self.asked == len(self.questions):
+            raise WebSocketDisconnect()
+        self.asked += 1
+        return {"message": self.questions[self.asked - 1], "mimeType": "text/plain"}, None
+
+    async def send(self, response):
+        pass
+
+
+async def record(path: str, router_delay: float, answer_delay: float, retrieval_delay: float, frames: int,
+                 frame_seconds: float, gap: float):
+    products = generate_catalog(COMPANY_INFO["companyId"], 4, dimensions=8)
+    hits = [{"_id": product["sku"], "_score": 1.0, "_source": product} for product in products]
+    session_context = SessionContext()
+    session_context.set("company_id", COMPANY_INFO["companyId"])
+    session_context.set("company_info", {**COMPANY_INFO, "retrievalBackend": "replay"})
+    session_context.set("replay_retrieval", ReplayRetrieval([
+        {"query": query, "k": 4, "seconds": retrieval_delay, "result": {"results": hits}} for query in QUERIES
+    ], speed=1.0))
+
+    recorder = SessionRecorder(path)
+    session_context.set("recorder", recorder)
+    recorder.record("session", company_id=COMPANY_INFO["companyId"], company_info=COMPANY_INFO, protocol="json",
+                    turn_mode="graph")
+
+    live_session = ReplayLiveSession(scripted_turns(len(QUERIES), router_delay, answer_delay, frames, frame_seconds))
+    llm_live_api = LLMApi(None, None, session_context, stt=FakeSpeechToText(), client=ReplayClient(live_session))
+    await llm_live_api.get_session(modality=Modality.AUDIO)
+    try:
+        await DuplexSession(ScriptedSocket(gap), llm_live_api, session_context).run()
+    finally:
+        await recorder.close()
+        await llm_live_api.close()
+
+
+async def main(router_delay: float, answer_delay: float, retrieval_delay: float, frames: int, frame_ms: int):
+    frame_seconds = frame_ms / 1000
+    gap = router_delay + retrieval_delay + answer_delay + frames * frame_seconds + 0.5
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "session.jsonl")
+        await record(path, router_delay, answer_delay, retrieval_delay, frames, frame_seconds, gap)
+        print(f"recorded {len(QUERIES)} turns: {os.path.getsize(path) / 1024:.0f}KB of events, "
+              f"{os.path.getsize(binary_path(path)) / 1024:.0f}KB of audio")
+        print()
+
+        for speed in (1.0, 0.0):
+            start = time.perf_counter()
+            result = await replay(path, speed)
+            print_report(result)
+            drift = [
+                abs(turn["replayed_first_answer"] - turn["first_answer"]) for turn in result["turns"]
+                if turn["first_answer"] is not None and turn["replayed_first_answer"] is not None
+            ]
+            print(f"wall time {time.perf_counter() - start:.2f}s, "
+                  f"first answer drift vs recording: mean={statistics.mean(drift) * 1000:.1f}ms")
+            print()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record a scripted session, then replay it in real time and flat out.")
+    parser.add_argument("--router-delay", type=float, default=0.3)
+    parser.add_argument("--answer-delay", type=float, default=0.4)
+    parser.add_argument("--retrieval-delay", type=float, default=0.08)
+    parser.add_argument("--frames", type=int, default=10)
+    parser.add_argument("--frame-ms", type=int, default=60)
+    args = parser.parse_args()
+    asyncio.run(main(args.router_delay, args.answer_delay, args.retrieval_delay, args.frames, args.frame_ms))
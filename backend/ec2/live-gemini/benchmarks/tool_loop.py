@@ -0,0 +1,57 @@
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+# Measure the LLM routing path, not the local classifier shortcut
+os.environ["INTENT_FAST_PATH_ENABLED"] = "false"
+
+from live_gemini.enums.agent_types import AgentType
+from live_gemini.enums.message_types import MessageType
+from live_gemini.fakes.fake_llm_api import FakeLLMApi
+from live_gemini.graph import run_graph, run_tool_loop
+from live_gemini.utils.session_context import SessionContext
+
+QUERIES = [
+    "What does the organic peanut butter taste like?",
+    "Is the crunchy one in stock?",
+    "Does it have any added sugar?",
+]
+
+
+async def timed_turns(run, turns: int, delay: float, token_delay: float) -> tuple[list[float], list[float], int]:
+    session_context = SessionContext()
+    llm_live_api = FakeLLMApi(session_context, agent_type=AgentType.PRODUCT_INFO.value,
+                              reply="It is smooth and nutty with a little salt.", delay=delay,
+                              token_delay=token_delay)
+    first_chunk, total = [], []
+    for turn in range(turns):
+        start = time.perf_counter()
+        first = None
+        async for chunk in run(llm_live_api, session_context, QUERIES[turn % len(QUERIES)]):
+            if first is None and chunk["response"].get("type") == MessageType.TEXT.value:
+                first = time.perf_counter() - start
+        total.append(time.perf_counter() - start)
+        first_chunk.append(first)
+    return first_chunk, total, len(llm_live_api.prompts)
+
+
+async def main(turns: int, delay: float, token_delay: float):
+    print(f"turns={turns} time to first output={delay * 1000:.0f}ms + {token_delay * 1e6:.0f}us per input token")
+    print(f"{'mode':<10} {'prompts':>8} {'first answer':>13} {'turn total':>11}")
+    results = {}
+    for label, run in (("graph", run_graph), ("tool_loop", run_tool_loop)):
+        first_chunk, total, prompts = await timed_turns(run, turns, delay, token_delay)
+        results[label] = statistics.mean(first_chunk)
+        print(f"{label:<10} {prompts:>8} {results[label] * 1000:>11.1f}ms {statistics.mean(total) * 1000:>9.1f}ms")
+    print(f"saved per turn: {(results['graph'] - results['tool_loop']) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Turn latency of the two-pass graph versus a single tool-loop turn.")
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--delay", type=float, default=0.3)
+    parser.add_argument("--token-delay", type=float, default=0.0002)
+    args = parser.parse_args()
+    asyncio.run(main(args.turns, args.delay, args.token_delay))
@@ -0,0 +1,79 @@
+import argparse
+import asyncio
+import copy
+import datetime
+import json
+import os
+
+from load_test import add_load_arguments, fake_upstreams, git_revision, parse_load_arguments, run_logged
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "worker_scaling.jsonl")
+
+
+def within_slo(result: dict, slo_ms: float) -> bool:
+    return not result["failed_sessions"] and not result["timed_out_turns"] and result["first_audio_p95_ms"] <= slo_ms
+
+
+async def capacity(args, urls: dict, cert_path: str, directory: str, workers: int) -> dict:
+    # Steps through the session levels until first-audio p95 breaks the SLO; the last level that held is the capacity
+    best = None
+    for sessions in args.levels:
+        run_args = copy.copy(args)
+        run_args.workers = workers
+        run_args.sessions = sessions
+        result = await run_logged(run_args, urls, cert_path, directory)
+        held = within_slo(result, args.slo_ms)
+        print(f"  workers={workers} sessions={sessions} first_audio_p95={result['first_audio_p95_ms']:.0f}ms "
+              f"turns/s={result['turns_per_second']:.1f} failed={result['failed_sessions']} "
+              f"{'ok' if held else 'over SLO'}")
+        if not held:
+            break
+        best = result
+    return {
+        "workers": workers,
+        "max_sessions": best["sessions"] if best else 0,
+        "turns_per_second": best["turns_per_second"] if best else 0.0,
+        "first_audio_p95_ms": best["first_audio_p95_ms"] if best else float("nan"),
+        "rss_per_session_kb": best["rss_per_session_kb"] if best else float("nan"),
+        "baseline_rss_mb": best["baseline_rss_mb"] if best else float("nan"),
+    }
+
+
+async def main(args):
+    rows = []
+    async with fake_upstreams(args) as (urls, cert_path, directory):
+        for workers in args.worker_counts:
+            rows.append(await capacity(args, urls, cert_path, directory, workers))
+
+    print(f"cpus={os.cpu_count()} slo=first audio p95 <= {args.slo_ms:.0f}ms turns={args.turns}")
+    print(f"{'workers':>8} {'sessions':>9} {'turns/s':>8} {'p95_ms':>8} {'kb/sess':>8} {'base_mb':>8}")
+    for row in rows:
+        print(f"{row['workers']:>8} {row['max_sessions']:>9} {row['turns_per_second']:>8.1f} "
+              f"{row['first_audio_p95_ms']:>8.0f} {row['rss_per_session_kb']:>8.0f} {row['baseline_rss_mb']:>8.1f}")
+
+    if not args.no_store:
+        os.makedirs(os.path.dirname(RESULTS_PATH), exist_ok=True)
+        with open(RESULTS_PATH, "a") as file:
+            file.write(json.dumps({
+                "revision": git_revision(),
+                "recorded_at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+                "cpus": os.cpu_count(),
+                "params": {"slo_ms": args.slo_ms, "levels": args.levels, "turns": args.turns,
+                           "model_delay": args.model_delay},
+                "rows": rows,
+            }) + "\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how many concurrent voice sessions one host holds within "
+                                                 "a first-audio SLO as the number of workers grows.")
+    add_load_arguments(parser)
+    parser.add_argument("--worker-counts", default=f"1,2,{max(os.cpu_count() or 1, 4)}",
+                        help="Comma separated worker counts to measure")
+    parser.add_argument("--levels", default="25,50,100,200,400", help="Comma separated session counts to try")
+    parser.add_argument("--slo-ms", type=float, default=2000.0, help="First-audio p95 a level must stay under")
+    parser.add_argument("--no-store", action="store_true", help="Do not append this run to the results file")
+    args = parse_load_arguments(parser)
+    args.worker_counts = [int(count) for count in args.worker_counts.split(",")]
+    args.levels = [int(level) for level in args.levels.split(",")]
+    asyncio.run(main(args))
@@ -1,12 +1,15 @@
 from ..constants.prompts import FALLBACK_PROMPT
-from ..utils.global_store import GlobalStore
+from ..utils.prompt_blocks import SESSION_HISTORY_NOTE
+from ..utils.session_context import SessionContext
 from typing import Any
 
-store = GlobalStore()
 
-
-async def fallback_agent(llm_live_api, user_query: str) -> Any:
-    conversation_history = store.get("conversation_history")
+async def fallback_agent(llm_live_api, session_context: SessionContext, user_query: str) -> Any:
+    conversation_history = llm_live_api.prompt_blocks.render(
+        "conversation_history",
+        session_context.get("conversation_history").render,
+        SESSION_HISTORY_NOTE
+    )
 
     prompt = FALLBACK_PROMPT.format(
         user_query=user_query,
@@ -0,0 +1,116 @@
+import numpy as np
+import os
+import re
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+
+from ..constants.agent_info import AGENTS_INFO, AgentInfo
+from ..enums.agent_types import AgentType
+
+load_dotenv()
+
+# Minimum gap between the best and second-best agent similarity for a query to skip the LLM router
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.12"))
+INTENT_MIN_SIMILARITY = float(os.getenv("INTENT_MIN_SIMILARITY", "0.15"))
+INTENT_FAST_PATH_ENABLED = os.getenv("INTENT_FAST_PATH_ENABLED", "true").lower() == "true"
+
+# Only agents whose answer depends on retrieved products are routed locally
+FAST_PATH_AGENTS = {AgentType.NAVIGATION.value, AgentType.PRODUCT_INFO.value, AgentType.COMPARISON.value}
+
+STOP_WORDS = {
+    "a", "an", "the", "is", "are", "to", "of", "in", "on", "for", "me", "my", "i", "you", "it", "this", "that",
+    "do", "does", "can", "be", "with", "and", "or", "there", "any", "some", "what", "your", "have", "has", "i'm",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+
+def tokenize(text: str) -> List[str]:
+    words = [word.strip("'") for word in TOKEN_PATTERN.findall(text.lower().replace("’", "'"))]
+    words = [word[:-1] if len(word) > 3 and word.endswith("s") and not word.endswith("ss") else word
+             for word in words if word and word not in STOP_WORDS]
+    return words + [f"{first} {second}" for first, second in zip(words, words[1:])]
+
+
+class IntentResult:
+    __slots__ = ("agent_type", "similarity", "margin", "confident")
+
+    def __init__(self, agent_type: str, similarity: float, margin: float, confident: bool):
+        self.agent_type = agent_type
+        self.similarity = similarity
+        self.margin = margin
+        self.confident = confident
+
+
+class IntentClassifier:
+    def __init__(self, examples: Dict[str, List[str]], threshold: float = INTENT_CONFIDENCE_THRESHOLD,
+                 min_similarity: float = INTENT_MIN_SIMILARITY):
+        self.threshold = threshold
+        self.min_similarity = min_similarity
+        self.agent_types = list(examples)
+
+        documents = [(agent_type, tokenize(text)) for agent_type, texts in examples.items() for text in texts]
+        vocabulary = sorted({token for _, tokens in documents for token in tokens})
+        self.vocabulary = {token: i for i, token in enumerate(vocabulary)}
+
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float32)
+        for _, tokens in documents:
+            for token in set(tokens):
+                document_frequency[self.vocabulary[token]] += 1
+        self.idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1
+
+        centroids = np.zeros((len(self.agent_types), len(vocabulary)), dtype=np.float32)
+        for agent_type, tokens in documents:
+            centroids[self.agent_types.index(agent_type)] += self._vectorize(tokens)
+        norms = np.linalg.norm(centroids, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        self.centroids = centroids / norms
+
+        self._stats = {"classified": 0, "confident": 0, "by_agent": {agent_type: 0 for agent_type in self.agent_types}}
+
+    @classmethod
+    def from_agents_info(cls, agents_info: Dict[str, AgentInfo], **kwargs) -> "IntentClassifier":
+        examples = {
+            name: [info["description"], *info["capabilities"], *info["sample_user_questions"]]
+            for name, info in agents_info.items()
+        }
+        return cls(examples, **kwargs)
+
+    def _vectorize(self, tokens: List[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary), dtype=np.float32)
+        for token in tokens:
+            index = self.vocabulary.get(token)
+            if index is not None:
+                vector[index] += 1
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def classify(self, text: str) -> IntentResult:
+        similarities = self.centroids @ self._vectorize(tokenize(text))
+        ranked = np.argsort(-similarities)
+        best, runner_up = int(ranked[0]), int(ranked[1])
+        similarity = float(similarities[best])
+        margin = similarity - float(similarities[runner_up])
+        agent_type = self.agent_types[best]
+        confident = (agent_type in FAST_PATH_AGENTS and similarity >= self.min_similarity
+                     and margin >= self.threshold)
+
+        self._stats["classified"] += 1
+        if confident:
+            self._stats["confident"] += 1
+            self._stats["by_agent"][agent_type] += 1
+        return IntentResult(agent_type, similarity, margin, confident)
+
+    def stats(self) -> Dict[str, Any]:
+        classified = self._stats["classified"]
+        return {
+            **self._stats,
+            "hit_rate": self._stats["confident"] / classified if classified else 0.0,
+            "threshold": self.threshold,
+        }
+
+
+intent_classifier: Optional[IntentClassifier] = (
+    IntentClassifier.from_agents_info(AGENTS_INFO) if INTENT_FAST_PATH_ENABLED else None
+)
@@ -1,30 +1,24 @@
 from typing import Dict, Any
 from ..constants.prompts import LOCATION_PROMPT
-from ..utils.global_store import GlobalStore
+from ..utils.product_record import render_products
+from ..utils.prompt_blocks import SESSION_HISTORY_NOTE
+from ..utils.session_context import SessionContext
 
-store = GlobalStore()
 
+async def navigation_agent(llm_live_api, session_context: SessionContext, user_query: str, retrieve_products: Dict[str, Any]) -> Any:
+    conversation_history = llm_live_api.prompt_blocks.render(
+        "conversation_history",
+        session_context.get("conversation_history").render,
+        SESSION_HISTORY_NOTE
+    )
 
-async def navigation_agent(llm_live_api, user_query: str, retrieve_products: Dict[str, Any]) -> Any:
-    conversation_history = store.get("conversation_history")
-
-    product_locations = []
-    for product in retrieve_products.get("products", []):
-        name = product.get("name", "Unknown")
-        location = product.get("location", {})
-        aisle = location.get("aisle", "Unknown")
-        section = location.get("section", "Unknown")
-        shelf = location.get("shelf", "Unknown")
-        product_locations.append(
-            f"{name}: aisle {aisle}, section {section}, shelf {shelf}"
-        )
-    locations_str = "\n".join(product_locations)
+    products = (retrieve_products or {}).get("products", [])
 
     prompt = LOCATION_PROMPT.format(
         user_query=user_query,
         conversation_history=conversation_history,
-        retrieve_products=retrieve_products,
-        locations_str=locations_str
+        retrieve_products=render_products(products, "summary"),
+        locations_str=render_products(products, "location")
     )
 
     async for response in llm_live_api.live_chat(prompt=prompt):
@@ -1,16 +1,20 @@
 from ..constants.prompts import PRODUCT_INFO_PROMPT
-from ..utils.global_store import GlobalStore
+from ..utils.product_record import render_products
+from ..utils.prompt_blocks import SESSION_HISTORY_NOTE
+from ..utils.session_context import SessionContext
 
-store = GlobalStore()
 
-
-async def product_info_agent(llm_live_api, user_query: str, retrieve_products: dict[str, any]) -> any:
-    conversation_history = store.get("conversation_history")
+async def product_info_agent(llm_live_api, session_context: SessionContext, user_query: str, retrieve_products: dict[str, any]) -> any:
+    conversation_history = llm_live_api.prompt_blocks.render(
+        "conversation_history",
+        session_context.get("conversation_history").render,
+        SESSION_HISTORY_NOTE
+    )
 
     prompt = PRODUCT_INFO_PROMPT.format(
         user_query=user_query,
         conversation_history=conversation_history,
-        retrieve_products=retrieve_products
+        retrieve_products=render_products((retrieve_products or {}).get("products", []), "info")
     )
 
     async for response in llm_live_api.live_chat(prompt=prompt):
@@ -1,12 +1,15 @@
+from .intent_classifier import intent_classifier
 from ..constants.agent_info import AGENTS_INFO
 from ..constants.prompts import AGENT_ROUTER_PROMPT
 from ..enums.agent_types import AgentType
 from ..enums.message_types import MessageType
 from ..tools.agent_selector_tool import AgentSelectorTool
 from ..tools.retrieve_products_tool import RetrieveProductsTool
-from ..utils.global_store import GlobalStore
-
-store = GlobalStore()
+from ..tools.speculative_retrieval import SpeculativeRetrieval
+from ..utils.metrics import TOOL_SECONDS, company_label
+from ..utils.prompt_blocks import SESSION_AGENTS_NOTE, SESSION_HISTORY_NOTE
+from ..utils.session_context import SessionContext
+from typing import Any, Dict, Optional
 
 FORMATTED_AGENTS = "\n\n".join([
     (
@@ -19,20 +22,60 @@ FORMATTED_AGENTS = "\n\n".join([
 ])
 
 
-async def determine_agent(llm_live_api, query: str):
+# Number of products retrieved when the local classifier routes without the LLM
+FAST_PATH_K = 4
+
+
+async def retrieve_products(tool_call: Dict[str, Any], session_context: SessionContext,
+                            speculation: Optional[SpeculativeRetrieval]) -> Dict[str, Any]:
+    with TOOL_SECONDS.time(company_label(session_context), "retrieve_products"):
+        if speculation is None:
+            return await RetrieveProductsTool.execute(tool_call, session_context)
+        arguments = tool_call.get("arguments") or {}
+        return await speculation.resolve(arguments.get("query") or "", arguments.get("k", FAST_PATH_K),
+                                         session_context)
+
+
+async def determine_agent(llm_live_api, session_context: SessionContext, query: str,
+                          speculation: Optional[SpeculativeRetrieval] = None):
     agent_type = AgentType.FALLBACK.value
     retrieved_products = None
     interrupted = False
 
     try:
-        conversation_history = store.get("conversation_history", [])
-        booking_state = store.get("booking_state")
-        company_info = store.get("company_info")
+        if intent_classifier is not None:
+            intent = intent_classifier.classify(query)
+            if intent.confident:
+                print(f"Fast-path routing to {intent.agent_type} (margin {intent.margin:.2f})")
+                # A failed search still answers with the confident route, the agent sees the error instead of products
+                try:
+                    retrieved_products = await retrieve_products(
+                        {"arguments": {"query": query, "k": FAST_PATH_K}},
+                        session_context,
+                        speculation
+                    )
+                except Exception as e:
+                    print(f"Error retrieving products on the fast path: {e}")
+                    retrieved_products = {"query": query, "products": [], "error": str(e)}
+                return {
+                    "agent_type": intent.agent_type,
+                    "retrieved_products": retrieved_products,
+                    "interrupted": False
+                }
+
+        conversation_history = llm_live_api.prompt_blocks.render(
+            "conversation_history",
+            session_context.get("conversation_history").render,
+            SESSION_HISTORY_NOTE
+        )
+        agents_info = llm_live_api.prompt_blocks.render("agents_info", lambda: FORMATTED_AGENTS, SESSION_AGENTS_NOTE)
+        booking_state = session_context.get("booking_state")
+        company_info = session_context.get("company_info")
         services = company_info.get("services") if company_info else None
 
         prompt = AGENT_ROUTER_PROMPT.format(
             query=query,
-            agents_info=FORMATTED_AGENTS,
+            agents_info=agents_info,
             conversation_history=conversation_history,
             booking_state=booking_state,
             services=services
@@ -49,7 +92,7 @@ async def determine_agent(llm_live_api, query: str):
                             agent_type = AgentSelectorTool.execute(response)
 
                         case "retrieve_products":
-                            retrieved_products = await RetrieveProductsTool.execute(response)
+                            retrieved_products = await retrieve_products(response, session_context, speculation)
 
         return {
             "agent_type": agent_type,
@@ -61,6 +104,7 @@ async def determine_agent(llm_live_api, query: str):
         print(f"Error determining agent: {e}")
         return {
             "agent_type": AgentType.FALLBACK.value,
+            "retrieved_products": retrieved_products,
             "interrupted": False,
             "error": str(e)
         }
@@ -0,0 +1,65 @@
+from .router_agent import FORMATTED_AGENTS, retrieve_products
+from ..constants.prompts import COMPARISON_INSTRUCTIONS, FALLBACK_INSTRUCTIONS, LOCATION_INSTRUCTIONS, \
+    PRODUCT_INFO_INSTRUCTIONS, TOOL_LOOP_PROMPT
+from ..enums.agent_types import AgentType
+from ..tools.agent_selector_tool import AgentSelectorTool
+from ..tools.speculative_retrieval import SpeculativeRetrieval
+from ..utils.product_record import render_products
+from ..utils.prompt_blocks import SESSION_AGENTS_NOTE, SESSION_HISTORY_NOTE
+from ..utils.session_context import SessionContext
+from typing import Any, Dict, FrozenSet, Optional
+
+AGENT_INSTRUCTIONS = {
+    AgentType.COMPARISON.value: COMPARISON_INSTRUCTIONS,
+    AgentType.NAVIGATION.value: LOCATION_INSTRUCTIONS,
+    AgentType.PRODUCT_INFO.value: PRODUCT_INFO_INSTRUCTIONS,
+    AgentType.FALLBACK.value: FALLBACK_INSTRUCTIONS,
+}
+
+# Same product renderings the two-pass agents paste into their prompts
+PRODUCT_STYLES = {
+    AgentType.COMPARISON.value: ("comparison",),
+    AgentType.NAVIGATION.value: ("summary", "location"),
+}
+
+
+async def tool_loop_agent(llm_live_api, session_context: SessionContext, query: str, agent_types: FrozenSet[str],
+                          speculation: Optional[SpeculativeRetrieval] = None) -> Any:
+    selected = {"agent_type": AgentType.FALLBACK.value}
+
+    async def handle_tool(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        match name:
+            case "set_agent":
+                agent_type = AgentSelectorTool.execute({"arguments": arguments})
+                # Agents disabled for a company are answered by the fallback agent
+                if agent_type not in agent_types:
+                    agent_type = AgentType.FALLBACK.value
+                selected["agent_type"] = agent_type
+                session_context.set("current_agent", agent_type)
+                return {"agent": agent_type, "instructions": AGENT_INSTRUCTIONS[agent_type]}
+
+            case "retrieve_products":
+                result = await retrieve_products({"arguments": arguments}, session_context, speculation)
+                styles = PRODUCT_STYLES.get(selected["agent_type"], ("info",))
+                response = {"products": "\n".join(render_products(result["products"], style) for style in styles)}
+                if result.get("error"):
+                    response["error"] = result["error"]
+                return response
+
+        return {"error": f"Unknown tool {name}"}
+
+    conversation_history = llm_live_api.prompt_blocks.render(
+        "conversation_history",
+        session_context.get("conversation_history").render,
+        SESSION_HISTORY_NOTE
+    )
+    agents_info = llm_live_api.prompt_blocks.render("agents_info", lambda: FORMATTED_AGENTS, SESSION_AGENTS_NOTE)
+
+    prompt = TOOL_LOOP_PROMPT.format(
+        query=query,
+        conversation_history=conversation_history,
+        agents_info=agents_info
+    )
+
+    async for response in llm_live_api.live_chat(prompt=prompt, tool_handler=handle_tool):
+        yield response
@@ -1,52 +1,98 @@
 import asyncio
-import base64
 import os
+import time
 import vertexai
-from deepgram import (
-    DeepgramClient,
-    PrerecordedOptions,
-    FileSource,
-)
 from dotenv import load_dotenv
 from google import genai
-from google.genai.types import Content, LiveConnectConfig, Modality, Part, SpeechConfig, VoiceConfig, \
+from google.genai.types import Content, FunctionResponse, HttpOptions, LiveConnectConfig, Modality, Part, SpeechConfig, VoiceConfig, \
     PrebuiltVoiceConfig, RealtimeInputConfig, AutomaticActivityDetection, StartSensitivity, EndSensitivity
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
 
-from ..constants.prompts import SYSTEM_INSTRUCTION_TEMPLATE
+from ..constants.prompts import CONVERSATION_SUMMARY_PROMPT, SYSTEM_INSTRUCTION_TEMPLATE
 from ..enums.message_types import MessageType
+from ..stt.base_stt import SpeechToText, TranscriptionStream, parse_sample_rate
+from ..stt.stt_factory import create_stt
 from ..tools.agent_selector_tool import AgentSelectorTool
 from ..tools.retrieve_products_tool import RetrieveProductsTool
-from ..utils.global_store import GlobalStore
+from ..utils.audio_coalescer import AudioCoalescer
+from ..utils.audio_protocol import OUTPUT_SAMPLE_RATE
+from ..utils.conversation_memory import CONVERSATION_SUMMARIZER, CONVERSATION_SUMMARY_TOKENS, format_turn
+from ..utils.prompt_blocks import PromptBlocks
+from ..utils.session_context import SessionContext
 
 load_dotenv()
-DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+SUMMARY_MODEL = os.getenv("SUMMARY_MODEL", "gemini-2.0-flash")
+# Overrides the Vertex AI endpoint, for a private endpoint or a local stand-in
+GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
 
+_clients: Dict[Tuple[str, int], genai.Client] = {}
 
-class LLMApi:
-    def __init__(self, credentials, project_id):
+# Executes one function call from the model and returns the result sent back as its tool response
+ToolHandler = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def get_client(credentials, project_id) -> genai.Client:
+    # One client per project and credentials object, shared by every live session
+    key = (project_id, id(credentials))
+    client = _clients.get(key)
+    if client is None:
         vertexai.init(project=project_id, location="us-central1", credentials=credentials)
-        self.client = genai.Client(project=project_id, location='us-central1', vertexai=True, credentials=credentials)
-        self.store = GlobalStore()
-        self.session = None
-        self.deepgram = DeepgramClient(api_key=DEEPGRAM_API_KEY)
+        client = genai.Client(project=project_id, location='us-central1', vertexai=True, credentials=credentials,
+                              http_options=HttpOptions(base_url=GEMINI_BASE_URL) if GEMINI_BASE_URL else None)
+        _clients[key] = client
+    return client
 
-        company_info = self.store.get("company_info") or {}
 
-        formatted_instruction = SYSTEM_INSTRUCTION_TEMPLATE.format(
-            company_name=company_info.get("companyName", "Unknown Company"),
-            industry=company_info.get("industry", "Unknown Industry")
-        )
+def build_base_config(company_info: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    company_info = company_info or {}
+
+    formatted_instruction = SYSTEM_INSTRUCTION_TEMPLATE.format(
+        company_name=company_info.get("companyName", "Unknown Company"),
+        industry=company_info.get("industry", "Unknown Industry")
+    )
+
+    return {
+        "system_instruction": formatted_instruction,
+        "tools": [{"function_declarations": [
+            AgentSelectorTool.set_tool_config(),
+            RetrieveProductsTool.set_tool_config()
+        ]}],
+    }
+
+
+class LLMApi:
+    # Connections left behind by abandoned turns, closed in the background
+    _closing: Set[asyncio.Task] = set()
 
-        self.base_config = {
-            "system_instruction": formatted_instruction,
-            "tools": [{"function_declarations": [
-                AgentSelectorTool.set_tool_config(),
-                RetrieveProductsTool.set_tool_config()
-            ]}],
-        }
+    def __init__(self, credentials, project_id, session_context: SessionContext, stt: Optional[SpeechToText] = None,
+                 client: Optional[genai.Client] = None):
+        self.client = client or get_client(credentials, project_id)
+        self.session = None
+        self.stt = stt or create_stt(client=self.client)
+        self.prompt_blocks = PromptBlocks()
+        self.base_config = build_base_config(session_context.get("company_info"))
         self._connection = None
+        self.current_model = None
         self.current_modality = None
+        self.connected_at: Optional[float] = None
+        self._turn_open = False
+        self._replacement: Optional[asyncio.Task] = None
+        self.attach(session_context)
+
+    def attach(self, session_context: SessionContext):
+        # Pooled sessions are connected before the shopper's session context exists
+        self.session_context = session_context
+        if CONVERSATION_SUMMARIZER == "llm":
+            self.session_context.get("conversation_history").summarizer = self.summarize_conversation
+
+    async def summarize_conversation(self, summary: str, turns: List[Dict[str, str]]) -> str:
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(
+            summary=summary or "(none)",
+            turns="\n".join(format_turn(turn) for turn in turns),
+            max_words=CONVERSATION_SUMMARY_TOKENS * 3 // 4
+        )
+        response = await self.client.aio.models.generate_content(model=SUMMARY_MODEL, contents=prompt)
+        return response.text or summary
 
     async def get_session(self, model: str = "gemini-2.0-flash-exp", modality: Modality = Modality.TEXT,
                           max_retries: int = 3) -> Optional[Any]:
@@ -55,6 +101,7 @@ class LLMApi:
             try:
                 if self.session is None:
                     print(f"Creating new live connection session (attempt {attempt + 1}/{max_retries})")
+                    self.current_model = model
                     self.current_modality = modality
 
                     config = LiveConnectConfig(
@@ -85,6 +132,8 @@ class LLMApi:
                         config=config
                     )
                     self.session = await self._connection.__aenter__()
+                    self.connected_at = time.monotonic()
+                    self.prompt_blocks.reset()
                 return self.session
             except Exception as e:
                 attempt += 1
@@ -98,6 +147,13 @@ class LLMApi:
                 else:
                     raise Exception("Our service is currently down. Please try again later.") from e
 
+    async def close(self):
+        if self._replacement is not None:
+            self._replacement.cancel()
+            self._replacement = None
+        await self.stt.close()
+        await self.close_session()
+
     async def close_session(self):
         if self.session and self._connection:
             try:
@@ -107,6 +163,8 @@ class LLMApi:
             finally:
                 self.session = None
                 self._connection = None
+                self._turn_open = False
+                self.prompt_blocks.reset()
 
     def _format_tool_response(self, tool_call) -> list:
         responses = []
@@ -118,61 +176,108 @@ class LLMApi:
             })
         return responses
 
-    async def transcribe_audio(self, base64_str: str, mime_type: str) -> str:
+    async def transcribe_audio(self, audio_data: bytes, mime_type: str) -> str:
         try:
-            audio_data = base64.b64decode(base64_str)
-
-            sample_rate = 16000
-            if ";rate=" in mime_type:
-                try:
-                    sample_rate = int(mime_type.split(";rate=")[1])
-                except:
-                    pass
-
-            payload: FileSource = {
-                "buffer": audio_data,
-                "mimetype": "audio/l16",
-                "encoding": "linear16",
-                "sample_rate": sample_rate,
-                "channels": 1,
-                "bits_per_sample": 16
-            }
-
-            options = PrerecordedOptions(
-                model="nova-3",
-                smart_format=True,
-                language="en-US",
-                encoding="linear16",
-                sample_rate=sample_rate
-            )
-            response = self.deepgram.listen.rest.v("1").transcribe_file(
-                payload,
-                options
-            )
-
-            if (response and hasattr(response, 'results') and
-                    hasattr(response.results, 'channels') and
-                    len(response.results.channels) > 0 and
-                    len(response.results.channels[0].alternatives) > 0):
-                transcription = response.results.channels[0].alternatives[0].transcript
-                print(f"Transcription: {transcription}")
-                return transcription
-
-            raise Exception("No transcription received")
+            transcription = await self.stt.transcribe(audio_data, parse_sample_rate(mime_type))
+            print(f"Transcription: {transcription}")
+            return transcription
 
         except Exception as e:
             print(f"Transcription Error: {e}")
             print(f"Input mime_type was: {mime_type}")
             raise
 
+    async def open_transcription_stream(self, mime_type: str) -> TranscriptionStream:
+        return await self.stt.open_stream(parse_sample_rate(mime_type))
+
+    def abandon_turn(self):
+        # A barge-in cancels live_chat mid-turn, leaving the rest of that answer queued on the connection. The
+        # Live API has no way to cancel a client_content turn, and reading the answer out would hold the next one
+        # back, so the connection is dropped and a replacement is connected while the shopper is still talking
+        if not self._turn_open or self._replacement is not None:
+            return
+        connection = self._connection
+        self.session = None
+        self._connection = None
+        self._turn_open = False
+        self.prompt_blocks.reset()
+        if connection is not None:
+            task = asyncio.create_task(self._close_connection(connection))
+            LLMApi._closing.add(task)
+            task.add_done_callback(LLMApi._closing.discard)
+        self._replacement = asyncio.create_task(self._replace_session())
+
+    async def prepare_turn(self):
+        # Runs before a turn renders its prompt: a replaced connection starts without context, and in delta mode
+        # the prompt must then carry the full history again
+        if self._turn_open:
+            self.abandon_turn()
+        replacement, self._replacement = self._replacement, None
+        if replacement is not None:
+            try:
+                await replacement
+            except Exception as e:
+                print(f"Could not replace abandoned live session: {e}")
+        if self.session is None and self.current_modality is not None:
+            await self.get_session(model=self.current_model, modality=self.current_modality)
+
+    @staticmethod
+    async def _close_connection(connection):
+        try:
+            await connection.__aexit__(None, None, None)
+        except Exception as e:
+            print(f"Error closing abandoned session: {e}")
+
+    async def _replace_session(self):
+        from .live_session_pool import LiveSessionPool
+
+        # A warm pooled connection skips the connect, only its connection is taken over
+        pooled = LiveSessionPool.acquire(self.session_context.get("company_id"),
+                                         self.session_context.get("company_info"), self.session_context)
+        if pooled is not None:
+            self.attach(self.session_context)
+            if (pooled.session is not None and pooled.current_model == self.current_model
+                    and pooled.current_modality == self.current_modality):
+                self.session, self._connection, self.connected_at = pooled.session, pooled._connection, pooled.connected_at
+                pooled.session = None
+                pooled._connection = None
+            await pooled.close()
+            if self.session is not None:
+                return
+        await self.get_session(model=self.current_model, modality=self.current_modality)
+
+    async def _answer_tool_call(self, tool_call, tool_handler: ToolHandler):
+        async def call(function_call) -> FunctionResponse:
+            try:
+                response = await tool_handler(function_call.name, function_call.args or {})
+            except Exception as e:
+                print(f"Tool {function_call.name} failed: {e}")
+                response = {"error": str(e)}
+            return FunctionResponse(id=function_call.id, name=function_call.name, response=response)
+
+        responses = await asyncio.gather(*(call(function_call) for function_call in tool_call.function_calls))
+        await self.session.send_tool_response(function_responses=list(responses))
+        recorder = self.session_context.get("recorder")
+        if recorder is not None:
+            recorder.record("model_tool_response", responses=[
+                {"name": response.name, "response": response.response} for response in responses
+            ])
+
     async def live_chat(
             self,
-            prompt: str
+            prompt: str,
+            tool_handler: Optional[ToolHandler] = None
     ) -> Any:
         try:
             if not self.session:
                 raise Exception("No active session. WebSocket connection may have been lost.")
 
+            await self.prepare_turn()
+
+            recorder = self.session_context.get("recorder")
+            if recorder is not None:
+                recorder.record("model_prompt", prompt=prompt)
+
             user_turns = Content(
                 role="user",
                 parts=[Part(text=prompt)],
@@ -182,17 +287,40 @@ class LLMApi:
                 turns=user_turns,
                 turn_complete=True
             )
+            self._turn_open = True
 
             current_assistant_message = ""
             seen_texts = set()
             last_sent_transcript = ""
+            coalescer = AudioCoalescer(OUTPUT_SAMPLE_RATE)
+            audio_mime_type = f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}"
+
+            def audio_message(audio: bytes) -> Dict[str, Any]:
+                nonlocal last_sent_transcript
+                # The transcript delta is computed once per coalesced frame rather than per model part
+                new_transcript = current_assistant_message[len(last_sent_transcript):].strip() or None
+                if new_transcript:
+                    last_sent_transcript = current_assistant_message
+                return {
+                    "type": MessageType.AUDIO.value,
+                    "audio": audio,
+                    "transcript": new_transcript,
+                    "mimeType": audio_mime_type
+                }
 
             try:
                 async for message in self.session.receive():
+                    if recorder is not None:
+                        # Python mode keeps audio as bytes, which the recorder stores raw instead of as base64
+                        recorder.record("model_message", message=message.model_dump(exclude_none=True))
+
                     if (hasattr(message, 'server_content') and
                             message.server_content and
                             hasattr(message.server_content, 'interrupted')):
                         if message.server_content.interrupted:
+                            frame = coalescer.flush(interrupted=True)
+                            if frame:
+                                yield audio_message(frame)
                             yield {
                                 "type": MessageType.STATUS.value,
                                 "interrupted": True
@@ -219,23 +347,10 @@ class LLMApi:
                                             part.inline_data and
                                             hasattr(part.inline_data, 'data') and
                                             part.inline_data.data):
-                                        new_transcript = current_assistant_message[len(last_sent_transcript):].strip()
-                                        if new_transcript:
-                                            print(f"New transcript: {new_transcript}")
-                                        if not new_transcript:
-                                            new_transcript = None
-
-                                        audio_message = {
-                                            "type": MessageType.AUDIO.value,
-                                            "message": base64.b64encode(part.inline_data.data).decode('utf-8'),
-                                            "transcript": new_transcript,
-                                            "mimeType": f"{part.inline_data.mime_type};rate=24000"
-                                        }
-
-                                        if new_transcript:
-                                            last_sent_transcript = current_assistant_message
-
-                                        yield audio_message
+                                        audio_mime_type = f"{part.inline_data.mime_type};rate={OUTPUT_SAMPLE_RATE}"
+                                        frame = coalescer.add(part.inline_data.data)
+                                        if frame:
+                                            yield audio_message(frame)
 
                     if self.current_modality == Modality.TEXT:
                         if (hasattr(message, 'text') and
@@ -251,10 +366,17 @@ class LLMApi:
                             message.tool_call and
                             hasattr(message.tool_call, 'function_calls') and
                             message.tool_call.function_calls):
+                        # Audio spoken before the call goes out first, the tool result may take a while
+                        frame = coalescer.flush()
+                        if frame:
+                            yield audio_message(frame)
                         try:
                             tool_responses = self._format_tool_response(message.tool_call)
                             for tool_response in tool_responses:
                                 yield tool_response
+                            # With a handler the model gets the results on this session and keeps answering
+                            if tool_handler is not None:
+                                await self._answer_tool_call(message.tool_call, tool_handler)
                         except Exception as tool_e:
                             print(f"Error formatting tool call: {tool_e}")
                             yield {
@@ -262,12 +384,16 @@ class LLMApi:
                                 "content": f"Error processing tool call: {str(tool_e)}"
                             }
 
+                self._turn_open = False
+
+                frame = coalescer.flush()
+                if frame:
+                    yield audio_message(frame)
+
                 cleaned_message = current_assistant_message.replace("None", "").strip()
 
                 if cleaned_message:
-                    conversation_history = self.store.get("conversation_history")
-                    conversation_history.append({'role': 'system', 'content': cleaned_message})
-                    self.store.set("conversation_history", conversation_history)
+                    self.session_context.get("conversation_history").append("assistant", cleaned_message)
 
 
             except Exception as inner_e:
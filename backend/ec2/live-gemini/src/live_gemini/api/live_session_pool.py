@@ -0,0 +1,187 @@
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from dotenv import load_dotenv
+from google.genai.types import Modality
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+from .live_llm_api import LLMApi, build_base_config
+from ..utils.google_credentials import GoogleCredentialManager
+from ..utils.metrics import metrics
+from ..utils.session_context import SessionContext
+
+load_dotenv()
+
+# Ready live sessions kept per company and session config, 0 disables the pool
+LIVE_SESSION_POOL_SIZE = int(os.getenv("LIVE_SESSION_POOL_SIZE", "0"))
+# Seconds a pooled session may sit unused, well inside Gemini's ~10 minute connection limit
+LIVE_SESSION_POOL_MAX_IDLE = float(os.getenv("LIVE_SESSION_POOL_MAX_IDLE", "120"))
+# Seconds after the last checkout a company's pool keeps being refilled
+LIVE_SESSION_POOL_KEEPALIVE = float(os.getenv("LIVE_SESSION_POOL_KEEPALIVE", "600"))
+LIVE_SESSION_POOL_SWEEP_INTERVAL = float(os.getenv("LIVE_SESSION_POOL_SWEEP_INTERVAL", "15"))
+
+PoolKey = Tuple[str, str]
+
+
+class PooledSession:
+    __slots__ = ("llm_live_api", "ready_at")
+
+    def __init__(self, llm_live_api: LLMApi):
+        self.llm_live_api = llm_live_api
+        self.ready_at = time.monotonic()
+
+
+class LiveSessionPool:
+    _pools: Dict[PoolKey, Deque[PooledSession]] = {}
+    _company_info: Dict[PoolKey, Dict[str, Any]] = {}
+    _last_used: Dict[PoolKey, float] = {}
+    _warming: Dict[PoolKey, int] = {}
+    _tasks: Set[asyncio.Task] = set()
+    _sweeper: Optional[asyncio.Task] = None
+    _stats = {"hits": 0, "misses": 0, "warmups": 0, "warmup_failures": 0, "retired_idle": 0,
+              "last_warmup_seconds": 0.0, "total_warmup_seconds": 0.0}
+
+    @staticmethod
+    def pool_key(company_id: str, company_info: Optional[Dict[str, Any]]) -> PoolKey:
+        # Sessions are interchangeable only when their system instruction and tools match
+        base_config = json.dumps(build_base_config(company_info), sort_keys=True, default=str)
+        return company_id, hashlib.sha1(base_config.encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def acquire(cls, company_id: str, company_info: Optional[Dict[str, Any]],
+                session_context: SessionContext) -> Optional[LLMApi]:
+        if LIVE_SESSION_POOL_SIZE <= 0:
+            return None
+
+        key = cls.pool_key(company_id, company_info)
+        pool = cls._pools.setdefault(key, deque())
+        cls._company_info[key] = company_info
+        cls._last_used[key] = time.monotonic()
+
+        llm_live_api = None
+        while pool and llm_live_api is None:
+            pooled = pool.popleft()
+            if cls._expired(pooled):
+                cls._retire(pooled)
+            else:
+                llm_live_api = pooled.llm_live_api
+        cls._replenish(key)
+
+        if llm_live_api is None:
+            cls._stats["misses"] += 1
+            return None
+        cls._stats["hits"] += 1
+        llm_live_api.attach(session_context)
+        return llm_live_api
+
+    @classmethod
+    def start(cls):
+        if LIVE_SESSION_POOL_SIZE > 0 and cls._sweeper is None:
+            cls._sweeper = asyncio.create_task(cls._sweep_loop())
+
+    @classmethod
+    async def stop(cls):
+        if cls._sweeper is not None:
+            cls._sweeper.cancel()
+            cls._sweeper = None
+        for task in list(cls._tasks):
+            task.cancel()
+        await asyncio.gather(*cls._tasks, return_exceptions=True)
+        for pool in cls._pools.values():
+            while pool:
+                await pool.popleft().llm_live_api.close()
+        cls._pools.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        requests = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            **cls._stats,
+            "size": LIVE_SESSION_POOL_SIZE,
+            "hit_rate": cls._stats["hits"] / requests if requests else 0.0,
+            "ready": {f"{company_id}:{digest}": len(pool) for (company_id, digest), pool in cls._pools.items()},
+            "warming": sum(cls._warming.values()),
+        }
+
+    @staticmethod
+    def _expired(pooled: PooledSession) -> bool:
+        return pooled.llm_live_api.session is None or time.monotonic() - pooled.ready_at > LIVE_SESSION_POOL_MAX_IDLE
+
+    @classmethod
+    def _retire(cls, pooled: PooledSession):
+        cls._stats["retired_idle"] += 1
+        cls._spawn(pooled.llm_live_api.close())
+
+    @classmethod
+    def _spawn(cls, coroutine) -> asyncio.Task:
+        task = asyncio.create_task(coroutine)
+        cls._tasks.add(task)
+        task.add_done_callback(cls._tasks.discard)
+        return task
+
+    @classmethod
+    def _replenish(cls, key: PoolKey):
+        missing = LIVE_SESSION_POOL_SIZE - len(cls._pools.get(key, ())) - cls._warming.get(key, 0)
+        for _ in range(max(missing, 0)):
+            cls._warming[key] = cls._warming.get(key, 0) + 1
+            cls._spawn(cls._warm(key))
+
+    @classmethod
+    async def _warm(cls, key: PoolKey):
+        company_id, _ = key
+        start = time.perf_counter()
+        try:
+            credentials, project_id = await GoogleCredentialManager.get_credentials()
+            session_context = SessionContext()
+            session_context.set("company_id", company_id)
+            session_context.set("company_info", cls._company_info.get(key))
+            llm_live_api = LLMApi(credentials, project_id, session_context)
+            await llm_live_api.get_session(modality=Modality.AUDIO)
+
+            elapsed = time.perf_counter() - start
+            cls._stats["warmups"] += 1
+            cls._stats["last_warmup_seconds"] = elapsed
+            cls._stats["total_warmup_seconds"] += elapsed
+            cls._pools.setdefault(key, deque()).append(PooledSession(llm_live_api))
+        except Exception as e:
+            cls._stats["warmup_failures"] += 1
+            print(f"Failed to warm a live session for {company_id}: {e}")
+        finally:
+            cls._warming[key] -= 1
+
+    @classmethod
+    async def _sweep_loop(cls):
+        while True:
+            await asyncio.sleep(LIVE_SESSION_POOL_SWEEP_INTERVAL)
+            now = time.monotonic()
+            for key, pool in list(cls._pools.items()):
+                for pooled in [pooled for pooled in pool if cls._expired(pooled)]:
+                    pool.remove(pooled)
+                    cls._retire(pooled)
+                if now - cls._last_used.get(key, 0.0) < LIVE_SESSION_POOL_KEEPALIVE:
+                    cls._replenish(key)
+                elif not pool and not cls._warming.get(key):
+                    # Companies nobody has connected to lately stop holding sessions open
+                    del cls._pools[key]
+                    cls._company_info.pop(key, None)
+                    cls._last_used.pop(key, None)
+                    cls._warming.pop(key, None)
+
+
+def _ready_by_company() -> Dict[Tuple[str, ...], float]:
+    ready: Dict[Tuple[str, ...], float] = {}
+    for (company_id, _), pool in LiveSessionPool._pools.items():
+        ready[(company_id,)] = ready.get((company_id,), 0) + len(pool)
+    return ready
+
+
+metrics.gauge(
+    "live_session_pool_ready", "Warm live sessions waiting to be checked out", _ready_by_company, ("company",)
+)
+metrics.gauge(
+    "live_session_pool_warming", "Live sessions being connected for the pool",
+    lambda: sum(LiveSessionPool._warming.values())
+)
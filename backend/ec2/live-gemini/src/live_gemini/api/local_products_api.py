@@ -0,0 +1,32 @@
+import asyncio
+import numpy as np
+import time
+from typing import Optional
+
+from .retrieve_products_api import embed_query, retrieve_products_api
+from ..utils.metrics import KNN_SECONDS
+from ..utils.product_index import ProductIndexRegistry
+from ..utils.session_context import SessionContext
+
+
+async def retrieve_local_products_api(query: str, k: int, session_context: SessionContext,
+                                      embedding: Optional[np.ndarray] = None):
+    company_id = session_context.get("company_info")["companyId"]
+
+    # Loading or reloading a snapshot reads from disk, keep it off the event loop
+    index = await asyncio.to_thread(ProductIndexRegistry.get, company_id)
+    if index is None:
+        return await retrieve_products_api(query, k, session_context, embedding)
+
+    if embedding is None:
+        try:
+            embedding = await embed_query(query, company_id=company_id)
+        except Exception as e:
+            return {"error": f"Failed to get embedding: {e}"}
+
+    start = time.perf_counter()
+    results = await asyncio.to_thread(index.search, embedding, k)
+    KNN_SECONDS.observe(time.perf_counter() - start, company_id, "local")
+    return {
+        "results": results
+    }
@@ -0,0 +1,47 @@
+import asyncio
+from requests_aws4auth import AWS4Auth
+
+from .retrieve_products_api import AWS_ACCESS_KEY, AWS_REGION, AWS_SECRET_KEY, INDEX_NAME, OPENSEARCH_URL
+from ..utils.http_clients import HttpClients
+from ..utils.product_index import PRODUCT_FIELDS, ProductIndexRegistry, write_snapshot
+
+PAGE_SIZE = 500
+# Products are indexed with dynamic mapping, so sku is a text field and only its keyword subfield can be sorted on
+SORT_FIELD = "sku.keyword"
+
+
+async def export_product_snapshot(company_id: str) -> int:
+    # Validated before anything is fetched, the company id becomes a directory name
+    directory = ProductIndexRegistry.snapshot_directory(company_id)
+    aws_auth = AWS4Auth(AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION, 'es')
+    products = []
+    search_after = None
+
+    # search_after on a stable sort pages past the 10k from/size window and does not skip or repeat
+    # products when a page boundary moves between requests
+    while True:
+        body = {
+            "size": PAGE_SIZE,
+            "_source": PRODUCT_FIELDS + ["embedding"],
+            "query": {"term": {"companyId": company_id}},
+            "sort": [{SORT_FIELD: "asc"}]
+        }
+        if search_after is not None:
+            body["search_after"] = search_after
+        response = await HttpClients.get("opensearch").post(
+            f"{OPENSEARCH_URL}/{INDEX_NAME}/_search",
+            auth=aws_auth,
+            json=body,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        hits = response.json()['hits']['hits']
+        products.extend(hit["_source"] for hit in hits if "embedding" in hit.get("_source", {}))
+        if len(hits) < PAGE_SIZE:
+            break
+        search_after = hits[-1]["sort"]
+
+    # Writing the files and building the index are file and numpy work, kept off the event loop
+    await asyncio.to_thread(write_snapshot, directory, products)
+    await asyncio.to_thread(ProductIndexRegistry.refresh, company_id)
+    return len(products)
@@ -1,9 +1,17 @@
-import httpx
+import numpy as np
 import os
+import time
 from dotenv import load_dotenv
 from requests_aws4auth import AWS4Auth
+from typing import Optional
 
-from ..utils.global_store import GlobalStore
+from ..utils.embedding_cache import embedding_cache
+from ..utils.google_credentials import GoogleCredentialManager
+from ..utils.http_clients import HttpClients
+from ..utils.metrics import EMBEDDING_SECONDS, KNN_SECONDS, company_label
+from ..utils.product_record import PRODUCT_SOURCE_FIELDS
+from ..utils.semantic_result_cache import semantic_result_cache
+from ..utils.session_context import SessionContext
 
 load_dotenv()
 
@@ -12,18 +20,23 @@ INDEX_NAME = os.getenv("INDEX_NAME")
 AWS_ACCESS_KEY = os.getenv("AWS_ACCESS_KEY")
 AWS_SECRET_KEY = os.getenv("AWS_SECRET_KEY")
 AWS_REGION = os.getenv("AWS_REGION")
+OPENSEARCH_URL = os.getenv("OPENSEARCH_URL", f"https://{OPENSEARCH_COLLECTION_ENDPOINT}")
+VERTEX_ENDPOINT = os.getenv("VERTEX_ENDPOINT", "https://us-central1-aiplatform.googleapis.com")
+# Only the hit payload comes back, without shard and timing metadata
+SEARCH_FILTER_PATH = "hits.hits._id,hits.hits._score,hits.hits._source"
 
 
-async def retrieve_products_api(query: str, k: int):
-    store = GlobalStore()
-    google_access_token = store.get("google_access_token")
-
-    if not google_access_token:
-        return {"error": "Google access token not found in global store."}
+async def embed_query(query: str, task_type: str = "RETRIEVAL_QUERY", company_id: str = "unknown") -> np.ndarray:
+    start = time.perf_counter()
+    cached = await embedding_cache.get(query, task_type)
+    if cached is not None:
+        EMBEDDING_SECONDS.observe(time.perf_counter() - start, company_id, "hit")
+        return cached
 
+    google_access_token = await GoogleCredentialManager.get_access_token()
     project_id = os.getenv("GOOGLE_PROJECT_ID")
 
-    url = f"https://us-central1-aiplatform.googleapis.com/v1/projects/{project_id}/locations/us-central1/publishers/google/models/text-embedding-005:predict"
+    url = f"{VERTEX_ENDPOINT}/v1/projects/{project_id}/locations/us-central1/publishers/google/models/text-embedding-005:predict"
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {google_access_token}"
@@ -31,34 +44,31 @@ async def retrieve_products_api(query: str, k: int):
     body_req = {
         "instances": [
             {
-                "task_type": "RETRIEVAL_QUERY",
+                "task_type": task_type,
                 "content": query
             }
         ]
     }
 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.post(url, headers=headers, json=body_req)
-            resp.raise_for_status()
-            data = resp.json()
-            embedding = data["predictions"][0]["embeddings"]["values"]
-    except Exception as e:
-        return {"error": f"Failed to get embedding: {e}"}
+    resp = await HttpClients.get("vertex").post(url, headers=headers, json=body_req)
+    resp.raise_for_status()
+    data = resp.json()
+    embedding = embedding_cache.put(query, task_type, data["predictions"][0]["embeddings"]["values"])
+    EMBEDDING_SECONDS.observe(time.perf_counter() - start, company_id, "miss")
+    return embedding
 
-    aws_auth = AWS4Auth(AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION, 'es')
 
-    company_id = store.get("company_info")["companyId"]
-
-    query_body = {
+def build_knn_query(embedding: np.ndarray, k: int, company_id: str, source_fields=PRODUCT_SOURCE_FIELDS):
+    return {
         "size": k,
+        "_source": source_fields,
         "query": {
             "bool": {
                 "must": [
                     {
                         "knn": {
                             "embedding": {
-                                "vector": embedding,
+                                "vector": embedding.tolist(),
                                 "k": k
                             }
                         }
@@ -75,23 +85,45 @@ async def retrieve_products_api(query: str, k: int):
         }
     }
 
+
+async def retrieve_products_api(query: str, k: int, session_context: SessionContext,
+                                embedding: Optional[np.ndarray] = None):
+    if embedding is None:
+        try:
+            embedding = await embed_query(query, company_id=company_label(session_context))
+        except Exception as e:
+            return {"error": f"Failed to get embedding: {e}"}
+
+    company_id = session_context.get("company_info")["companyId"]
+
+    cached_results = semantic_result_cache.get(company_id, embedding, k)
+    if cached_results is not None:
+        return {
+            "results": cached_results
+        }
+
+    aws_auth = AWS4Auth(AWS_ACCESS_KEY, AWS_SECRET_KEY, AWS_REGION, 'es')
+
+    query_body = build_knn_query(embedding, k, company_id)
+
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"https://{OPENSEARCH_COLLECTION_ENDPOINT}/{INDEX_NAME}/_search",
-                auth=aws_auth,
-                json=query_body,
-                headers={"Content-Type": "application/json"}
-            )
-            response.raise_for_status()
-            data = response.json()
-            results = data['hits']['hits']
-
-            print(results)
-
-            for hit in results:
-                if "_source" in hit and "embedding" in hit["_source"]:
-                    del hit["_source"]["embedding"]
+        start = time.perf_counter()
+        response = await HttpClients.get("opensearch").post(
+            f"{OPENSEARCH_URL}/{INDEX_NAME}/_search",
+            auth=aws_auth,
+            params={"filter_path": SEARCH_FILTER_PATH},
+            json=query_body,
+            headers={"Content-Type": "application/json"}
+        )
+        response.raise_for_status()
+        KNN_SECONDS.observe(time.perf_counter() - start, company_id, "opensearch")
+        data = response.json()
+        # filter_path drops "hits" entirely when nothing matched
+        results = data.get('hits', {}).get('hits', [])
+
+        print(f"Retrieved {len(results)} products for '{query}' ({len(response.content)} bytes)")
+
+        semantic_result_cache.put(company_id, embedding, k, results)
     except Exception as e:
         print(f"Error querying OpenSearch: {e}")
         results = None
@@ -0,0 +1,211 @@
+import asyncio
+import os
+import time
+from contextlib import aclosing
+from dotenv import load_dotenv
+from fastapi import WebSocketDisconnect
+from pydantic import BaseModel
+from typing import Any, Dict, Literal, Optional, Tuple
+
+from .enums.message_types import MessageType
+from .graph import run_turn
+from .stt.base_stt import TranscriptionStream
+from .utils.admission import Admission
+from .utils.audio_protocol import AudioSocket
+from .utils.metrics import AUDIO_BYTES_SENT, FIRST_AUDIO_SECONDS, FRAMES_SENT, SEND_BACKPRESSURE, SEND_SECONDS, \
+    SLOW_CLIENTS, STT_SECONDS, TURN_SECONDS, TURNS, company_label
+from .utils.session_context import SessionContext
+
+load_dotenv()
+
+SEND_QUEUE_SIZE = int(os.getenv("SEND_QUEUE_SIZE", "64"))
+UTTERANCE_QUEUE_SIZE = int(os.getenv("UTTERANCE_QUEUE_SIZE", "4"))
+# Seconds one message may take to reach a client before the session is closed as a slow consumer
+SLOW_CLIENT_TIMEOUT = float(os.getenv("SLOW_CLIENT_TIMEOUT", "10"))
+
+
+class MessageRequest(BaseModel):
+    message: str
+    mimeType: str
+    # "chunk" streams audio to live transcription, "end" closes the utterance
+    stream: Optional[Literal["chunk", "end"]] = None
+
+
+# Receives, runs turns and sends concurrently so a new utterance can cut off the answer in flight
+class DuplexSession:
+    _stats = {"sessions": 0, "turns": 0, "barge_ins": 0, "dropped_responses": 0, "slow_clients": 0}
+
+    def __init__(self, audio_socket: AudioSocket, llm_live_api, session_context: SessionContext):
+        self.audio_socket = audio_socket
+        self.llm_live_api = llm_live_api
+        self.session_context = session_context
+        # Items are (turn task or None, response) so a barge-in can drop what the cancelled turn queued
+        self.outbound: asyncio.Queue[Tuple[Optional[asyncio.Task], Dict[str, Any]]] = asyncio.Queue(SEND_QUEUE_SIZE)
+        self.utterances: asyncio.Queue[str] = asyncio.Queue(UTTERANCE_QUEUE_SIZE)
+        self.turn: Optional[asyncio.Task] = None
+        self.transcription: Optional[TranscriptionStream] = None
+        self.transcript_forwarder: Optional[asyncio.Task] = None
+        self.company = company_label(session_context)
+        self.recorder = session_context.get("recorder")
+        self._stats["sessions"] += 1
+
+    async def run(self):
+        tasks = [
+            asyncio.create_task(self._receive()),
+            asyncio.create_task(self._run_turns()),
+            asyncio.create_task(self._send()),
+        ]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                error = task.exception()
+                if isinstance(error, WebSocketDisconnect):
+                    print("Client disconnected")
+                elif error is not None:
+                    print(f"Error handling message: {error}")
+        finally:
+            if self.transcription is not None:
+                self.transcription.close()
+            pending = [*tasks, self.turn, self.transcript_forwarder]
+            for task in pending:
+                if task is not None:
+                    task.cancel()
+            await asyncio.gather(*(task for task in pending if task is not None), return_exceptions=True)
+
+    async def barge_in(self):
+        turn = self.turn
+        if turn is None or turn.done():
+            return
+        turn.cancel()
+        self.llm_live_api.abandon_turn()
+        self._stats["barge_ins"] += 1
+
+        # Audio already queued for the cancelled answer must not reach the client
+        kept = []
+        while not self.outbound.empty():
+            item = self.outbound.get_nowait()
+            if item[0] is turn:
+                self._stats["dropped_responses"] += 1
+            else:
+                kept.append(item)
+        for item in kept:
+            self.outbound.put_nowait(item)
+        await self.outbound.put((None, {
+            "type": MessageType.STATUS.value,
+            "interrupted": True
+        }))
+
+    async def _receive(self):
+        while True:
+            request, audio = await self.audio_socket.receive()
+            if self.recorder is not None:
+                self.recorder.record("inbound", request=request, audio=audio)
+            message_request = MessageRequest(**request)
+
+            text = message_request.message.strip()
+
+            if message_request.stream:
+                if self.transcription is None:
+                    self.transcription = await self.llm_live_api.open_transcription_stream(message_request.mimeType)
+                    self.transcript_forwarder = asyncio.create_task(self._forward_transcripts(self.transcription))
+                if audio:
+                    await self.transcription.send(audio)
+                if message_request.stream != "end":
+                    continue
+
+                with STT_SECONDS.time(self.company):
+                    text = await self.transcription.finish()
+                await self.transcript_forwarder
+                self.transcription = None
+                self.transcript_forwarder = None
+            elif message_request.mimeType.startswith('audio/'):
+                with STT_SECONDS.time(self.company):
+                    text = await self.llm_live_api.transcribe_audio(audio or b"", message_request.mimeType)
+
+            if not text:
+                continue
+
+            if self.recorder is not None:
+                self.recorder.record("transcript", text=text)
+            await self.barge_in()
+            await self.utterances.put(text)
+
+    async def _forward_transcripts(self, transcription: TranscriptionStream):
+        spoke = False
+        async for event in transcription.events():
+            # The first recognised words of a new utterance interrupt the answer, not the first audio chunk
+            if event.get("message") and not spoke:
+                spoke = True
+                await self.barge_in()
+            await self.outbound.put((None, event))
+
+    async def _run_turns(self):
+        while True:
+            text = await self.utterances.get()
+            self.turn = asyncio.create_task(self._run_turn(text))
+            self._stats["turns"] += 1
+            await asyncio.wait({self.turn})
+            if not self.turn.cancelled():
+                self.turn.result()
+
+    async def _run_turn(self, text: str):
+        turn = asyncio.current_task()
+        self.session_context.set("current_agent", None)
+        start = time.perf_counter()
+        first_audio = None
+        # A turn that never finishes was cancelled by a barge-in
+        outcome = "interrupted"
+        try:
+            # A barge-in usually cancels the turn while it waits on the send queue, with the generator suspended at a
+            # yield; closing it there tears the graph run down instead of leaving it to the garbage collector
+            async with Admission.turn(self.company), \
+                    aclosing(run_turn(self.llm_live_api, self.session_context, text)) as chunks:
+                async for chunk in chunks:
+                    if chunk and isinstance(chunk, dict):
+                        response = chunk["response"]
+                        if first_audio is None and response.get("type") == MessageType.AUDIO.value:
+                            first_audio = time.perf_counter() - start
+                        # A full queue stops this loop, and with it reads from the model, until the client catches up
+                        if self.outbound.full():
+                            SEND_BACKPRESSURE.inc(self.company)
+                        await self.outbound.put((turn, response))
+            outcome = "completed"
+        except Exception:
+            outcome = "failed"
+            raise
+        finally:
+            agent = self.session_context.get("current_agent") or "none"
+            if first_audio is not None:
+                FIRST_AUDIO_SECONDS.observe(first_audio, self.company, agent)
+            TURN_SECONDS.observe(time.perf_counter() - start, self.company, agent, outcome)
+            TURNS.inc(self.company, agent, outcome)
+
+    async def _send(self):
+        while True:
+            _, response = await self.outbound.get()
+            start = time.perf_counter()
+            try:
+                async with asyncio.timeout(SLOW_CLIENT_TIMEOUT):
+                    await self.audio_socket.send(response)
+            except TimeoutError:
+                # Backpressure alone would keep the session, its model connection and turn slot open indefinitely
+                SLOW_CLIENTS.inc(self.company)
+                self._stats["slow_clients"] += 1
+                print(f"Client stopped reading for {SLOW_CLIENT_TIMEOUT}s, closing session")
+                return
+            SEND_SECONDS.observe(time.perf_counter() - start, self.company)
+            if self.recorder is not None:
+                # Only the shape of what went out, the audio itself is in the model messages
+                self.recorder.record("outbound", type=response.get("type"), bytes=len(response.get("audio") or b""))
+            if response.get("type") == MessageType.AUDIO.value:
+                FRAMES_SENT.inc(self.company)
+                AUDIO_BYTES_SENT.inc(self.company, amount=len(response.get("audio") or b""))
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            **cls._stats,
+            "send_queue_size": SEND_QUEUE_SIZE,
+            "utterance_queue_size": UTTERANCE_QUEUE_SIZE,
+            "slow_client_timeout": SLOW_CLIENT_TIMEOUT,
+        }
@@ -0,0 +1,7 @@
+from enum import IntEnum
+
+class FrameType(IntEnum):
+    AUDIO = 1
+    AUDIO_CHUNK = 2
+    AUDIO_END = 3
+    AUDIO_UTTERANCE = 4
@@ -4,5 +4,6 @@ class MessageType(Enum):
     STATUS = "status"
     AUDIO = "audio"
     TEXT = "text"
+    TRANSCRIPT = "transcript"
     TOOL_RESPONSE = "tool_response"
     ERROR = "error"
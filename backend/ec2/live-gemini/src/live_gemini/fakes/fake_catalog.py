@@ -0,0 +1,31 @@
+import numpy as np
+from typing import Any, Dict, List
+
+CATEGORIES = ["Pantry", "Dairy", "Personal Care", "Household", "Pet Supplies", "Electronics"]
+BRANDS = ["Acme", "Northwind", "Contoso", "Globex", "Initech"]
+
+
+def generate_catalog(company_id: str, count: int, dimensions: int = 768, seed: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((count, dimensions), dtype=np.float32)
+    products = []
+    for i in range(count):
+        category = CATEGORIES[i % len(CATEGORIES)]
+        products.append({
+            "sku": f"{company_id}-{i:06d}",
+            "companyId": company_id,
+            "embedding": embeddings[i].tolist(),
+            "name": f"{BRANDS[i % len(BRANDS)]} {category} item {i}",
+            "description": f"A {category.lower()} product used for benchmarking retrieval.",
+            "category": category,
+            "brand": BRANDS[i % len(BRANDS)],
+            "images": [f"https://example.com/{company_id}/media/{i}_0.jpg"],
+            "price": round(float(rng.uniform(1, 100)), 2),
+            "currency": "USD",
+            "createdAt": "2025-06-01T00:00:00Z",
+            "updatedAt": "2025-06-01T00:00:00Z",
+            "inStock": bool(i % 7),
+            "reviews": [{"rating": int(rng.integers(1, 6)), "comment": "Works as described."}],
+            "location": {"aisle": str(i % 20 + 1), "section": category, "shelf": str(i % 5 + 1)},
+        })
+    return products
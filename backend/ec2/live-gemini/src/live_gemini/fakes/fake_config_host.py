@@ -0,0 +1,23 @@
+import hashlib
+import json
+from fastapi import FastAPI, Request, Response
+from typing import Any, Dict
+
+
+# Stand-in for the S3 bucket serving {company_id}/config.json, with ETag revalidation like S3
+def create_fake_config_host(configs: Dict[str, Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+    app.state.requests = 0
+
+    @app.get("/{company_id}/config.json")
+    async def config(company_id: str, request: Request):
+        app.state.requests += 1
+        if company_id not in configs:
+            return Response(status_code=403)
+        body = json.dumps(configs[company_id]).encode("utf-8")
+        etag = f'"{hashlib.md5(body).hexdigest()}"'
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(body, media_type="application/json", headers={"ETag": etag})
+
+    return app
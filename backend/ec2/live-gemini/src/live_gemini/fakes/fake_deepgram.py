@@ -0,0 +1,70 @@
+import asyncio
+import json
+from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+
+
+def _alternative(transcript: str) -> dict:
+    return {"transcript": transcript, "confidence": 1.0, "words": []}
+
+
+def _result(transcript: str, final: bool, from_finalize: bool = False) -> dict:
+    return {
+        "type": "Results",
+        "channel_index": [0, 1],
+        "duration": 0.0,
+        "start": 0.0,
+        "is_final": final,
+        "speech_final": final,
+        "from_finalize": from_finalize,
+        "channel": {"alternatives": [_alternative(transcript)]},
+        "metadata": {"request_id": "fake", "model_uuid": "fake", "model_info": {"name": "fake", "version": "0",
+                                                                                  "arch": "fake"}},
+    }
+
+
+# Stand-in for Deepgram's /v1/listen: the "audio" is UTF-8 text, which it transcribes back after a fixed delay
+def create_fake_deepgram(delay: float = 0.0) -> FastAPI:
+    app = FastAPI()
+    app.state.streams = 0
+    app.state.requests = 0
+
+    @app.post("/v1/listen")
+    async def transcribe(request: Request):
+        app.state.requests += 1
+        transcript = (await request.body()).decode("utf-8", errors="ignore").strip()
+        await asyncio.sleep(delay)
+        return {
+            "metadata": {"transaction_key": "fake", "request_id": "fake", "sha256": "", "created": "", "duration": 0.0,
+                         "channels": 1, "models": [], "model_info": {}},
+            "results": {"channels": [{"alternatives": [_alternative(transcript)]}]},
+        }
+
+    @app.websocket("/v1/listen")
+    async def listen(websocket: WebSocket):
+        await websocket.accept()
+        app.state.streams += 1
+        audio = bytearray()
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    return
+                if message.get("bytes"):
+                    audio.extend(message["bytes"])
+                    await asyncio.sleep(delay)
+                    await websocket.send_json(_result(audio.decode("utf-8", errors="ignore").strip(), False))
+                    continue
+                control = json.loads(message.get("text") or "{}").get("type")
+                if control == "Finalize" or (control == "CloseStream" and audio):
+                    # Finalized audio is never transcribed again, like the real service
+                    await asyncio.sleep(delay)
+                    await websocket.send_json(_result(audio.decode("utf-8", errors="ignore").strip(), True,
+                                                      control == "Finalize"))
+                    audio.clear()
+                if control == "CloseStream":
+                    await websocket.close()
+                    return
+        except WebSocketDisconnect:
+            pass
+
+    return app
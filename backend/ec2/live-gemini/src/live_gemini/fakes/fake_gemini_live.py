@@ -0,0 +1,130 @@
+import asyncio
+import base64
+import json
+import re
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from typing import Any, Dict, List, Optional
+
+from ..enums.agent_types import AgentType
+from ..utils.audio_protocol import OUTPUT_SAMPLE_RATE
+
+QUERY_PATTERN = re.compile(r'The user asked: "(.*?)"', re.DOTALL)
+# Only the single-turn tool loop prompt waits for tool results before answering
+TOOL_LOOP_MARKER = "Once the tool results arrive"
+BIDI_PATH = "/ws/google.cloud.aiplatform.{version}.LlmBidiService/BidiGenerateContent"
+
+
+def _field(message: Dict[str, Any], name: str) -> Any:
+    # The SDK mixes snake_case and camelCase keys, both are valid protobuf JSON
+    camel = name.split("_")[0] + "".join(part.title() for part in name.split("_")[1:])
+    return message.get(name, message.get(camel))
+
+
+def scripted_agent(query: str) -> str:
+    words = query.lower()
+    if any(word in words for word in ("where", "aisle", "find")):
+        return AgentType.NAVIGATION.value
+    if any(word in words for word in ("compare", "versus", "better")):
+        return AgentType.COMPARISON.value
+    return AgentType.PRODUCT_INFO.value
+
+
+class FakeLiveConnection:
+    def __init__(self, websocket: WebSocket, reply: str, first_output_delay: float, audio_chunks: int,
+                 chunk_ms: int, realtime: bool, echo_pattern: Optional[re.Pattern] = None):
+        self.websocket = websocket
+        self.reply_words = reply.split()
+        self.echo_pattern = echo_pattern
+        self.setup_echoes: List[str] = []
+        self.first_output_delay = first_output_delay
+        self.audio_chunks = audio_chunks
+        self.chunk_seconds = chunk_ms / 1000
+        self.chunk = base64.b64encode(b"\x00" * int(OUTPUT_SAMPLE_RATE * 2 * self.chunk_seconds)).decode("ascii")
+        self.realtime = realtime
+        self.turn: Optional[asyncio.Task] = None
+        self.tool_responses: asyncio.Queue = asyncio.Queue()
+
+    async def send(self, message: Dict[str, Any]):
+        await self.websocket.send_text(json.dumps(message))
+
+    async def run(self):
+        setup = await self.websocket.receive_text()
+        if self.echo_pattern is not None:
+            self.setup_echoes = self.echo_pattern.findall(setup)
+        await self.send({"setupComplete": {}})
+        try:
+            while True:
+                message = json.loads(await self.websocket.receive_text())
+                client_content = _field(message, "client_content")
+                tool_response = _field(message, "tool_response")
+                if client_content is not None:
+                    prompt = "".join(part.get("text", "") for turn in client_content.get("turns", [])
+                                     for part in turn.get("parts", []))
+                    if self.turn is not None and not self.turn.done():
+                        # New client content interrupts the answer in flight, as the live API does
+                        self.turn.cancel()
+                        await self.send({"serverContent": {"interrupted": True}})
+                    self.tool_responses = asyncio.Queue()
+                    self.turn = asyncio.create_task(self.respond(prompt))
+                elif tool_response is not None:
+                    self.tool_responses.put_nowait(tool_response)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            if self.turn is not None:
+                self.turn.cancel()
+
+    async def respond(self, prompt: str):
+        await asyncio.sleep(self.first_output_delay)
+        if "Available Agents:" in prompt:
+            match = QUERY_PATTERN.search(prompt)
+            query = match.group(1) if match else ""
+            await self.send({"toolCall": {"functionCalls": [
+                {"id": "set-agent", "name": "set_agent", "args": {"agent_type": scripted_agent(query)}},
+                {"id": "retrieve-products", "name": "retrieve_products", "args": {"query": query, "k": 4}},
+            ]}})
+            if TOOL_LOOP_MARKER not in prompt:
+                await self.send({"serverContent": {"turnComplete": True}})
+                return
+            await self.tool_responses.get()
+            await asyncio.sleep(self.first_output_delay)
+        await self.answer(prompt)
+
+    async def answer(self, prompt: str):
+        reply_words = self.reply_words
+        if self.echo_pattern is not None:
+            # Leads with what the setup and this prompt contained, so a client can tell whose state reached the model
+            echoes = dict.fromkeys(self.setup_echoes + self.echo_pattern.findall(prompt))
+            reply_words = list(echoes) + reply_words
+        words_per_chunk = max(len(reply_words) // max(self.audio_chunks, 1), 1)
+        for index in range(self.audio_chunks):
+            if index and self.realtime:
+                await asyncio.sleep(self.chunk_seconds)
+            words = reply_words[index * words_per_chunk:(index + 1) * words_per_chunk]
+            server_content: Dict[str, Any] = {
+                "modelTurn": {"parts": [{"inlineData": {"mimeType": "audio/pcm", "data": self.chunk}}]}
+            }
+            if words:
+                server_content["outputTranscription"] = {"text": " ".join(words) + " "}
+            await self.send({"serverContent": server_content})
+        await self.send({"serverContent": {"turnComplete": True}})
+
+
+# Stand-in for the Vertex AI live API: routes with scripted tool calls, then speaks a fixed reply as PCM audio.
+# With echo_pattern the reply starts with every match found in the session setup and the turn's prompt
+def create_fake_gemini_live(reply: str = "That one is smooth, nutty and lightly salted.",
+                            first_output_delay: float = 0.3, audio_chunks: int = 25, chunk_ms: int = 40,
+                            realtime: bool = True, version: str = "v1beta1",
+                            echo_pattern: Optional[str] = None) -> FastAPI:
+    app = FastAPI()
+    app.state.sessions = 0
+    compiled = re.compile(echo_pattern) if echo_pattern else None
+
+    @app.websocket(BIDI_PATH.format(version=version))
+    async def bidi(websocket: WebSocket):
+        await websocket.accept()
+        app.state.sessions += 1
+        await FakeLiveConnection(websocket, reply, first_output_delay, audio_chunks, chunk_ms, realtime,
+                                 compiled).run()
+
+    return app
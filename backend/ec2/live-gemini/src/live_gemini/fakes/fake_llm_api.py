@@ -0,0 +1,95 @@
+import asyncio
+from typing import Any, Callable, Optional
+
+from ..enums.agent_types import AgentType
+from ..enums.message_types import MessageType
+from ..stt.base_stt import SpeechToText, TranscriptionStream, parse_sample_rate
+from ..utils.audio_protocol import OUTPUT_SAMPLE_RATE
+from ..utils.conversation_memory import estimate_tokens
+from ..utils.prompt_blocks import PromptBlocks
+from ..utils.session_context import SessionContext
+from .fake_stt import FakeSpeechToText
+
+
+class FakeLLMApi:
+    def __init__(self, session_context: SessionContext, agent_type: str = AgentType.FALLBACK.value,
+                 reply: str = "Happy to help.", delay: float = 0.0, retrieve_query: Optional[str] = None,
+                 audio_chunks: int = 0, audio_chunk: bytes = b"\x00" * 960, stt: Optional[SpeechToText] = None,
+                 token_delay: float = 0.0):
+        self.session_context = session_context
+        self.agent_type = agent_type
+        self.retrieve_query = retrieve_query
+        self.reply = reply
+        self.delay = delay
+        # Extra seconds per input token before the first output, like model prefill
+        self.token_delay = token_delay
+        # Audio replies stream audio_chunks frames, one every delay seconds, like a speaking model
+        self.audio_chunks = audio_chunks
+        self.audio_chunk = audio_chunk
+        self.stt = stt or FakeSpeechToText()
+        self.prompts: list[str] = []
+        self.prompt_blocks = PromptBlocks()
+
+    async def get_session(self, *args, **kwargs):
+        self.prompt_blocks.reset()
+        return self
+
+    async def close_session(self):
+        pass
+
+    def abandon_turn(self):
+        pass
+
+    async def prepare_turn(self):
+        pass
+
+    async def close(self):
+        await self.stt.close()
+
+    async def transcribe_audio(self, audio_data: bytes, mime_type: str) -> str:
+        return await self.stt.transcribe(audio_data, parse_sample_rate(mime_type))
+
+    async def open_transcription_stream(self, mime_type: str) -> TranscriptionStream:
+        return await self.stt.open_stream(parse_sample_rate(mime_type))
+
+    def _latency(self, model_input: str) -> float:
+        return self.delay + self.token_delay * estimate_tokens(model_input)
+
+    async def live_chat(self, prompt: str, tool_handler: Optional[Callable] = None) -> Any:
+        self.prompts.append(prompt)
+        await asyncio.sleep(self._latency(prompt))
+
+        if "Available Agents:" in prompt:
+            tool_calls = [("set_agent", {"agent_type": self.agent_type})]
+            if self.retrieve_query is not None:
+                tool_calls.append(("retrieve_products", {"query": self.retrieve_query, "k": 4}))
+            for name, arguments in tool_calls:
+                yield {
+                    "type": MessageType.TOOL_RESPONSE.value,
+                    "tool_name": name,
+                    "arguments": arguments
+                }
+            if tool_handler is None:
+                return
+            # The model reads the tool results and continues into the answer within the same turn
+            results = await asyncio.gather(*(tool_handler(name, arguments) for name, arguments in tool_calls))
+            await asyncio.sleep(self._latency(str(results)))
+
+        if self.audio_chunks:
+            for index in range(self.audio_chunks):
+                if index:
+                    await asyncio.sleep(self.delay)
+                yield {
+                    "type": MessageType.AUDIO.value,
+                    "audio": self.audio_chunk,
+                    "transcript": self.reply if index == 0 else None,
+                    "mimeType": f"audio/pcm;rate={OUTPUT_SAMPLE_RATE}"
+                }
+        else:
+            yield {
+                "type": MessageType.TEXT.value,
+                "message": self.reply,
+                "mimeType": "text/plain"
+            }
+
+        self.session_context.get("conversation_history").append("assistant", self.reply)
@@ -0,0 +1,94 @@
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, List
+
+
+# Brute-force stand-in for the OpenSearch _search endpoint, answering kNN queries filtered by companyId
+def create_fake_opensearch(products: List[Dict[str, Any]]) -> FastAPI:
+    app = FastAPI()
+    vectors = np.asarray([product["embedding"] for product in products], dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    app.state.requests = 0
+
+    def project(source: Dict[str, Any], fields) -> Dict[str, Any]:
+        if fields is None or fields is True:
+            return source
+        if fields is False:
+            return {}
+        if isinstance(fields, dict):
+            includes, excludes = fields.get("includes"), set(fields.get("excludes", []))
+        else:
+            includes, excludes = fields, set()
+        return {
+            key: value for key, value in source.items()
+            if (includes is None or key in includes) and key not in excludes
+        }
+
+    @app.post("/{index}/_search")
+    async def search(index: str, request: Request):
+        app.state.requests += 1
+        body = await request.json()
+        query = body.get("query", {})
+        size = body.get("size", 10)
+
+        company_id = None
+        for clause in query.get("bool", {}).get("filter", []):
+            company_id = clause.get("term", {}).get("companyId", company_id)
+        if "term" in query:
+            company_id = query["term"].get("companyId")
+
+        rows = [i for i, product in enumerate(products) if company_id is None or product.get("companyId") == company_id]
+        scores = np.zeros(len(rows), dtype=np.float32)
+        for clause in query.get("bool", {}).get("must", []):
+            knn = clause.get("knn", {}).get("embedding")
+            if knn:
+                vector = np.asarray(knn["vector"], dtype=np.float32)
+                scores = vectors[rows] @ (vector / np.linalg.norm(vector))
+
+        start = body.get("from", 0)
+        sort_field = None
+        if body.get("sort"):
+            # A single ascending field, which is what the snapshot export pages with
+            sort_field = next(iter(body["sort"][0]))
+            field = sort_field.removesuffix(".keyword")
+            # Dynamic mapping makes strings text fields with a keyword subfield, and text fields cannot be sorted on
+            if field == sort_field and any(isinstance(products[i].get(field), str) for i in rows):
+                return JSONResponse(status_code=400, content={"error": {
+                    "type": "illegal_argument_exception",
+                    "reason": f"Text fields are not optimised for operations that require per-document field data "
+                              f"like aggregations and sorting, so these operations are disabled by default. "
+                              f"Please use a keyword field instead. Alternatively, set fielddata=true on [{field}]",
+                }, "status": 400})
+            order = sorted(range(len(rows)), key=lambda i: products[rows[i]].get(field))
+            if body.get("search_after"):
+                order = [i for i in order if products[rows[i]].get(field) > body["search_after"][0]]
+            order = order[start:start + size]
+        else:
+            order = np.argsort(-scores)[start:start + size] if len(rows) else []
+        hits = [
+            {
+                "_index": index,
+                "_id": products[rows[i]].get("sku"),
+                "_score": float(scores[i]),
+                "_source": project(products[rows[i]], body.get("_source")),
+                **({"sort": [products[rows[i]].get(sort_field.removesuffix(".keyword"))]} if sort_field else {}),
+            }
+            for i in order
+        ]
+        response = {
+            "took": 1,
+            "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {"total": {"value": len(rows), "relation": "eq"}, "max_score": hits[0]["_score"] if hits else None,
+                     "hits": hits}
+        }
+
+        filter_path = request.query_params.get("filter_path")
+        if filter_path:
+            hit_fields = {path.rsplit(".", 1)[1] for path in filter_path.split(",") if path.startswith("hits.hits.")}
+            hits = [{key: value for key, value in hit.items() if key in hit_fields} for hit in hits]
+            response = {"hits": {"hits": hits}} if hits else {}
+        return response
+
+    return app
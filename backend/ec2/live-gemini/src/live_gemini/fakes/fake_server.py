@@ -0,0 +1,34 @@
+import asyncio
+import uvicorn
+from typing import Optional, Tuple
+
+
+class FakeServer:
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0, ssl_certfile: Optional[str] = None,
+                 ssl_keyfile: Optional[str] = None):
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off",
+                                                    ssl_certfile=ssl_certfile, ssl_keyfile=ssl_keyfile))
+        self.scheme = "https" if ssl_certfile else "http"
+        self.task = None
+        self.url = None
+
+    async def start(self) -> str:
+        self.task = asyncio.create_task(self.server.serve())
+        while not self.server.started:
+            if self.task.done():
+                self.task.result()
+            await asyncio.sleep(0.01)
+        host, port = self.server.servers[0].sockets[0].getsockname()[:2]
+        self.url = f"{self.scheme}://{host}:{port}"
+        return self.url
+
+    async def stop(self):
+        self.server.should_exit = True
+        if self.task is not None:
+            await self.task
+
+    async def __aenter__(self) -> str:
+        return await self.start()
+
+    async def __aexit__(self, *exc_info: Tuple):
+        await self.stop()
@@ -0,0 +1,48 @@
+import asyncio
+from typing import List, Optional
+
+from ..stt.base_stt import SpeechToText, TranscriptionStream
+
+
+class FakeTranscriptionStream(TranscriptionStream):
+    def __init__(self, sample_rate: int, transcript: Optional[str], delay: float):
+        super().__init__(sample_rate)
+        self.scripted_transcript = transcript
+        self.delay = delay
+        self.audio = bytearray()
+
+    async def send(self, chunk: bytes):
+        self.audio.extend(chunk)
+        await asyncio.sleep(self.delay)
+        self.emit(self._decode(), False)
+
+    async def finish(self) -> str:
+        await asyncio.sleep(self.delay)
+        self.emit(self._decode(), True)
+        self.close()
+        return self.transcript
+
+    def _decode(self) -> str:
+        if self.scripted_transcript is not None:
+            return self.scripted_transcript
+        return self.audio.decode("utf-8", errors="ignore").strip()
+
+
+# Returns scripted transcripts in order, or the audio bytes decoded as UTF-8 once the script runs out
+class FakeSpeechToText(SpeechToText):
+    def __init__(self, transcripts: Optional[List[str]] = None, delay: float = 0.0):
+        self.transcripts = list(transcripts or [])
+        self.delay = delay
+
+    def _next_transcript(self) -> Optional[str]:
+        return self.transcripts.pop(0) if self.transcripts else None
+
+    async def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        await asyncio.sleep(self.delay)
+        transcript = self._next_transcript()
+        if transcript is None:
+            transcript = audio.decode("utf-8", errors="ignore").strip()
+        return transcript
+
+    async def open_stream(self, sample_rate: int) -> TranscriptionStream:
+        return FakeTranscriptionStream(sample_rate, self._next_transcript(), self.delay)
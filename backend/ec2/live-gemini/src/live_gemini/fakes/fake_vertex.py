@@ -0,0 +1,34 @@
+import hashlib
+import numpy as np
+from fastapi import FastAPI, Request
+
+
+def fake_embedding(text: str, dimensions: int) -> list:
+    # Deterministic per text, so repeated queries hit the same products
+    seed = int.from_bytes(hashlib.sha1(text.encode("utf-8")).digest()[:8], "big")
+    return np.random.default_rng(seed).standard_normal(dimensions, dtype=np.float32).tolist()
+
+
+# Stand-in for the Google OAuth token endpoint and the Vertex AI text embedding predict endpoint
+def create_fake_vertex(dimensions: int = 768) -> FastAPI:
+    app = FastAPI()
+    app.state.tokens = 0
+    app.state.predictions = 0
+
+    @app.post("/token")
+    async def token():
+        app.state.tokens += 1
+        return {"access_token": f"fake-token-{app.state.tokens}", "expires_in": 3600, "token_type": "Bearer"}
+
+    @app.post("/v1/projects/{project}/locations/{location}/publishers/google/models/{model}")
+    async def predict(project: str, location: str, model: str, request: Request):
+        body = await request.json()
+        app.state.predictions += 1
+        return {
+            "predictions": [
+                {"embeddings": {"values": fake_embedding(instance["content"], dimensions)}}
+                for instance in body["instances"]
+            ]
+        }
+
+    return app
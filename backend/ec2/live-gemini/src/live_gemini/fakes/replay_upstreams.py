@@ -0,0 +1,118 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from google.genai.types import LiveServerMessage
+from types import SimpleNamespace
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+def scaled(seconds: float, speed: float) -> float:
+    # speed 1.0 replays in real time, 0 as fast as possible
+    return seconds / speed if speed > 0 else 0.0
+
+
+class ReplayTurn:
+    def __init__(self, speed: float):
+        self.speed = speed
+        # One segment per prompt or tool response, messages are offset from the moment it was sent
+        self.segments: List[List[Tuple[float, LiveServerMessage]]] = [[]]
+        self.responded: Deque[asyncio.Event] = deque()
+        self.anchor = time.monotonic()
+
+    def start(self):
+        self.anchor = time.monotonic()
+        self.responded = deque(asyncio.Event() for _ in self.segments[1:])
+
+    def tool_responded(self):
+        if self.responded:
+            self.anchor = time.monotonic()
+            self.responded.popleft().set()
+
+    async def messages(self):
+        for index, segment in enumerate(self.segments):
+            # Answers after a tool call only start once the tool result has been sent back
+            if index and self.responded:
+                await self.responded[0].wait()
+            for offset, message in segment:
+                delay = self.anchor + scaled(offset, self.speed) - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                yield message
+
+
+# Stands in for a Gemini live session, answering each prompt with the next recorded model turn
+class ReplayLiveSession:
+    def __init__(self, turns: List[ReplayTurn]):
+        self.turns = deque(turns)
+        self.current: Optional[ReplayTurn] = None
+        self.unmatched_prompts = 0
+
+    async def send_client_content(self, turns=None, turn_complete: bool = True):
+        if self.turns:
+            self.current = self.turns.popleft()
+            self.current.start()
+        else:
+            self.unmatched_prompts += 1
+            self.current = None
+
+    async def send_tool_response(self, function_responses=None):
+        if self.current is not None:
+            self.current.tool_responded()
+
+    async def send_realtime_input(self, **kwargs):
+        pass
+
+    async def receive(self):
+        turn, self.current = self.current, None
+        if turn is None:
+            return
+        async for message in turn.messages():
+            yield message
+
+
+class ReplayClient:
+    def __init__(self, session: ReplayLiveSession):
+        self.session = session
+        self.aio = SimpleNamespace(live=SimpleNamespace(connect=self.connect))
+
+    @asynccontextmanager
+    async def connect(self, model: str, config: Any):
+        yield self.session
+
+
+# Serves recorded retrieve_products results by query and k, with the recorded backend latency
+class ReplayRetrieval:
+    def __init__(self, events: List[Dict[str, Any]], speed: float):
+        self.speed = speed
+        self.recorded: Dict[Tuple[str, int], Deque[Dict[str, Any]]] = {}
+        for event in events:
+            self.recorded.setdefault((event["query"], event["k"]), deque()).append(event)
+        self.misses = 0
+
+    async def retrieve(self, query: str, k: int) -> Dict[str, Any]:
+        recorded = self.recorded.get((query, k))
+        if not recorded:
+            self.misses += 1
+            return {"results": []}
+        # The last recording of a query keeps answering repeats of it
+        event = recorded.popleft() if len(recorded) > 1 else recorded[0]
+        await asyncio.sleep(scaled(event["seconds"], self.speed))
+        return event["result"]
+
+
+def build_replay_turns(events: List[Dict[str, Any]], speed: float) -> List[ReplayTurn]:
+    turns = []
+    anchor = 0.0
+    for event in events:
+        match event["kind"]:
+            case "model_prompt":
+                turns.append(ReplayTurn(speed))
+                anchor = event["t"]
+            case "model_tool_response" if turns:
+                turns[-1].segments.append([])
+                anchor = event["t"]
+            case "model_message" if turns:
+                message = LiveServerMessage.model_validate(event["message"])
+                turns[-1].segments[-1].append((event["t"] - anchor, message))
+    return turns
@@ -1,18 +1,30 @@
-from langgraph.config import get_stream_writer
+import asyncio
+import os
+import time
+from contextlib import aclosing
+from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_config
 from langgraph.graph import StateGraph, END
 from pydantic import BaseModel
-from typing import TypedDict, Dict, Any, AsyncGenerator
+from typing import TypedDict, Dict, Any, AsyncGenerator, FrozenSet, Optional
 
 from .agents.comparison_agent import comparison_agent
 from .agents.fallback_agent import fallback_agent
 from .agents.navigation_agent import navigation_agent
 from .agents.product_info_agent import product_info_agent
 from .agents.router_agent import determine_agent
+from .agents.tool_loop_agent import tool_loop_agent
 from .enums.agent_types import AgentType
-from .utils.global_store import GlobalStore
+from .enums.message_types import MessageType
+from .tools.speculative_retrieval import SPECULATIVE_RETRIEVAL_ENABLED, SpeculativeRetrieval
+from .utils.metrics import ROUTING_SECONDS, company_label
+from .utils.session_context import SessionContext
 
-store = GlobalStore()
-COMPANY_INFO = store.get("company_info")
+load_dotenv()
+
+# "graph" routes with one model turn and answers with another, "tool_loop" does both in a single turn
+TURN_MODE = os.getenv("TURN_MODE", "graph")
 
 
 class MessageRequest(BaseModel):
@@ -27,15 +39,26 @@ class AgentState(TypedDict):
     retrieved_products: Dict[str, Any] = {}
 
 
-async def router(llm_live_api, state: AgentState) -> Dict[str, str]:
-    result = await determine_agent(llm_live_api, state["request"])
+async def router(llm_live_api, session_context: SessionContext, state: AgentState,
+                 speculation: Optional[SpeculativeRetrieval] = None) -> Dict[str, str]:
+    start = time.perf_counter()
+    result = await determine_agent(llm_live_api, session_context, state["request"], speculation)
+    ROUTING_SECONDS.observe(time.perf_counter() - start, company_label(session_context), result["agent_type"])
+    # Turn metrics are labelled with the agent that answered
+    session_context.set("current_agent", result["agent_type"])
 
     return {"agent": result["agent_type"], "retrieved_products": result["retrieved_products"]}
 
 
-async def process_comparison(llm_live_api, state: AgentState) -> AgentState:
-    writer = get_stream_writer()
-    async for chunk in comparison_agent(llm_live_api, state["request"], state["retrieved_products"]):
+def stream_writer():
+    # Set by run_graph; stream_mode="custom" is not used because langgraph leaves its stream waiter task pending when
+    # a run is cancelled or closed early, which a barge-in does on every interrupted turn
+    return get_config()["configurable"]["writer"]
+
+
+async def process_comparison(llm_live_api, session_context: SessionContext, state: AgentState) -> AgentState:
+    writer = stream_writer()
+    async for chunk in comparison_agent(llm_live_api, session_context, state["request"], state["retrieved_products"]):
         response_state = {
             "request": state["request"],
             "response": chunk,
@@ -44,9 +67,9 @@ async def process_comparison(llm_live_api, state: AgentState) -> AgentState:
         writer(response_state)
 
 
-async def process_navigation(llm_live_api, state: AgentState) -> AgentState:
-    writer = get_stream_writer()
-    async for chunk in navigation_agent(llm_live_api, state["request"], state["retrieved_products"]):
+async def process_navigation(llm_live_api, session_context: SessionContext, state: AgentState) -> AgentState:
+    writer = stream_writer()
+    async for chunk in navigation_agent(llm_live_api, session_context, state["request"], state["retrieved_products"]):
         response_state = {
             "request": state["request"],
             "response": chunk,
@@ -55,9 +78,9 @@ async def process_navigation(llm_live_api, state: AgentState) -> AgentState:
         writer(response_state)
 
 
-async def process_product_info(llm_live_api, state: AgentState) -> AgentState:
-    writer = get_stream_writer()
-    async for chunk in product_info_agent(llm_live_api, state["request"], state.get("retrieved_products", {})):
+async def process_product_info(llm_live_api, session_context: SessionContext, state: AgentState) -> AgentState:
+    writer = stream_writer()
+    async for chunk in product_info_agent(llm_live_api, session_context, state["request"], state.get("retrieved_products", {})):
         response_state = {
             "request": state["request"],
             "response": chunk,
@@ -66,9 +89,9 @@ async def process_product_info(llm_live_api, state: AgentState) -> AgentState:
         writer(response_state)
 
 
-async def fallback(llm_live_api, state: AgentState) -> AgentState:
-    writer = get_stream_writer()
-    async for chunk in fallback_agent(llm_live_api, state["request"]):
+async def fallback(llm_live_api, session_context: SessionContext, state: AgentState) -> AgentState:
+    writer = stream_writer()
+    async for chunk in fallback_agent(llm_live_api, session_context, state["request"]):
         response_state = {
             "request": state["request"],
             "response": chunk,
@@ -77,64 +100,110 @@ async def fallback(llm_live_api, state: AgentState) -> AgentState:
         writer(response_state)
 
 
-async def run_graph(llm_live_api, text):
-    builder = StateGraph(AgentState)
+def _dependencies(config: RunnableConfig):
+    configurable = config["configurable"]
+    return configurable["llm_live_api"], configurable["session_context"]
 
-    conversation_history = store.get("conversation_history")
-    conversation_history.append({'role': 'user', 'content': text})
-    store.set("conversation_history", conversation_history)
 
-    initial_state = {
-        "request": text,
-        "response": "",
-        "current_agent": "",
-        "retrieved_products": {}
-    }
+async def router_node(state: AgentState, config: RunnableConfig):
+    return await router(*_dependencies(config), state, config["configurable"].get("speculation"))
+
+
+async def comparison_node(state: AgentState, config: RunnableConfig):
+    return await process_comparison(*_dependencies(config), state)
+
+
+async def navigation_node(state: AgentState, config: RunnableConfig):
+    return await process_navigation(*_dependencies(config), state)
+
 
-    # Define async wrappers instead of async lambdas
-    async def router_node(state):
-        return await router(llm_live_api, state)
+async def product_info_node(state: AgentState, config: RunnableConfig):
+    return await process_product_info(*_dependencies(config), state)
 
-    async def comparison_node(state):
-        return await process_comparison(llm_live_api, state)
 
-    async def navigation_node(state):
-        return await process_navigation(llm_live_api, state)
+async def fallback_node(state: AgentState, config: RunnableConfig):
+    return await fallback(*_dependencies(config), state)
 
-    async def product_info_node(state):
-        return await process_product_info(llm_live_api, state)
 
-    async def fallback_node(state):
-        return await fallback(llm_live_api, state)
+AGENT_NODES = {
+    AgentType.COMPARISON.value: comparison_node,
+    AgentType.NAVIGATION.value: navigation_node,
+    AgentType.PRODUCT_INFO.value: product_info_node,
+    AgentType.FALLBACK.value: fallback_node,
+}
+
+_compiled_graphs: Dict[FrozenSet[str], Any] = {}
+
+
+def build_graph(agent_types: FrozenSet[str]):
+    builder = StateGraph(AgentState)
 
     builder.add_node("Router", router_node)
-    builder.add_node(AgentType.COMPARISON.value, comparison_node)
-    builder.add_node(AgentType.NAVIGATION.value, navigation_node)
-    builder.add_node(AgentType.PRODUCT_INFO.value, product_info_node)
-    builder.add_node(AgentType.FALLBACK.value, fallback_node)
+    for agent_type in agent_types:
+        builder.add_node(agent_type, AGENT_NODES[agent_type])
 
     builder.set_entry_point("Router")
 
+    # Agents disabled for a company are answered by the fallback agent
     builder.add_conditional_edges(
         "Router",
-        lambda x: x["agent"],
-        {
-            AgentType.COMPARISON.value: AgentType.COMPARISON.value,
-            AgentType.NAVIGATION.value: AgentType.NAVIGATION.value,
-            AgentType.PRODUCT_INFO.value: AgentType.PRODUCT_INFO.value,
-            AgentType.FALLBACK.value: AgentType.FALLBACK.value
-        }
+        lambda x: x["agent"] if x["agent"] in agent_types else AgentType.FALLBACK.value,
+        {agent_type: agent_type for agent_type in agent_types}
     )
 
-    builder.add_edge(AgentType.COMPARISON.value, END)
-    builder.add_edge(AgentType.NAVIGATION.value, END)
-    builder.add_edge(AgentType.PRODUCT_INFO.value, END)
-    builder.add_edge(AgentType.FALLBACK.value, END)
+    for agent_type in agent_types:
+        builder.add_edge(agent_type, END)
+
+    return builder.compile()
+
+
+def graph_variant(company_info: Optional[Dict[str, Any]] = None) -> FrozenSet[str]:
+    enabled_agents = (company_info or {}).get("agents") or AGENT_NODES.keys()
+    return frozenset(agent for agent in enabled_agents if agent in AGENT_NODES) | {AgentType.FALLBACK.value}
+
+
+def get_graph(company_info: Optional[Dict[str, Any]] = None):
+    agent_types = graph_variant(company_info)
+    graph = _compiled_graphs.get(agent_types)
+    if graph is None:
+        graph = build_graph(agent_types)
+        _compiled_graphs[agent_types] = graph
+    return graph
+
+
+# Compile the default variant at import so no turn pays for it
+get_graph()
+
+
+async def run_graph(llm_live_api, session_context: SessionContext, text: str):
+    graph = get_graph(session_context.get("company_info"))
 
-    graph = builder.compile()
+    session_context.get("conversation_history").append("user", text)
+
+    initial_state = {
+        "request": text,
+        "response": "",
+        "current_agent": "",
+        "retrieved_products": {}
+    }
+    # Start embedding and kNN on the raw transcript while the router is still deciding
+    speculation = SpeculativeRetrieval(text, session_context) if SPECULATIVE_RETRIEVAL_ENABLED else None
+    chunks: asyncio.Queue = asyncio.Queue()
+    config = {
+        "configurable": {
+            "llm_live_api": llm_live_api,
+            "session_context": session_context,
+            "speculation": speculation,
+            "writer": chunks.put_nowait,
+        }
+    }
+    run = None
 
     try:
-        async for chunk in graph.astream(initial_state, stream_mode="custom"):
+        # Before any agent renders a prompt, see LLMApi.prepare_turn
+        await llm_live_api.prepare_turn()
+        run = asyncio.create_task(_invoke(graph, initial_state, config, chunks))
+        while (chunk := await chunks.get()) is not None:
             response_data = chunk["response"].copy()
 
             yield {
@@ -142,6 +211,7 @@ async def run_graph(llm_live_api, text):
                     **response_data,
                 }
             }
+        await run
 
     except Exception as e:
         print(f"Error in run_graph: {str(e)}")
@@ -149,4 +219,58 @@ async def run_graph(llm_live_api, text):
             "response": {
                 "error": str(e)
             }
-        }
\ No newline at end of file
+        }
+    finally:
+        # A cancelled or closed turn stops the graph run and its node tasks here rather than leaving them running
+        if run is not None and not run.done():
+            run.cancel()
+            await asyncio.gather(run, return_exceptions=True)
+        if speculation is not None:
+            speculation.discard()
+
+
+async def _invoke(graph, initial_state: AgentState, config: Dict[str, Any], chunks: asyncio.Queue):
+    try:
+        await graph.ainvoke(initial_state, config=config)
+    finally:
+        chunks.put_nowait(None)
+
+
+async def run_tool_loop(llm_live_api, session_context: SessionContext, text: str):
+    company_info = session_context.get("company_info")
+
+    session_context.get("conversation_history").append("user", text)
+
+    speculation = SpeculativeRetrieval(text, session_context) if SPECULATIVE_RETRIEVAL_ENABLED else None
+
+    try:
+        await llm_live_api.prepare_turn()
+        async with aclosing(tool_loop_agent(llm_live_api, session_context, text, graph_variant(company_info),
+                                            speculation)) as responses:
+            async for response in responses:
+                # Tool calls are answered on the session, the client only hears the answer
+                if response.get("type") == MessageType.TOOL_RESPONSE.value:
+                    continue
+                yield {
+                    "response": {
+                        **response,
+                    }
+                }
+
+    except Exception as e:
+        print(f"Error in run_tool_loop: {str(e)}")
+        yield {
+            "response": {
+                "error": str(e)
+            }
+        }
+    finally:
+        if speculation is not None:
+            speculation.discard()
+
+
+def run_turn(llm_live_api, session_context: SessionContext, text: str):
+    company_info = session_context.get("company_info") or {}
+    if company_info.get("turnMode", TURN_MODE) == "tool_loop":
+        return run_tool_loop(llm_live_api, session_context, text)
+    return run_graph(llm_live_api, session_context, text)
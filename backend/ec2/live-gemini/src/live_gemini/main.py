@@ -1,38 +1,69 @@
 import boto3
-import google.auth
-import google.auth.transport.requests
-import httpx
-import json
+import hmac
 import os
 import uvicorn
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Header, HTTPException, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from google.oauth2 import service_account
+from fastapi.responses import PlainTextResponse
 from requests_aws4auth import AWS4Auth
 from google.genai.types import Modality
-from pydantic import BaseModel
-from .graph import run_graph
+from .duplex_session import DuplexSession
+from .graph import TURN_MODE, get_graph
 
+from .agents.intent_classifier import intent_classifier
 from .api.live_llm_api import LLMApi
+from .api.live_session_pool import LiveSessionPool
+from .api.product_snapshot_api import export_product_snapshot
+from .tools.speculative_retrieval import SpeculativeRetrieval
+from .utils.admission import ADMISSION_CLOSE_CODE, DISCONNECTED, Admission
+from .utils.audio_coalescer import AudioCoalescer
+from .utils.audio_protocol import AudioSocket, BINARY_PROTOCOL, PROTOCOL_VERSION, negotiate_protocol
+from .utils.company_config_cache import CompanyConfigCache
+from .utils.embedding_cache import embedding_cache
 from .utils.global_store import GlobalStore
+from .utils.google_credentials import GoogleCredentialManager
+from .utils.http_clients import HttpClients
+from .utils.metrics import metrics
+from .utils.product_index import ProductIndexRegistry
+from .utils.semantic_result_cache import semantic_result_cache
+from .utils.session_context import SessionContext
+from .utils.session_recorder import SessionRecorder, create_recorder
+from .utils.session_registry import SessionRegistry
+from .utils.state_store import StateStore
 
 load_dotenv()
 
-app = FastAPI(title="Live Gemini WebSocket Server")
-store = GlobalStore()
+# Bearer token for the cache maintenance endpoints; while unset they are disabled
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+store = GlobalStore()
 
 active_connections: list[WebSocket] = []
+metrics.gauge("voice_active_sessions", "Open client WebSockets", lambda: len(active_connections))
 
-GOOGLE_PROJECT_ID = os.getenv("GOOGLE_PROJECT_ID")
-GOOGLE_SERVICE_ACCOUNT = os.getenv("GOOGLE_SERVICE_ACCOUNT")
+# The numbers behind the /stats endpoints, also exported on /metrics as voice_stats_<component>_<field> so
+# dashboards do not have to poll the JSON; the cross-worker totals of /stats/state need an await and stay there
+STATS_COLLECTORS = {
+    "http": HttpClients.stats,
+    "company_config": CompanyConfigCache.stats,
+    "embedding_cache": embedding_cache.stats,
+    "semantic_cache": semantic_result_cache.stats,
+    "product_index": ProductIndexRegistry.stats,
+    "intent_classifier": lambda: intent_classifier.stats() if intent_classifier is not None else {},
+    "speculative_retrieval": SpeculativeRetrieval.stats,
+    "google_credentials": GoogleCredentialManager.stats,
+    "audio_frames": AudioCoalescer.stats,
+    "live_session_pool": LiveSessionPool.stats,
+    "sessions": DuplexSession.stats,
+    "recordings": SessionRecorder.stats,
+    "admission": Admission.stats,
+    "state": StateStore.stats,
+    "registry": SessionRegistry.stats,
+}
+for component, read in STATS_COLLECTORS.items():
+    metrics.stats(f"voice_stats_{component}", f"Field of the {component.replace('_', ' ')} stats under /stats", read)
 
 
 def get_aws_auth():
@@ -48,22 +79,141 @@ def get_aws_auth():
     )
 
 
-@app.on_event("startup")
-async def startup_event():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     aws_auth = get_aws_auth()
     store.set("aws_auth", aws_auth)
+    await StateStore.start()
+    await SessionRegistry.start()
+    semantic_result_cache.start()
+    HttpClients.start()
+    await GoogleCredentialManager.start()
+    LiveSessionPool.start()
+    try:
+        yield
+    finally:
+        # Runs after uvicorn has closed client sockets with 1012 and let their handlers finish
+        await LiveSessionPool.stop()
+        await GoogleCredentialManager.stop()
+        await HttpClients.close()
+        await semantic_result_cache.stop()
+        await SessionRegistry.stop()
+        await StateStore.stop()
+
+
+app = FastAPI(title="Live Gemini WebSocket Server", lifespan=lifespan)
+
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+
+@app.get("/stats/http")
+async def http_stats():
+    return HttpClients.stats()
+
+
+@app.get("/stats/company-config")
+async def company_config_stats():
+    return CompanyConfigCache.stats()
+
+
+@app.get("/stats/embedding-cache")
+async def embedding_cache_stats():
+    return embedding_cache.stats()
+
+
+@app.get("/stats/semantic-cache")
+async def semantic_cache_stats():
+    return semantic_result_cache.stats()
+
+
+def require_admin(authorization: str = Header("")):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Maintenance endpoints are disabled, set ADMIN_TOKEN")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {ADMIN_TOKEN}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+@app.post("/cache/products/{company_id}/invalidate", dependencies=[Depends(require_admin)])
+async def invalidate_product_cache(company_id: str):
+    await semantic_result_cache.invalidate_everywhere(company_id)
+    return {"invalidated": company_id}
+
 
+@app.get("/stats/product-index")
+async def product_index_stats():
+    return ProductIndexRegistry.stats()
 
-class MessageRequest(BaseModel):
-    message: str
-    mimeType: str
+
+@app.post("/cache/products/{company_id}/snapshot", dependencies=[Depends(require_admin)])
+async def snapshot_product_index(company_id: str):
+    try:
+        products = await export_product_snapshot(company_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    await semantic_result_cache.invalidate_everywhere(company_id)
+    return {"company_id": company_id, "products": products}
+
+
+@app.get("/stats/intent-classifier")
+async def intent_classifier_stats():
+    return intent_classifier.stats() if intent_classifier is not None else {"enabled": False}
+
+
+@app.get("/stats/speculative-retrieval")
+async def speculative_retrieval_stats():
+    return SpeculativeRetrieval.stats()
+
+
+@app.get("/stats/google-credentials")
+async def google_credentials_stats():
+    return GoogleCredentialManager.stats()
+
+
+@app.get("/stats/audio-frames")
+async def audio_frame_stats():
+    return AudioCoalescer.stats()
+
+
+@app.get("/stats/live-session-pool")
+async def live_session_pool_stats():
+    return LiveSessionPool.stats()
+
+
+@app.get("/stats/sessions")
+async def session_stats():
+    return DuplexSession.stats()
+
+
+@app.get("/stats/recordings")
+async def recording_stats():
+    return SessionRecorder.stats()
+
+
+@app.get("/stats/admission")
+async def admission_stats():
+    return Admission.stats()
+
+
+@app.get("/stats/state")
+async def state_stats():
+    return {**StateStore.stats(), "registry": SessionRegistry.stats(), "totals": await SessionRegistry.totals()}
+
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.websocket("/")
 async def websocket_endpoint(websocket: WebSocket):
     await websocket.accept()
 
-    store.clear()
+    session_context = SessionContext()
 
     try:
         initial_data = await websocket.receive_json()
@@ -71,55 +221,56 @@ async def websocket_endpoint(websocket: WebSocket):
         if not company_id:
             await websocket.close(code=4001, reason="Missing company-id in initial message")
             return
+        audio_socket = AudioSocket(websocket, negotiate_protocol(initial_data))
     except Exception as e:
         print(f"Error receiving initial message: {e}")
         await websocket.close(code=4001, reason="Invalid initial message format")
         return
 
-    config_url = f"https://spurhacks-company.s3.us-east-1.amazonaws.com/{company_id}/config.json"
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(config_url)
-            if resp.status_code != 200:
-                raise Exception(f"Status code: {resp.status_code}")
-            company_config = resp.json()
-            store.set("company_info", company_config)
+        company_config = await CompanyConfigCache.get(company_id)
+        session_context.set("company_id", company_id)
+        session_context.set("company_info", company_config)
+        get_graph(company_config)
     except Exception as e:
         print(f"Failed to fetch company config for {company_id}: {e}")
         await websocket.close(code=4002, reason="Could not retrieve company config")
         return
 
+    rejection = await Admission.admit(session_context.session_id, company_id, company_config,
+                                      audio_socket.wait_closed)
+    if rejection == DISCONNECTED:
+        return
+    if rejection is not None:
+        await websocket.close(code=ADMISSION_CLOSE_CODE, reason=Admission.rejection_reason(rejection))
+        return
+
     try:
-        if not GOOGLE_SERVICE_ACCOUNT:
-            await websocket.close()
-            return
+        await serve_session(websocket, audio_socket, session_context)
+    finally:
+        await Admission.release(session_context.session_id)
+        session_context.clear()
 
-        service_account_info = json.loads(GOOGLE_SERVICE_ACCOUNT)
-        credentials = service_account.Credentials.from_service_account_info(
-            service_account_info,
-            scopes=['https://www.googleapis.com/auth/cloud-platform']
-        )
 
-        request = google.auth.transport.requests.Request()
-        credentials.refresh(request)
-        access_token = credentials.token
-        project_id = service_account_info.get("project_id")
+# Runs an admitted session: opens its upstream connections, then hands the socket to a DuplexSession
+async def serve_session(websocket: WebSocket, audio_socket: AudioSocket, session_context: SessionContext):
+    company_id = session_context.get("company_id")
+    company_config = session_context.get("company_info")
 
-    except json.JSONDecodeError:
-        print("Failed to decode GOOGLE_SERVICE_ACCOUNT. Is it a valid JSON string?")
-        await websocket.close()
-        return
+    try:
+        credentials, project_id = await GoogleCredentialManager.get_credentials()
     except Exception as e:
         print(f"Error getting access token: {e}")
         await websocket.close()
         return
 
-    store.set("google_access_token", access_token)
-    store.set("google_credentials", credentials)
-    store.set("google_project_id", project_id)
+    session_context.set("google_credentials", credentials)
+    session_context.set("google_project_id", project_id)
     active_connections.append(websocket)
 
-    llm_live_api = LLMApi(credentials, project_id)
+    llm_live_api = LiveSessionPool.acquire(company_id, company_config, session_context)
+    if llm_live_api is None:
+        llm_live_api = LLMApi(credentials, project_id, session_context)
 
     try:
         await llm_live_api.get_session(modality=Modality.AUDIO)
@@ -130,36 +281,26 @@ async def websocket_endpoint(websocket: WebSocket):
             active_connections.remove(websocket)
         return
 
+    if audio_socket.protocol == BINARY_PROTOCOL:
+        await websocket.send_json({"protocol": BINARY_PROTOCOL, "version": PROTOCOL_VERSION})
+
+    recorder = create_recorder(session_context.session_id, company_config)
+    if recorder is not None:
+        session_context.set("recorder", recorder)
+        recorder.record("session", company_id=company_id, company_info=company_config,
+                        protocol=audio_socket.protocol, turn_mode=TURN_MODE)
+
     try:
-        while True:
-            try:
-                data = await websocket.receive_json()
-                message_request = MessageRequest(**data['request'])
-
-                text = message_request.message.strip()
-
-                if message_request.mimeType.startswith('audio/'):
-                    text = await llm_live_api.transcribe_audio(message_request.message, message_request.mimeType)
-
-                # Pass llm_live_api and text to run_graph
-                async for chunk in run_graph(llm_live_api, text):
-                    if chunk and isinstance(chunk, dict):
-                        await websocket.send_json({"response": chunk["response"]})
-            except WebSocketDisconnect:
-                break
-            except Exception as e:
-                print(f"Error handling message: {e}")
-                break
-
-    except WebSocketDisconnect:
-        print("Client disconnected")
+        await DuplexSession(audio_socket, llm_live_api, session_context).run()
     finally:
-        await llm_live_api.close_session()
+        if recorder is not None:
+            await recorder.close()
+        await llm_live_api.close()
         if websocket in active_connections:
             active_connections.remove(websocket)
-        store.clear()
 
 
+# Development server with reload; production runs several workers through live_gemini.server
 if __name__ == "__main__":
     uvicorn.run(
         "live_gemini.main:app",
@@ -0,0 +1,121 @@
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List, Optional
+
+# Speculation compares embeddings from Vertex, which a replay has no access to
+os.environ["SPECULATIVE_RETRIEVAL_ENABLED"] = "false"
+
+from google.genai.types import Modality
+
+from .api.live_llm_api import LLMApi
+from .enums.message_types import MessageType
+from .fakes.fake_stt import FakeSpeechToText
+from .fakes.replay_upstreams import ReplayClient, ReplayLiveSession, ReplayRetrieval, build_replay_turns
+from .graph import run_turn
+from .utils.session_context import SessionContext
+from .utils.session_recorder import load_recording
+
+ANSWER_TYPES = {MessageType.AUDIO.value, MessageType.TEXT.value}
+
+
+def recorded_turns(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    # Latency as the client saw it: transcript to first and last answer message before the next transcript
+    turns = []
+    for event in events:
+        if event["kind"] == "transcript":
+            turns.append({"text": event["text"], "at": event["t"], "first_answer": None, "total": 0.0})
+        elif event["kind"] == "outbound" and turns and event["type"] in ANSWER_TYPES:
+            turn = turns[-1]
+            elapsed = event["t"] - turn["at"]
+            if turn["first_answer"] is None:
+                turn["first_answer"] = elapsed
+            turn["total"] = elapsed
+    return turns
+
+
+async def replay(path: str, speed: float = 1.0) -> Dict[str, Any]:
+    events = load_recording(path)
+    header = next((event for event in events if event["kind"] == "session"), {})
+
+    company_info = dict(header.get("company_info") or {})
+    # The recorded turn strategy is replayed, a company override already in the config wins as it did live
+    company_info.setdefault("turnMode", header.get("turn_mode", "graph"))
+    company_info["retrievalBackend"] = "replay"
+
+    session_context = SessionContext()
+    session_context.set("company_id", header.get("company_id"))
+    session_context.set("company_info", company_info)
+    retrieval = ReplayRetrieval([event for event in events if event["kind"] == "retrieval"], speed)
+    session_context.set("replay_retrieval", retrieval)
+
+    live_session = ReplayLiveSession(build_replay_turns(events, speed))
+    llm_live_api = LLMApi(None, None, session_context, stt=FakeSpeechToText(), client=ReplayClient(live_session))
+    await llm_live_api.get_session(modality=Modality.AUDIO)
+
+    turns = recorded_turns(events)
+    started_at = time.monotonic()
+    try:
+        for turn in turns:
+            # In real time the shopper speaks when they did, unless the previous answer is still running late
+            wait = started_at + (turn["at"] / speed if speed > 0 else 0.0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            start = time.perf_counter()
+            first_answer: Optional[float] = None
+            last_answer = 0.0
+            async for chunk in run_turn(llm_live_api, session_context, turn["text"]):
+                if chunk["response"].get("type") in ANSWER_TYPES:
+                    last_answer = time.perf_counter() - start
+                    if first_answer is None:
+                        first_answer = last_answer
+            turn["replayed_first_answer"] = first_answer
+            turn["replayed_total"] = last_answer
+    finally:
+        await llm_live_api.close()
+        session_context.clear()
+
+    return {
+        "recording": path,
+        "speed": speed,
+        "turns": turns,
+        "retrieval_misses": retrieval.misses,
+        "unmatched_prompts": live_session.unmatched_prompts,
+    }
+
+
+def _ms(seconds: Optional[float]) -> str:
+    return f"{seconds * 1000:.1f}" if seconds is not None else "-"
+
+
+def print_report(result: Dict[str, Any]):
+    print(f"{result['recording']} at speed {result['speed'] or 'max'}")
+    print(f"{'turn':>4} {'recorded first':>15} {'replayed first':>15} {'recorded total':>15} {'replayed total':>15}")
+    for index, turn in enumerate(result["turns"]):
+        print(f"{index:>4} {_ms(turn['first_answer']):>13}ms {_ms(turn['replayed_first_answer']):>13}ms "
+              f"{_ms(turn['total']):>13}ms {_ms(turn['replayed_total']):>13}ms")
+    replayed = [turn["replayed_total"] for turn in result["turns"]]
+    if replayed:
+        print(f"replayed turn total: mean={statistics.mean(replayed) * 1000:.1f}ms max={max(replayed) * 1000:.1f}ms")
+    if result["retrieval_misses"] or result["unmatched_prompts"]:
+        # The build under test asked for something the recording never saw
+        print(f"diverged: {result['retrieval_misses']} retrievals and "
+              f"{result['unmatched_prompts']} model prompts had no recorded answer")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded voice session against fake upstreams.")
+    parser.add_argument("recording")
+    parser.add_argument("--speed", type=float, default=1.0, help="1 for real time, 0 for as fast as possible")
+    parser.add_argument("--output", help="Write the per-turn timings as JSON for comparing builds")
+    args = parser.parse_args()
+
+    result = asyncio.run(replay(args.recording, args.speed))
+    print_report(result)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(result, file, indent=2)
@@ -0,0 +1,37 @@
+import argparse
+import os
+import uvicorn
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+# Worker processes, one event loop each; uvicorn's usual variable so process managers can set it
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))
+# Seconds open sessions get to finish their cleanup after a SIGTERM before their tasks are cancelled
+SHUTDOWN_GRACE_SECONDS = float(os.getenv("SHUTDOWN_GRACE_SECONDS", "30"))
+
+
+def run(workers: int = WEB_CONCURRENCY, host: str = HOST, port: int = PORT):
+    # Workers are spawned and import their settings from the environment, so the default has to be set here:
+    # with several workers the per-process memory backend would give each one its own view of shared state
+    if workers > 1:
+        os.environ.setdefault("STATE_BACKEND", "shared")
+    uvicorn.run(
+        "live_gemini.main:app",
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=SHUTDOWN_GRACE_SECONDS,
+        log_level=os.getenv("LOG_LEVEL", "info"),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the voice WebSocket server with several worker processes.")
+    parser.add_argument("--workers", type=int, default=WEB_CONCURRENCY)
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+    run(args.workers, args.host, args.port)
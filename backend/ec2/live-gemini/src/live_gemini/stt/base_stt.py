@@ -0,0 +1,70 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Any, AsyncIterator, Dict, List
+
+from ..enums.message_types import MessageType
+
+DEFAULT_SAMPLE_RATE = 16000
+
+
+def parse_sample_rate(mime_type: str, default: int = DEFAULT_SAMPLE_RATE) -> int:
+    if ";rate=" in mime_type:
+        try:
+            return int(mime_type.split(";rate=")[1])
+        except ValueError:
+            pass
+    return default
+
+
+class TranscriptionStream(ABC):
+    def __init__(self, sample_rate: int):
+        self.sample_rate = sample_rate
+        self._events: asyncio.Queue = asyncio.Queue()
+        self._finals: List[str] = []
+        self._closed = False
+
+    def emit(self, text: str, final: bool):
+        if final and text:
+            self._finals.append(text)
+        self._events.put_nowait({
+            "type": MessageType.TRANSCRIPT.value,
+            "message": text,
+            "final": final
+        })
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._events.put_nowait(None)
+
+    @property
+    def transcript(self) -> str:
+        return " ".join(self._finals).strip()
+
+    async def events(self) -> AsyncIterator[Dict[str, Any]]:
+        while True:
+            event = await self._events.get()
+            if event is None:
+                return
+            yield event
+
+    @abstractmethod
+    async def send(self, chunk: bytes):
+        ...
+
+    @abstractmethod
+    async def finish(self) -> str:
+        ...
+
+
+class SpeechToText(ABC):
+    @abstractmethod
+    async def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        ...
+
+    @abstractmethod
+    async def open_stream(self, sample_rate: int) -> TranscriptionStream:
+        ...
+
+    async def close(self):
+        pass
@@ -0,0 +1,123 @@
+import asyncio
+import os
+from deepgram import (
+    DeepgramClient,
+    DeepgramClientOptions,
+    LiveOptions,
+    LiveTranscriptionEvents,
+    PrerecordedOptions,
+    FileSource,
+)
+from dotenv import load_dotenv
+
+from .base_stt import SpeechToText, TranscriptionStream
+
+load_dotenv()
+DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
+DEEPGRAM_MODEL = os.getenv("DEEPGRAM_MODEL", "nova-3")
+# Overrides api.deepgram.com, for on-prem Deepgram or a local stand-in
+DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "")
+# Seconds to wait for the result flushed by Finalize before closing with whatever was transcribed
+DEEPGRAM_FINALIZE_TIMEOUT = float(os.getenv("DEEPGRAM_FINALIZE_TIMEOUT", "2.0"))
+
+
+# Connections still closing in the background, referenced so their tasks are not collected
+_closing: set = set()
+
+
+class DeepgramTranscriptionStream(TranscriptionStream):
+    def __init__(self, deepgram: DeepgramClient, sample_rate: int):
+        super().__init__(sample_rate)
+        self.connection = deepgram.listen.asyncwebsocket.v("1")
+        self.finalized = asyncio.Event()
+
+        async def on_transcript(_client, result, **kwargs):
+            alternatives = result.channel.alternatives if result and result.channel else []
+            if alternatives:
+                self.emit(alternatives[0].transcript, bool(result.is_final))
+            if result and result.from_finalize:
+                self.finalized.set()
+
+        async def on_error(_client, error, **kwargs):
+            print(f"Deepgram stream error: {error}")
+
+        self.connection.on(LiveTranscriptionEvents.Transcript, on_transcript)
+        self.connection.on(LiveTranscriptionEvents.Error, on_error)
+
+    async def start(self):
+        options = LiveOptions(
+            model=DEEPGRAM_MODEL,
+            smart_format=True,
+            language="en-US",
+            encoding="linear16",
+            sample_rate=self.sample_rate,
+            channels=1,
+            interim_results=True,
+        )
+        if not await self.connection.start(options):
+            raise Exception("Failed to start Deepgram live transcription")
+
+    async def send(self, chunk: bytes):
+        await self.connection.send(chunk)
+
+    async def finish(self) -> str:
+        # The SDK's finish() sends CloseStream and only waits a fixed 0.5 s for the last results, which a busy
+        # worker overshoots and the utterance comes back empty; Finalize flushes them and says when it is done
+        try:
+            if await self.connection.finalize():
+                await asyncio.wait_for(self.finalized.wait(), DEEPGRAM_FINALIZE_TIMEOUT)
+        except asyncio.TimeoutError:
+            print("Deepgram did not finalize in time, closing with the transcript so far")
+        finally:
+            transcript = self.transcript
+            self.close()
+            _closing.add(asyncio.create_task(self._close_connection()))
+        return transcript
+
+    async def _close_connection(self):
+        try:
+            await self.connection.finish()
+        finally:
+            _closing.discard(asyncio.current_task())
+
+
+class DeepgramSpeechToText(SpeechToText):
+    def __init__(self, api_key: str | None = DEEPGRAM_API_KEY):
+        self.deepgram = DeepgramClient(api_key=api_key, config=DeepgramClientOptions(url=DEEPGRAM_URL))
+
+    async def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        payload: FileSource = {
+            "buffer": audio,
+            "mimetype": "audio/l16",
+            "encoding": "linear16",
+            "sample_rate": sample_rate,
+            "channels": 1,
+            "bits_per_sample": 16
+        }
+
+        options = PrerecordedOptions(
+            model=DEEPGRAM_MODEL,
+            smart_format=True,
+            language="en-US",
+            encoding="linear16",
+            sample_rate=sample_rate
+        )
+        # The REST client is synchronous, run it off the event loop
+        response = await asyncio.to_thread(
+            self.deepgram.listen.rest.v("1").transcribe_file,
+            payload,
+            options
+        )
+
+        if (response and hasattr(response, 'results') and
+                hasattr(response.results, 'channels') and
+                len(response.results.channels) > 0 and
+                len(response.results.channels[0].alternatives) > 0):
+            return response.results.channels[0].alternatives[0].transcript
+
+        raise Exception("No transcription received")
+
+    async def open_stream(self, sample_rate: int) -> TranscriptionStream:
+        stream = DeepgramTranscriptionStream(self.deepgram, sample_rate)
+        await stream.start()
+        return stream
@@ -0,0 +1,108 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from google import genai
+from google.genai.types import ActivityEnd, ActivityStart, AudioTranscriptionConfig, AutomaticActivityDetection, \
+    Blob, LiveConnectConfig, Modality, RealtimeInputConfig
+from typing import Any, Optional
+
+from .base_stt import SpeechToText, TranscriptionStream
+
+load_dotenv()
+GEMINI_STT_MODEL = os.getenv("GEMINI_STT_MODEL", "gemini-2.0-flash-exp")
+# Seconds to wait for the last input transcription after the utterance ends
+GEMINI_STT_FINISH_TIMEOUT = float(os.getenv("GEMINI_STT_FINISH_TIMEOUT", "5.0"))
+GEMINI_STT_CHUNK_BYTES = 3200
+
+# The model's own reply is discarded, only the server-side input transcription is used; the instruction and the
+# one-token output cap keep it from spending output quota on replies nobody reads
+GEMINI_STT_INSTRUCTION = "You are a listener. Whatever you hear, reply with a single period and nothing else."
+
+
+class GeminiTranscriptionStream(TranscriptionStream):
+    def __init__(self, stt: "GeminiSpeechToText", session: Any, sample_rate: int):
+        super().__init__(sample_rate)
+        self.stt = stt
+        self.session = session
+        self.mime_type = f"audio/pcm;rate={sample_rate}"
+        self.text = ""
+        self.reader: Optional[asyncio.Task] = None
+
+    async def start(self):
+        # The client already marks where utterances end, so activity is signalled explicitly
+        await self.session.send_realtime_input(activity_start=ActivityStart())
+        self.reader = asyncio.create_task(self._read())
+
+    async def _read(self):
+        async for message in self.session.receive():
+            server_content = message.server_content
+            if server_content and server_content.input_transcription and server_content.input_transcription.text:
+                self.text += server_content.input_transcription.text
+                self.emit(self.text.strip(), False)
+
+    async def send(self, chunk: bytes):
+        await self.session.send_realtime_input(audio=Blob(data=chunk, mime_type=self.mime_type))
+
+    async def finish(self) -> str:
+        try:
+            await self.session.send_realtime_input(activity_end=ActivityEnd())
+            await asyncio.wait_for(self.reader, GEMINI_STT_FINISH_TIMEOUT)
+            self.emit(self.text.strip(), True)
+        except Exception:
+            # The session may still hold the rest of this turn, the next utterance gets a fresh one
+            await self.stt.close()
+            raise
+        finally:
+            self.close()
+        return self.transcript
+
+
+# Streams PCM straight into a Gemini live session as realtime input and reads back its input transcription.
+# This is a second live connection next to the conversational one, which has automatic activity detection and
+# answers what it hears, so admission counts it through LIVE_CONNECTIONS_PER_SESSION
+class GeminiSpeechToText(SpeechToText):
+    def __init__(self, client: genai.Client):
+        self.client = client
+        self._connection = None
+        self.session = None
+
+    async def _session(self):
+        if self.session is None:
+            config = LiveConnectConfig(
+                response_modalities=[Modality.TEXT],
+                system_instruction=GEMINI_STT_INSTRUCTION,
+                max_output_tokens=1,
+                temperature=0.0,
+                input_audio_transcription=AudioTranscriptionConfig(),
+                realtime_input_config=RealtimeInputConfig(
+                    automatic_activity_detection=AutomaticActivityDetection(disabled=True)
+                ),
+            )
+            self._connection = self.client.aio.live.connect(model=GEMINI_STT_MODEL, config=config)
+            self.session = await self._connection.__aenter__()
+        return self.session
+
+    async def transcribe(self, audio: bytes, sample_rate: int) -> str:
+        stream = await self.open_stream(sample_rate)
+        for offset in range(0, len(audio), GEMINI_STT_CHUNK_BYTES):
+            await stream.send(audio[offset:offset + GEMINI_STT_CHUNK_BYTES])
+        return await stream.finish()
+
+    async def open_stream(self, sample_rate: int) -> TranscriptionStream:
+        try:
+            stream = GeminiTranscriptionStream(self, await self._session(), sample_rate)
+            await stream.start()
+        except Exception:
+            await self.close()
+            raise
+        return stream
+
+    async def close(self):
+        if self._connection is not None:
+            try:
+                await self._connection.__aexit__(None, None, None)
+            except Exception as e:
+                print(f"Error closing Gemini transcription session: {e}")
+            finally:
+                self._connection = None
+                self.session = None
@@ -0,0 +1,27 @@
+import os
+from dotenv import load_dotenv
+from typing import Any
+
+from .base_stt import SpeechToText
+
+load_dotenv()
+
+STT_BACKEND = os.getenv("STT_BACKEND", "deepgram")
+# Gemini live connections one shopper holds: the conversation, plus a second one when Gemini also transcribes
+LIVE_CONNECTIONS_PER_SESSION = 2 if STT_BACKEND.lower() == "gemini" else 1
+
+
+def create_stt(backend: str | None = None, client: Any = None) -> SpeechToText:
+    backend = (backend or STT_BACKEND).lower()
+    match backend:
+        case "deepgram":
+            from .deepgram_stt import DeepgramSpeechToText
+            return DeepgramSpeechToText()
+        case "gemini":
+            # Audio goes straight to Gemini as realtime input, no separate STT provider
+            from .gemini_stt import GeminiSpeechToText
+            return GeminiSpeechToText(client)
+        case "fake":
+            from ..fakes.fake_stt import FakeSpeechToText
+            return FakeSpeechToText()
+    raise ValueError(f"Unknown STT backend: {backend}")
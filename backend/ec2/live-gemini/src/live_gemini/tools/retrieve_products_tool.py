@@ -1,5 +1,17 @@
+import os
+import time
+from dotenv import load_dotenv
 from typing import Dict, Any
+from ..api.local_products_api import retrieve_local_products_api
 from ..api.retrieve_products_api import retrieve_products_api
+from ..utils.product_record import to_product_records
+from ..utils.session_context import SessionContext
+
+load_dotenv()
+
+# "opensearch" or "local", a company config can override it with "retrievalBackend"
+# "replay" serves a recorded session's results from the "replay_retrieval" in the session context
+RETRIEVAL_BACKEND = os.getenv("RETRIEVAL_BACKEND", "opensearch")
 
 class RetrieveProductsTool:
     @staticmethod
@@ -24,7 +36,32 @@ class RetrieveProductsTool:
         }
 
     @staticmethod
-    async def execute(tool_call: Dict[str, Any]) -> Dict[str, Any]:
+    async def execute(tool_call: Dict[str, Any], session_context: SessionContext) -> Dict[str, Any]:
         query = tool_call.get("arguments").get("query")
         k = tool_call.get("arguments").get("k", 4)
-        return await retrieve_products_api(query, k)
+        # Callers that already embedded the query pass the vector along so it is not fetched twice
+        embedding = tool_call.get("embedding")
+        backend = RetrieveProductsTool.backend(session_context)
+        start = time.perf_counter()
+        if backend == "replay":
+            result = await session_context.get("replay_retrieval").retrieve(query, k)
+        elif backend == "local":
+            result = await retrieve_local_products_api(query, k, session_context, embedding)
+        else:
+            result = await retrieve_products_api(query, k, session_context, embedding)
+
+        recorder = session_context.get("recorder")
+        if recorder is not None:
+            recorder.record("retrieval", query=query, k=k, backend=backend, result=result,
+                            seconds=round(time.perf_counter() - start, 6))
+
+        return {
+            "query": query,
+            "products": to_product_records(result.get("results")),
+            "error": result.get("error")
+        }
+
+    @staticmethod
+    def backend(session_context: SessionContext) -> str:
+        company_info = session_context.get("company_info") or {}
+        return company_info.get("retrievalBackend", RETRIEVAL_BACKEND)
@@ -0,0 +1,116 @@
+import asyncio
+import numpy as np
+import os
+import time
+from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+
+from .retrieve_products_tool import RetrieveProductsTool
+from ..api.retrieve_products_api import embed_query
+from ..utils.metrics import company_label
+from ..utils.session_context import SessionContext
+
+load_dotenv()
+
+SPECULATIVE_RETRIEVAL_ENABLED = os.getenv("SPECULATIVE_RETRIEVAL_ENABLED", "false").lower() == "true"
+SPECULATIVE_RETRIEVAL_K = int(os.getenv("SPECULATIVE_RETRIEVAL_K", "4"))
+# Minimum cosine similarity between the transcript and the router's query for the speculative result to be used
+SPECULATION_MIN_SIMILARITY = float(os.getenv("SPECULATION_MIN_SIMILARITY", "0.85"))
+
+
+class SpeculativeRetrieval:
+    _stats = {"started": 0, "hits": 0, "misses": 0, "cancelled": 0, "discarded": 0, "wasted_seconds": 0.0}
+
+    def __init__(self, query: str, session_context: SessionContext, k: int = SPECULATIVE_RETRIEVAL_K):
+        self.query = query
+        self.k = k
+        self.started_at = time.perf_counter()
+        self.finished_at: Optional[float] = None
+        self.used = False
+        # The router's query embedding, kept so a miss does not fetch it a second time
+        self.router_embedding: Optional[np.ndarray] = None
+        self.company_id = company_label(session_context)
+        self.embedding_task = asyncio.create_task(embed_query(query, company_id=self.company_id))
+        self.embedding_task.add_done_callback(self._embedded)
+        self.task = asyncio.create_task(self._retrieve(session_context))
+        self.task.add_done_callback(self._finished)
+        self._stats["started"] += 1
+
+    async def _retrieve(self, session_context: SessionContext) -> Dict[str, Any]:
+        # Searches with the vector the similarity check compares against, so the query is embedded once
+        try:
+            embedding = await self.embedding_task
+        except Exception as e:
+            return {"query": self.query, "products": [], "error": f"Failed to get embedding: {e}"}
+        return await RetrieveProductsTool.execute(
+            {"arguments": {"query": self.query, "k": self.k}, "embedding": embedding},
+            session_context
+        )
+
+    @staticmethod
+    def _embedded(task: asyncio.Task):
+        if not task.cancelled():
+            task.exception()
+
+    def _finished(self, task: asyncio.Task):
+        self.finished_at = time.perf_counter()
+        if not task.cancelled():
+            task.exception()
+
+    async def _similarity(self, query: str) -> float:
+        if query.strip().lower() == self.query.strip().lower():
+            return 1.0
+        speculative_embedding, router_embedding = await asyncio.gather(self.embedding_task,
+                                                                      embed_query(query, company_id=self.company_id))
+        self.router_embedding = router_embedding
+        norms = float(np.linalg.norm(speculative_embedding) * np.linalg.norm(router_embedding))
+        return float(speculative_embedding @ router_embedding) / norms if norms else 0.0
+
+    async def resolve(self, query: str, k: int, session_context: SessionContext) -> Dict[str, Any]:
+        # Only the turn's first search can use the speculation, later ones in the same turn search directly
+        if self.used:
+            return await RetrieveProductsTool.execute({"arguments": {"query": query, "k": k}}, session_context)
+        # An exact text match skips embedding the router's query, so an earlier query's vector must not be reused
+        self.router_embedding = None
+        try:
+            matches = k <= self.k and await self._similarity(query) >= SPECULATION_MIN_SIMILARITY
+        except Exception as e:
+            print(f"Speculative retrieval comparison failed: {e}")
+            matches = False
+
+        if matches:
+            result = await self.task
+            if not result.get("error"):
+                self.used = True
+                self._stats["hits"] += 1
+                return {**result, "products": result["products"][:k]}
+
+        self._stats["misses"] += 1
+        self.discard()
+        return await RetrieveProductsTool.execute(
+            {"arguments": {"query": query, "k": k}, "embedding": self.router_embedding},
+            session_context
+        )
+
+    def discard(self):
+        if self.used:
+            return
+        self.used = True
+        if not self.task.done():
+            self.task.cancel()
+            self._stats["cancelled"] += 1
+            self._stats["wasted_seconds"] += time.perf_counter() - self.started_at
+        else:
+            self._stats["discarded"] += 1
+            self._stats["wasted_seconds"] += self.finished_at - self.started_at
+        if not self.embedding_task.done():
+            self.embedding_task.cancel()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        resolved = cls._stats["hits"] + cls._stats["misses"]
+        return {
+            **cls._stats,
+            "enabled": SPECULATIVE_RETRIEVAL_ENABLED,
+            "hit_rate": cls._stats["hits"] / resolved if resolved else 0.0,
+        }
@@ -0,0 +1,224 @@
+import asyncio
+import itertools
+import os
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager, suppress
+from dotenv import load_dotenv
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from .metrics import ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS, metrics
+from ..stt.stt_factory import LIVE_CONNECTIONS_PER_SESSION
+from .session_registry import SessionRegistry
+
+load_dotenv()
+
+# Sessions one worker holds at once, 0 for no cap. The caps stand in for the Gemini live-connection quota, so a
+# session that also transcribes through Gemini counts twice (LIVE_CONNECTIONS_PER_SESSION)
+MAX_SESSIONS_PER_WORKER = int(os.getenv("MAX_SESSIONS_PER_WORKER", "200"))
+# Sessions one company holds across every worker sharing the state backend, 0 for no cap; a company's
+# "maxSessions" config field overrides it
+MAX_SESSIONS_PER_COMPANY = int(os.getenv("MAX_SESSIONS_PER_COMPANY", "0"))
+# Turns talking to the model at once in one worker, overall and per company, 0 for no cap; further turns wait
+MAX_TURNS_PER_WORKER = int(os.getenv("MAX_TURNS_PER_WORKER", "0"))
+MAX_TURNS_PER_COMPANY = int(os.getenv("MAX_TURNS_PER_COMPANY", "0"))
+# Connections that may wait for a session slot; beyond that they are rejected straight away
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "50"))
+# Seconds a connection waits for a slot before it is rejected
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "10"))
+# Seconds between rechecks while queued, which is how slots freed by other workers are noticed
+ADMISSION_RECHECK_SECONDS = float(os.getenv("ADMISSION_RECHECK_SECONDS", "0.5"))
+# Seconds a rejected client is told to wait before reconnecting
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "5"))
+# Close code for rejected connections, next to the 4001/4002 handshake errors
+ADMISSION_CLOSE_CODE = 4029
+
+REJECTION_REASONS = {
+    "worker": "server at capacity",
+    "company": "company session limit reached",
+}
+# Returned instead of a rejection when the client left while queued, there is nobody to tell
+DISCONNECTED = "disconnected"
+
+
+# Decides whether a new connection gets a session now, waits for one, or is turned away before any upstream
+# connection is opened. Admitted sessions are held in the SessionRegistry, which is what the caps count.
+class Admission:
+    _released: Optional[asyncio.Condition] = None
+    # Queued connections in arrival order: ticket -> (company, why it is still waiting)
+    _waiting: "OrderedDict[int, Tuple[str, str]]" = OrderedDict()
+    _tickets = itertools.count()
+    _turn_slots: Optional[asyncio.Semaphore] = None
+    _company_turn_slots: Dict[str, asyncio.Semaphore] = {}
+    _turns_in_flight = 0
+    _turns_waiting = 0
+    _stats = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "abandoned": 0}
+
+    @classmethod
+    def _condition(cls) -> asyncio.Condition:
+        if cls._released is None:
+            cls._released = asyncio.Condition()
+        return cls._released
+
+    @classmethod
+    async def _blocked(cls, company_id: str, company_limit: int) -> Optional[str]:
+        # The cross-worker lookup comes first so nothing yields between the local check and the registration;
+        # other workers can still admit in the same instant, so the company cap may overshoot by a session or two
+        company_slots = None
+        if company_limit:
+            company_slots = (await SessionRegistry.totals())["companies"].get(company_id, 0)
+        if (MAX_SESSIONS_PER_WORKER
+                and SessionRegistry.local_slots() + LIVE_CONNECTIONS_PER_SESSION > MAX_SESSIONS_PER_WORKER):
+            return "worker"
+        if company_slots is not None and company_slots + LIVE_CONNECTIONS_PER_SESSION > company_limit:
+            return "company"
+        return None
+
+    @classmethod
+    def _first_in_line(cls, company_id: str, ticket: Optional[int] = None) -> bool:
+        # Slots go in arrival order; connections ahead that wait only on another company's cap hold nobody up
+        for other, (other_company, reason) in cls._waiting.items():
+            if other == ticket:
+                return True
+            if reason != "company" or other_company == company_id:
+                return False
+        return True
+
+    @classmethod
+    async def admit(cls, session_id: str, company_id: str, company_config: Dict[str, Any],
+                    wait_closed: Optional[Callable[[], Awaitable[None]]] = None) -> Optional[str]:
+        # Returns None once the session holds a slot, DISCONNECTED if the client left while queued, otherwise
+        # why it was rejected. wait_closed returns when the client disconnects and is only started if it queues
+        company_limit = int(company_config.get("maxSessions") or MAX_SESSIONS_PER_COMPANY)
+        # A newcomer does not take a slot that earlier connections are queued for
+        blocked = "worker"
+        if cls._first_in_line(company_id):
+            blocked = await cls._blocked(company_id, company_limit)
+            if blocked is None:
+                await cls._register(session_id, company_id)
+                return None
+
+        if len(cls._waiting) >= ADMISSION_QUEUE_SIZE:
+            return cls._reject(blocked, "queue_full")
+
+        ticket = next(cls._tickets)
+        cls._waiting[ticket] = (company_id, blocked)
+        cls._stats["queued"] += 1
+        start = time.monotonic()
+        released = cls._condition()
+        closed = asyncio.create_task(wait_closed()) if wait_closed is not None else None
+        try:
+            while True:
+                remaining = ADMISSION_QUEUE_TIMEOUT - (time.monotonic() - start)
+                if remaining <= 0:
+                    cls._stats["timed_out"] += 1
+                    return cls._reject(blocked, "timeout")
+                async with released:
+                    waiter = asyncio.ensure_future(released.wait())
+                    await asyncio.wait({waiter, closed} if closed is not None else {waiter},
+                                       timeout=min(remaining, ADMISSION_RECHECK_SECONDS),
+                                       return_when=asyncio.FIRST_COMPLETED)
+                    if not waiter.done():
+                        waiter.cancel()
+                        with suppress(asyncio.CancelledError):
+                            await waiter
+                if closed is not None and closed.done():
+                    cls._stats["abandoned"] += 1
+                    return DISCONNECTED
+                if not cls._first_in_line(company_id, ticket):
+                    continue
+                blocked = await cls._blocked(company_id, company_limit)
+                if blocked is None:
+                    await cls._register(session_id, company_id)
+                    ADMISSION_WAIT_SECONDS.observe(time.monotonic() - start)
+                    return None
+                cls._waiting[ticket] = (company_id, blocked)
+        finally:
+            del cls._waiting[ticket]
+            if closed is not None:
+                closed.cancel()
+            # Whoever was behind this connection may be first in line now
+            async with released:
+                released.notify_all()
+
+    @classmethod
+    async def release(cls, session_id: str):
+        await SessionRegistry.unregister(session_id)
+        released = cls._condition()
+        async with released:
+            released.notify_all()
+
+    @classmethod
+    def rejection_reason(cls, blocked: str) -> str:
+        return f"Busy: {REJECTION_REASONS[blocked]}, retry after {ADMISSION_RETRY_AFTER}s"
+
+    @classmethod
+    @asynccontextmanager
+    async def turn(cls, company_id: str):
+        # Waiting here holds the turn back rather than failing it; the client hears the answer start later
+        slots = []
+        if MAX_TURNS_PER_WORKER:
+            if cls._turn_slots is None:
+                cls._turn_slots = asyncio.Semaphore(MAX_TURNS_PER_WORKER)
+            slots.append(cls._turn_slots)
+        if MAX_TURNS_PER_COMPANY:
+            company_slots = cls._company_turn_slots.get(company_id)
+            if company_slots is None:
+                company_slots = cls._company_turn_slots[company_id] = asyncio.Semaphore(MAX_TURNS_PER_COMPANY)
+            slots.append(company_slots)
+
+        acquired = []
+        cls._turns_waiting += 1
+        try:
+            # Company first, so a company at its cap does not sit on worker slots other companies could use
+            for slot in reversed(slots):
+                await slot.acquire()
+                acquired.append(slot)
+        except BaseException:
+            for slot in acquired:
+                slot.release()
+            raise
+        finally:
+            cls._turns_waiting -= 1
+
+        cls._turns_in_flight += 1
+        try:
+            yield
+        finally:
+            cls._turns_in_flight -= 1
+            for slot in acquired:
+                slot.release()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            **cls._stats,
+            "active": SessionRegistry.local_sessions(),
+            "slots": SessionRegistry.local_slots(),
+            "live_connections_per_session": LIVE_CONNECTIONS_PER_SESSION,
+            "waiting": len(cls._waiting),
+            "turns_in_flight": cls._turns_in_flight,
+            "turns_waiting": cls._turns_waiting,
+            "max_sessions_per_worker": MAX_SESSIONS_PER_WORKER,
+            "max_sessions_per_company": MAX_SESSIONS_PER_COMPANY,
+            "max_turns_per_worker": MAX_TURNS_PER_WORKER,
+            "max_turns_per_company": MAX_TURNS_PER_COMPANY,
+        }
+
+    @classmethod
+    async def _register(cls, session_id: str, company_id: str):
+        cls._stats["admitted"] += 1
+        await SessionRegistry.register(session_id, company_id, LIVE_CONNECTIONS_PER_SESSION)
+
+    @classmethod
+    def _reject(cls, blocked: str, stage: str) -> str:
+        cls._stats["rejected"] += 1
+        ADMISSION_REJECTED.inc(blocked, stage)
+        return blocked
+
+
+metrics.gauge("voice_admission_active_sessions", "Sessions holding an admission slot in this worker",
+              lambda: SessionRegistry.local_sessions())
+metrics.gauge("voice_admission_queued_sessions", "Connections waiting for a session slot", lambda: len(Admission._waiting))
+metrics.gauge("voice_turns_in_flight", "Turns talking to the model", lambda: Admission._turns_in_flight)
+metrics.gauge("voice_turns_waiting", "Turns waiting for a turn slot", lambda: Admission._turns_waiting)
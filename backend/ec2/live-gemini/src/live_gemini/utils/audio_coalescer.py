@@ -0,0 +1,71 @@
+import os
+import time
+from collections import deque
+from dotenv import load_dotenv
+from typing import Any, Deque, Dict, List, Optional
+
+load_dotenv()
+
+# Target duration of each outbound audio frame, 0 sends every model part as its own frame
+AUDIO_FRAME_MS = int(os.getenv("AUDIO_FRAME_MS", "60"))
+# Seconds of recent frames frames_per_second is averaged over
+AUDIO_STATS_WINDOW_SECONDS = int(os.getenv("AUDIO_STATS_WINDOW_SECONDS", "60"))
+BYTES_PER_SAMPLE = 2
+
+
+class AudioCoalescer:
+    _stats = {"parts": 0, "frames": 0, "bytes": 0, "turn_end_flushes": 0, "interruption_flushes": 0}
+    # [second, frames] buckets covering the stats window
+    _recent: Deque[List[int]] = deque()
+
+    def __init__(self, sample_rate: int, frame_ms: int = AUDIO_FRAME_MS):
+        self.frame_bytes = sample_rate * BYTES_PER_SAMPLE * frame_ms // 1000
+        self._buffer = bytearray()
+
+    def add(self, data: bytes) -> Optional[bytes]:
+        self._stats["parts"] += 1
+        self._buffer += data
+        if len(self._buffer) < self.frame_bytes:
+            return None
+        return self._take()
+
+    def flush(self, interrupted: bool = False) -> Optional[bytes]:
+        if not self._buffer:
+            return None
+        self._stats["interruption_flushes" if interrupted else "turn_end_flushes"] += 1
+        return self._take()
+
+    def _take(self) -> bytes:
+        frame = bytes(self._buffer)
+        self._buffer.clear()
+        second = int(time.monotonic())
+        recent = AudioCoalescer._recent
+        if recent and recent[-1][0] == second:
+            recent[-1][1] += 1
+        else:
+            recent.append([second, 1])
+            AudioCoalescer._trim(second)
+        self._stats["frames"] += 1
+        self._stats["bytes"] += len(frame)
+        return frame
+
+    @classmethod
+    def _trim(cls, second: int):
+        while cls._recent and cls._recent[0][0] <= second - AUDIO_STATS_WINDOW_SECONDS:
+            cls._recent.popleft()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        frames = cls._stats["frames"]
+        now = time.monotonic()
+        cls._trim(int(now))
+        # Averaged over the window, or since the oldest frame in it when that is more recent, so idle history
+        # does not drag the rate down
+        elapsed = min(AUDIO_STATS_WINDOW_SECONDS, now - cls._recent[0][0]) if cls._recent else 0.0
+        return {
+            **cls._stats,
+            "frame_ms": AUDIO_FRAME_MS,
+            "frames_per_second": sum(count for _, count in cls._recent) / elapsed if elapsed else 0.0,
+            "bytes_per_frame": cls._stats["bytes"] / frames if frames else 0.0,
+            "parts_per_frame": cls._stats["parts"] / frames if frames else 0.0,
+        }
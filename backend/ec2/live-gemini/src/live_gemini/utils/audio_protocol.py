@@ -0,0 +1,113 @@
+import base64
+import json
+import struct
+from collections import deque
+from fastapi import WebSocket, WebSocketDisconnect
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from ..enums.frame_types import FrameType
+from ..enums.message_types import MessageType
+from ..stt.base_stt import parse_sample_rate
+
+JSON_PROTOCOL = "json"
+BINARY_PROTOCOL = "binary"
+
+PROTOCOL_VERSION = 1
+OUTPUT_SAMPLE_RATE = 24000
+
+# version, frame type, reserved, sequence, sample rate; raw 16-bit PCM follows the header
+FRAME_HEADER = struct.Struct("!BBHII")
+
+FRAME_STREAMS = {
+    FrameType.AUDIO_CHUNK: "chunk",
+    FrameType.AUDIO_END: "end",
+    FrameType.AUDIO_UTTERANCE: None,
+}
+
+
+def pack_frame(frame_type: FrameType, sequence: int, sample_rate: int, payload: bytes) -> bytes:
+    return FRAME_HEADER.pack(PROTOCOL_VERSION, frame_type, 0, sequence & 0xFFFFFFFF, sample_rate) + payload
+
+
+def unpack_frame(frame: bytes) -> Tuple[FrameType, int, int, bytes]:
+    if len(frame) < FRAME_HEADER.size:
+        raise ValueError("Audio frame is shorter than its header")
+    version, frame_type, _, sequence, sample_rate = FRAME_HEADER.unpack_from(frame)
+    if version != PROTOCOL_VERSION:
+        raise ValueError(f"Unsupported audio frame version {version}")
+    return FrameType(frame_type), sequence, sample_rate, frame[FRAME_HEADER.size:]
+
+
+def negotiate_protocol(initial_data: Dict[str, Any]) -> str:
+    # Clients that never ask keep the original base64-in-JSON protocol
+    return BINARY_PROTOCOL if initial_data.get("protocol") == BINARY_PROTOCOL else JSON_PROTOCOL
+
+
+class AudioSocket:
+    def __init__(self, websocket: WebSocket, protocol: str = JSON_PROTOCOL):
+        self.websocket = websocket
+        self.protocol = protocol
+        self._sequence = 0
+        # Messages read while waiting for admission, handed out before anything new
+        self._held: Deque[Dict[str, Any]] = deque()
+
+    async def wait_closed(self):
+        # Returns once the client disconnects; whatever it sends meanwhile is kept for receive()
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                self._held.append(message)
+                return
+            self._held.append(message)
+
+    async def receive(self) -> Tuple[Dict[str, Any], Optional[bytes]]:
+        message = self._held.popleft() if self._held else await self.websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(message.get("code", 1000))
+
+        # Binary frames describe themselves, so they are accepted whichever protocol was negotiated
+        if message.get("bytes") is not None:
+            frame_type, _, sample_rate, payload = unpack_frame(message["bytes"])
+            if frame_type not in FRAME_STREAMS:
+                raise ValueError(f"Unexpected client frame type {frame_type.name}")
+            request = {
+                "message": "",
+                "mimeType": f"audio/pcm;rate={sample_rate}",
+                "stream": FRAME_STREAMS[frame_type]
+            }
+            return request, payload
+
+        request = json.loads(message["text"])["request"]
+        audio = None
+        if request.get("mimeType", "").startswith("audio/") and request.get("message"):
+            audio = base64.b64decode(request["message"])
+        return request, audio
+
+    async def send(self, response: Dict[str, Any]):
+        if response.get("type") != MessageType.AUDIO.value:
+            await self.websocket.send_json({"response": response})
+            return
+
+        if self.protocol == BINARY_PROTOCOL:
+            sample_rate = parse_sample_rate(response["mimeType"], OUTPUT_SAMPLE_RATE)
+            await self.websocket.send_bytes(pack_frame(FrameType.AUDIO, self._sequence, sample_rate, response["audio"]))
+            self._sequence += 1
+            if response.get("transcript"):
+                await self.websocket.send_json({
+                    "response": {
+                        "type": MessageType.TRANSCRIPT.value,
+                        "message": response["transcript"],
+                        "final": True,
+                        "role": "assistant"
+                    }
+                })
+            return
+
+        await self.websocket.send_json({
+            "response": {
+                "type": MessageType.AUDIO.value,
+                "message": base64.b64encode(response["audio"]).decode('utf-8'),
+                "transcript": response.get("transcript"),
+                "mimeType": response["mimeType"]
+            }
+        })
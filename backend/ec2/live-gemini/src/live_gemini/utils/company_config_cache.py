@@ -0,0 +1,125 @@
+import asyncio
+import os
+import time
+from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+
+from .http_clients import HttpClients
+from .state_store import StateStore
+
+load_dotenv()
+
+COMPANY_CONFIG_URL = os.getenv(
+    "COMPANY_CONFIG_URL", "https://spurhacks-company.s3.us-east-1.amazonaws.com/{company_id}/config.json"
+)
+# Seconds a config is served without revalidation
+COMPANY_CONFIG_TTL = float(os.getenv("COMPANY_CONFIG_TTL", "60"))
+# Seconds past the TTL a config may still be served while it is revalidated in the background
+COMPANY_CONFIG_MAX_STALE = float(os.getenv("COMPANY_CONFIG_MAX_STALE", "3600"))
+
+
+class CompanyConfigEntry:
+    __slots__ = ("config", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, config: Dict[str, Any], etag: Optional[str], last_modified: Optional[str], age: float = 0.0):
+        self.config = config
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic() - age
+
+
+class CompanyConfigCache:
+    _entries: Dict[str, CompanyConfigEntry] = {}
+    _inflight: Dict[str, asyncio.Task] = {}
+    _stats = {"hits": 0, "stale_hits": 0, "misses": 0, "shared_hits": 0, "fetches": 0, "not_modified": 0, "errors": 0}
+
+    @classmethod
+    async def get(cls, company_id: str) -> Dict[str, Any]:
+        entry = cls._entries.get(company_id)
+        if entry is not None:
+            age = time.monotonic() - entry.fetched_at
+            if age < COMPANY_CONFIG_TTL:
+                cls._stats["hits"] += 1
+                return entry.config
+            if age < COMPANY_CONFIG_TTL + COMPANY_CONFIG_MAX_STALE:
+                cls._stats["stale_hits"] += 1
+                cls._refresh(company_id)
+                return entry.config
+
+        cls._stats["misses"] += 1
+        # Shield so a disconnecting client does not cancel a fetch other connections wait on
+        return await asyncio.shield(cls._refresh(company_id))
+
+    @classmethod
+    def invalidate(cls, company_id: Optional[str] = None):
+        if company_id is None:
+            cls._entries.clear()
+        else:
+            cls._entries.pop(company_id, None)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {**cls._stats, "entries": len(cls._entries), "inflight": len(cls._inflight)}
+
+    @classmethod
+    def _refresh(cls, company_id: str) -> asyncio.Task:
+        task = cls._inflight.get(company_id)
+        if task is None:
+            task = asyncio.create_task(cls._load(company_id))
+            cls._inflight[company_id] = task
+            task.add_done_callback(lambda done: cls._finish(company_id, done))
+        return task
+
+    @classmethod
+    def _finish(cls, company_id: str, task: asyncio.Task):
+        cls._inflight.pop(company_id, None)
+        if not task.cancelled() and task.exception() is not None:
+            cls._stats["errors"] += 1
+            print(f"Failed to load company config for {company_id}: {task.exception()}")
+
+    @classmethod
+    async def _load(cls, company_id: str) -> Dict[str, Any]:
+        entry = cls._entries.get(company_id)
+        if entry is None:
+            # Another worker may have fetched it already; a stale copy still saves a body through revalidation
+            shared = await StateStore.get(f"company-config:{company_id}")
+            if shared is not None:
+                entry = CompanyConfigEntry(shared["config"], shared["etag"], shared["last_modified"],
+                                           max(time.time() - shared["fetched_at"], 0.0))
+                cls._entries[company_id] = entry
+                if time.monotonic() - entry.fetched_at < COMPANY_CONFIG_TTL:
+                    cls._stats["shared_hits"] += 1
+                    return entry.config
+
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+
+        cls._stats["fetches"] += 1
+        resp = await HttpClients.get("s3").get(COMPANY_CONFIG_URL.format(company_id=company_id), headers=headers)
+
+        if resp.status_code == 304 and entry is not None:
+            cls._stats["not_modified"] += 1
+            entry.fetched_at = time.monotonic()
+            await cls._share(company_id, entry)
+            return entry.config
+
+        if resp.status_code != 200:
+            raise Exception(f"Status code: {resp.status_code}")
+
+        entry = CompanyConfigEntry(resp.json(), resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+        cls._entries[company_id] = entry
+        await cls._share(company_id, entry)
+        return entry.config
+
+    @classmethod
+    async def _share(cls, company_id: str, entry: CompanyConfigEntry):
+        await StateStore.set(
+            f"company-config:{company_id}",
+            {"config": entry.config, "etag": entry.etag, "last_modified": entry.last_modified,
+             "fetched_at": time.time() - (time.monotonic() - entry.fetched_at)},
+            ttl=COMPANY_CONFIG_TTL + COMPANY_CONFIG_MAX_STALE,
+        )
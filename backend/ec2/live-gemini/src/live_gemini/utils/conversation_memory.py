@@ -0,0 +1,107 @@
+import asyncio
+import os
+from dotenv import load_dotenv
+from typing import Awaitable, Callable, Dict, List, Optional
+
+load_dotenv()
+
+# Token budget for the verbatim window of recent turns
+CONVERSATION_TOKEN_BUDGET = int(os.getenv("CONVERSATION_TOKEN_BUDGET", "600"))
+# Token budget for the rolling summary of turns that left the window
+CONVERSATION_SUMMARY_TOKENS = int(os.getenv("CONVERSATION_SUMMARY_TOKENS", "200"))
+# Number of folded turns between summarizer runs, when a summarizer is configured
+CONVERSATION_SUMMARY_EVERY = int(os.getenv("CONVERSATION_SUMMARY_EVERY", "4"))
+# "extractive" keeps a local clipped digest, "llm" also rewrites the summary with the model in the background
+CONVERSATION_SUMMARIZER = os.getenv("CONVERSATION_SUMMARIZER", "extractive")
+
+ROLE_LABELS = {"user": "User", "assistant": "Assistant"}
+DIGEST_CHARS = 120
+
+Summarizer = Callable[[str, List[Dict[str, str]]], Awaitable[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def format_turn(turn: Dict[str, str]) -> str:
+    return f"{ROLE_LABELS.get(turn['role'], turn['role'])}: {turn['content']}"
+
+
+class ConversationMemory:
+    def __init__(self, token_budget: int = CONVERSATION_TOKEN_BUDGET,
+                 summary_tokens: int = CONVERSATION_SUMMARY_TOKENS,
+                 summary_every: int = CONVERSATION_SUMMARY_EVERY,
+                 summarizer: Optional[Summarizer] = None):
+        self.token_budget = token_budget
+        self.summary_tokens = summary_tokens
+        self.summary_every = summary_every
+        self.summarizer = summarizer
+        self.turns: List[Dict[str, str]] = []
+        self.summary = ""
+        self.total_turns = 0
+        self._window_tokens = 0
+        self._unsummarized: List[Dict[str, str]] = []
+        self._summary_task: Optional[asyncio.Task] = None
+        # Digests folded while the summarizer runs, appended to its result so those turns are not lost
+        self._late_digests: List[str] = []
+
+    def __len__(self):
+        return self.total_turns
+
+    def append(self, role: str, content: str):
+        turn = {"role": role, "content": content.strip()}
+        self.turns.append(turn)
+        self.total_turns += 1
+        self._window_tokens += estimate_tokens(format_turn(turn))
+
+        # Always keep the newest turn verbatim, even if it alone exceeds the budget
+        while self._window_tokens > self.token_budget and len(self.turns) > 1:
+            folded = self.turns.pop(0)
+            self._window_tokens -= estimate_tokens(format_turn(folded))
+            self._fold(folded)
+
+    def _fold(self, turn: Dict[str, str]):
+        content = turn["content"]
+        digest = content if len(content) <= DIGEST_CHARS else content[:DIGEST_CHARS].rsplit(" ", 1)[0] + "..."
+        entry = f"{ROLE_LABELS.get(turn['role'], turn['role'])}: {digest}"
+        self.summary = self._clip(f"{self.summary} {entry}".strip())
+
+        self._unsummarized.append(turn)
+        if self._summary_task is not None and not self._summary_task.done():
+            self._late_digests.append(entry)
+        elif self.summarizer is not None and len(self._unsummarized) >= self.summary_every:
+            turns, self._unsummarized = self._unsummarized, []
+            self._late_digests = []
+            self._summary_task = asyncio.create_task(self._summarize(self.summary, turns))
+
+    async def _summarize(self, summary: str, turns: List[Dict[str, str]]):
+        try:
+            rewritten = (await self.summarizer(summary, turns)).strip()
+            self.summary = self._clip(" ".join([rewritten, *self._late_digests]).strip())
+        except Exception as e:
+            print(f"Conversation summary failed, keeping extractive summary: {e}")
+        finally:
+            self._late_digests = []
+
+    def _clip(self, summary: str) -> str:
+        # Drop the oldest part of the summary once it outgrows its budget
+        max_chars = self.summary_tokens * 4
+        if len(summary) <= max_chars:
+            return summary
+        clipped = summary[-max_chars:]
+        return "..." + clipped[clipped.find(" ") + 1:]
+
+    def render(self) -> str:
+        lines = []
+        if self.summary:
+            lines.append(f"Earlier: {self.summary}")
+        lines.extend(format_turn(turn) for turn in self.turns)
+        return "\n".join(lines) if lines else "(no previous conversation)"
+
+    def __str__(self):
+        return self.render()
+
+    def close(self):
+        if self._summary_task is not None and not self._summary_task.done():
+            self._summary_task.cancel()
@@ -0,0 +1,143 @@
+import asyncio
+import numpy as np
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional, Tuple
+
+load_dotenv()
+
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+EMBEDDING_CACHE_TTL = float(os.getenv("EMBEDDING_CACHE_TTL", "86400"))
+# Directory for the persistent tier, disabled when unset
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR")
+# Seconds new embeddings are batched before they are written to the persistent tier in one transaction
+EMBEDDING_CACHE_FLUSH_SECONDS = float(os.getenv("EMBEDDING_CACHE_FLUSH_SECONDS", "1.0"))
+
+
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+# Kept in each worker rather than in the StateStore: an embedding never changes for the same text, so there is
+# nothing to invalidate, and the persistent tier is where workers on one host share their results
+class EmbeddingCache:
+    def __init__(self, max_entries: int = EMBEDDING_CACHE_SIZE, ttl: float = EMBEDDING_CACHE_TTL,
+                 cache_dir: Optional[str] = EMBEDDING_CACHE_DIR):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: OrderedDict[Tuple[str, str], Tuple[float, np.ndarray]] = OrderedDict()
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+        self._db = None
+        self._pending: List[Tuple[str, str, float, bytes]] = []
+        self._flush: Optional[asyncio.Task] = None
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Disk reads, lock waits and fsyncs stay off the event loop; one thread keeps the connection serialised
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embedding-cache")
+            self._db = sqlite3.connect(os.path.join(cache_dir, "embeddings.sqlite3"), timeout=5.0,
+                                       check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "task_type TEXT NOT NULL, query TEXT NOT NULL, created_at REAL NOT NULL, vector BLOB NOT NULL, "
+                "PRIMARY KEY (task_type, query))"
+            )
+            self._db.commit()
+
+    async def get(self, text: str, task_type: str) -> Optional[np.ndarray]:
+        key = (task_type, normalize_query(text))
+        now = time.time()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            created_at, embedding = entry
+            if now - created_at < self.ttl:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return embedding
+            del self._entries[key]
+            self._stats["expirations"] += 1
+
+        if self._db is not None:
+            row = await asyncio.get_running_loop().run_in_executor(self._executor, self._read, key)
+            if row is not None and now - row[0] < self.ttl:
+                embedding = np.frombuffer(row[1], dtype=np.float32)
+                self._remember(key, row[0], embedding)
+                self._stats["disk_hits"] += 1
+                return embedding
+
+        self._stats["misses"] += 1
+        return None
+
+    def put(self, text: str, task_type: str, embedding) -> np.ndarray:
+        key = (task_type, normalize_query(text))
+        embedding = np.asarray(embedding, dtype=np.float32)
+        embedding.setflags(write=False)
+        created_at = time.time()
+        self._remember(key, created_at, embedding)
+
+        if self._db is not None:
+            self._pending.append((*key, created_at, embedding.tobytes()))
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Scripts without an event loop write straight through
+                self._write(self._take_pending())
+                return embedding
+            if self._flush is None or self._flush.done():
+                self._flush = loop.create_task(self._flush_later())
+        return embedding
+
+    async def _flush_later(self):
+        await asyncio.sleep(EMBEDDING_CACHE_FLUSH_SECONDS)
+        rows = self._take_pending()
+        try:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._write, rows)
+        except Exception as e:
+            print(f"Failed to persist {len(rows)} embeddings: {e}")
+
+    def _take_pending(self) -> List[Tuple[str, str, float, bytes]]:
+        rows, self._pending = self._pending, []
+        return rows
+
+    def _read(self, key: Tuple[str, str]) -> Optional[Tuple[float, bytes]]:
+        return self._db.execute(
+            "SELECT created_at, vector FROM embeddings WHERE task_type = ? AND query = ?", key
+        ).fetchone()
+
+    def _write(self, rows: List[Tuple[str, str, float, bytes]]):
+        self._db.executemany(
+            "INSERT OR REPLACE INTO embeddings (task_type, query, created_at, vector) VALUES (?, ?, ?, ?)", rows
+        )
+        self._db.commit()
+
+    def _remember(self, key: Tuple[str, str], created_at: float, embedding: np.ndarray):
+        self._entries[key] = (created_at, embedding)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def clear(self):
+        self._entries.clear()
+        self._pending.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM embeddings")
+            self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "bytes": sum(embedding.nbytes for _, embedding in self._entries.values()),
+            "persistent": self._db is not None,
+            "pending_writes": len(self._pending),
+        }
+
+
+embedding_cache = EmbeddingCache()
@@ -0,0 +1,128 @@
+import asyncio
+import google.auth.transport.requests
+import json
+import os
+import time
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from google.oauth2 import service_account
+from typing import Any, Dict, Optional, Tuple
+
+load_dotenv()
+
+GOOGLE_SERVICE_ACCOUNT = os.getenv("GOOGLE_SERVICE_ACCOUNT")
+# Seconds before expiry at which the access token is refreshed in the background
+GOOGLE_TOKEN_REFRESH_MARGIN = float(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN", "300"))
+GOOGLE_SCOPES = ['https://www.googleapis.com/auth/cloud-platform']
+
+
+class GoogleCredentialManager:
+    _credentials: Optional[service_account.Credentials] = None
+    _project_id: Optional[str] = None
+    _refresh_task: Optional[asyncio.Task] = None
+    _lock: Optional[asyncio.Lock] = None
+    _stats = {"refreshes": 0, "coalesced": 0, "failures": 0, "last_refresh_seconds": 0.0, "total_refresh_seconds": 0.0}
+
+    @classmethod
+    def load(cls):
+        if cls._credentials is not None:
+            return
+        if not GOOGLE_SERVICE_ACCOUNT:
+            raise Exception("GOOGLE_SERVICE_ACCOUNT is not set")
+
+        try:
+            service_account_info = json.loads(GOOGLE_SERVICE_ACCOUNT)
+        except json.JSONDecodeError as e:
+            raise Exception("Failed to decode GOOGLE_SERVICE_ACCOUNT. Is it a valid JSON string?") from e
+
+        cls._credentials = service_account.Credentials.from_service_account_info(
+            service_account_info,
+            scopes=GOOGLE_SCOPES
+        )
+        cls._project_id = service_account_info.get("project_id")
+
+    @classmethod
+    async def start(cls):
+        try:
+            cls.load()
+            await cls.refresh()
+        except Exception as e:
+            print(f"Error getting access token: {e}")
+        if cls._credentials is not None and cls._refresh_task is None:
+            cls._refresh_task = asyncio.create_task(cls._refresh_loop())
+
+    @classmethod
+    async def stop(cls):
+        if cls._refresh_task is not None:
+            cls._refresh_task.cancel()
+            try:
+                await cls._refresh_task
+            except asyncio.CancelledError:
+                pass
+            cls._refresh_task = None
+
+    @classmethod
+    def seconds_until_expiry(cls) -> float:
+        if cls._credentials is None or not cls._credentials.token or cls._credentials.expiry is None:
+            return 0.0
+        # google-auth stores expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return (cls._credentials.expiry - now).total_seconds()
+
+    @classmethod
+    async def refresh(cls, min_validity: Optional[float] = None):
+        # With min_validity, a caller that queued behind another refresh skips its own once the token is fresh
+        cls.load()
+        if cls._lock is None:
+            cls._lock = asyncio.Lock()
+
+        async with cls._lock:
+            if min_validity is not None and cls.seconds_until_expiry() > min_validity:
+                cls._stats["coalesced"] += 1
+                return
+            start = time.perf_counter()
+            try:
+                # credentials.refresh does blocking network I/O, keep it off the event loop
+                await asyncio.to_thread(cls._credentials.refresh, google.auth.transport.requests.Request())
+            except Exception:
+                cls._stats["failures"] += 1
+                raise
+            finally:
+                elapsed = time.perf_counter() - start
+                cls._stats["last_refresh_seconds"] = elapsed
+                cls._stats["total_refresh_seconds"] += elapsed
+            cls._stats["refreshes"] += 1
+
+    @classmethod
+    async def _refresh_loop(cls):
+        retry_delay = 5.0
+        while True:
+            await asyncio.sleep(max(cls.seconds_until_expiry() - GOOGLE_TOKEN_REFRESH_MARGIN, 1.0))
+            try:
+                await cls.refresh(min_validity=GOOGLE_TOKEN_REFRESH_MARGIN)
+                retry_delay = 5.0
+            except Exception as e:
+                print(f"Background Google token refresh failed: {e}")
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 60.0)
+
+    @classmethod
+    async def get_credentials(cls) -> Tuple[service_account.Credentials, Optional[str]]:
+        cls.load()
+        # Only block when the background loop has not kept the token fresh
+        if cls.seconds_until_expiry() <= 0:
+            await cls.refresh(min_validity=0)
+        return cls._credentials, cls._project_id
+
+    @classmethod
+    async def get_access_token(cls) -> str:
+        credentials, _ = await cls.get_credentials()
+        return credentials.token
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            **cls._stats,
+            "seconds_until_expiry": cls.seconds_until_expiry(),
+            "background_refresh": cls._refresh_task is not None and not cls._refresh_task.done(),
+        }
@@ -0,0 +1,92 @@
+import httpx
+import os
+from dotenv import load_dotenv
+from importlib.util import find_spec
+from typing import Any, Dict
+
+load_dotenv()
+
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "false").lower() == "true"
+
+# Defaults per upstream, each overridable with <NAME>_HTTP_TIMEOUT, <NAME>_HTTP_CONNECT_TIMEOUT,
+# <NAME>_HTTP_MAX_CONNECTIONS and <NAME>_HTTP_MAX_KEEPALIVE (e.g. VERTEX_HTTP_TIMEOUT)
+UPSTREAMS = {
+    "s3": {"timeout": 5.0, "connect_timeout": 2.0, "max_connections": 20, "max_keepalive": 10},
+    "vertex": {"timeout": 10.0, "connect_timeout": 3.0, "max_connections": 50, "max_keepalive": 20},
+    "opensearch": {"timeout": 10.0, "connect_timeout": 3.0, "max_connections": 50, "max_keepalive": 20},
+}
+
+
+def _setting(name: str, key: str, cast):
+    value = os.getenv(f"{name.upper()}_HTTP_{key.upper()}")
+    return cast(value) if value is not None else UPSTREAMS[name][key]
+
+
+def _http2_available() -> bool:
+    if HTTP2_ENABLED and find_spec("h2") is None:
+        print("HTTP2_ENABLED is set but the h2 package is not installed, falling back to HTTP/1.1")
+        return False
+    return HTTP2_ENABLED
+
+
+class HttpClients:
+    _clients: Dict[str, httpx.AsyncClient] = {}
+    _requests: Dict[str, int] = {}
+
+    @classmethod
+    def _create(cls, name: str) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=_setting(name, "max_connections", int),
+            max_keepalive_connections=_setting(name, "max_keepalive", int),
+            keepalive_expiry=30.0,
+        )
+        timeout = httpx.Timeout(_setting(name, "timeout", float), connect=_setting(name, "connect_timeout", float))
+        cls._requests[name] = 0
+
+        async def count_request(request: httpx.Request):
+            cls._requests[name] += 1
+
+        return httpx.AsyncClient(
+            limits=limits,
+            timeout=timeout,
+            http2=_http2_available(),
+            event_hooks={"request": [count_request]},
+        )
+
+    @classmethod
+    def get(cls, name: str) -> httpx.AsyncClient:
+        client = cls._clients.get(name)
+        if client is None or client.is_closed:
+            client = cls._create(name)
+            cls._clients[name] = client
+        return client
+
+    @classmethod
+    def start(cls):
+        for name in UPSTREAMS:
+            cls.get(name)
+
+    @classmethod
+    async def close(cls):
+        for client in cls._clients.values():
+            await client.aclose()
+        cls._clients.clear()
+
+    @classmethod
+    def stats(cls) -> Dict[str, Dict[str, Any]]:
+        stats = {}
+        for name, client in cls._clients.items():
+            pool = getattr(client._transport, "_pool", None)
+            connections = list(getattr(pool, "connections", []))
+            requests = list(getattr(pool, "_requests", []))
+            idle = sum(1 for connection in connections if connection.is_idle())
+            stats[name] = {
+                "requests": cls._requests.get(name, 0),
+                "connections": len(connections),
+                "active_connections": len(connections) - idle,
+                "idle_connections": idle,
+                "queued_requests": sum(1 for request in requests if request.is_queued()),
+                "max_connections": _setting(name, "max_connections", int),
+                "http2": getattr(pool, "_http2", False),
+            }
+        return stats
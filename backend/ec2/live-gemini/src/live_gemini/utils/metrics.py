@@ -0,0 +1,242 @@
+import os
+import time
+from bisect import bisect_left
+from dotenv import load_dotenv
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+load_dotenv()
+
+# The registry lives in the worker process. With several uvicorn workers each keeps its own values and /metrics
+# answers from whichever worker took the request, so scrape every worker on its own (voice_worker_info tells
+# them apart) and sum in Prometheus rather than behind the load balancer
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Seconds, spanning a cached lookup up to a slow model turn
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+GaugeValue = Union[float, Dict[LabelValues, float]]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def company_label(session_context) -> str:
+    return session_context.get("company_id") or "unknown"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1.0):
+        if METRICS_ENABLED:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def samples(self) -> Iterator[str]:
+        for label_values, value in self._values.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        # Per label set: bucket counts (the last one is +Inf), then sum
+        self._series: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *label_values: str):
+        if not METRICS_ENABLED:
+            return
+        series = self._series.get(label_values)
+        if series is None:
+            series = ([0] * (len(self.buckets) + 1), [0.0])
+            self._series[label_values] = series
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1][0] += value
+
+    def time(self, *label_values: str) -> "_Timer":
+        return _Timer(self, label_values)
+
+    def samples(self) -> Iterator[str]:
+        for label_values, (counts, total) in self._series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(total[0])}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+# A plain class rather than @contextmanager, which costs several times more per use
+class _Timer:
+    __slots__ = ("histogram", "label_values", "start")
+
+    def __init__(self, histogram: Histogram, label_values: LabelValues):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start, *self.label_values)
+
+
+class Gauge:
+    kind = "gauge"
+
+    # Gauges are read from the owning component when scraped, so nothing is updated on the hot path
+    def __init__(self, name: str, description: str, read: Callable[[], GaugeValue], labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        value = self.read()
+        if not isinstance(value, dict):
+            value = {(): value}
+        for label_values, sample in value.items():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(sample)}"
+
+
+# Exports the numeric fields of a component's stats() dict, the same numbers as its /stats endpoint. Fields keep
+# their counter or gauge meaning from the dict, so they are exported untyped. A nested dict becomes a "key" label:
+# {"ready": {"acme": 2}} as <name>_ready{key="acme"}, and per-entity stats such as the per-client HTTP stats,
+# {"vertex": {"requests": 3}}, as <name>_requests{key="vertex"}
+class StatsCollector:
+    kind = None
+
+    def __init__(self, name: str, description: str, read: Callable[[], Dict[str, Any]]):
+        self.name = name
+        self.description = description
+        self.read = read
+
+    def samples(self) -> Iterator[str]:
+        stats = self.read()
+        families: Dict[str, List[str]] = {}
+
+        def add(field: str, key: Union[str, None], value: Any):
+            if _numeric(value):
+                labels = _format_labels(("key",), (key,)) if key is not None else ""
+                families.setdefault(field, []).append(f"{self.name}_{field}{labels} {_format_value(float(value))}")
+
+        if stats and all(isinstance(value, dict) for value in stats.values()):
+            for key, fields in stats.items():
+                for field, value in fields.items():
+                    add(field, key, value)
+        else:
+            for field, value in stats.items():
+                if isinstance(value, dict):
+                    for key, nested in value.items():
+                        add(field, key, nested)
+                else:
+                    add(field, None, value)
+
+        for field, samples in families.items():
+            yield f"# HELP {self.name}_{field} {self.description}: {field}"
+            yield f"# TYPE {self.name}_{field} untyped"
+            yield from samples
+
+
+def _numeric(value: Any) -> bool:
+    return isinstance(value, (int, float)) and value == value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, Union[Counter, Histogram, Gauge, StatsCollector]] = {}
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, description, labels))
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, description, labels, buckets))
+
+    def gauge(self, name: str, description: str, read: Callable[[], GaugeValue], labels: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, description, read, labels))
+
+    def stats(self, name: str, description: str, read: Callable[[], Dict[str, Any]]) -> StatsCollector:
+        return self._register(StatsCollector(name, description, read))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            if metric.kind is not None:
+                lines.append(f"# HELP {metric.name} {metric.description}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                print(f"Failed to collect metric {metric.name}: {e}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+STT_SECONDS = metrics.histogram(
+    "voice_stt_seconds", "Time from the end of an utterance to its transcript", ("company",))
+ROUTING_SECONDS = metrics.histogram(
+    "voice_routing_seconds", "Time spent choosing the agent for a turn", ("company", "agent"))
+TOOL_SECONDS = metrics.histogram(
+    "voice_tool_seconds", "Tool execution time", ("company", "tool"))
+EMBEDDING_SECONDS = metrics.histogram(
+    "voice_embedding_seconds", "Query embedding time", ("company", "cache"))
+KNN_SECONDS = metrics.histogram(
+    "voice_knn_seconds", "Product kNN search time", ("company", "backend"))
+FIRST_AUDIO_SECONDS = metrics.histogram(
+    "voice_first_audio_seconds", "Time from the transcript to the first audio frame of the answer", ("company", "agent"))
+TURN_SECONDS = metrics.histogram(
+    "voice_turn_seconds", "Time from the transcript to the end of the answer", ("company", "agent", "outcome"))
+SEND_SECONDS = metrics.histogram(
+    "voice_send_seconds", "Time to write one message to the WebSocket", ("company",))
+TURNS = metrics.counter(
+    "voice_turns_total", "Turns by outcome", ("company", "agent", "outcome"))
+FRAMES_SENT = metrics.counter(
+    "voice_audio_frames_sent_total", "Audio frames sent to clients", ("company",))
+AUDIO_BYTES_SENT = metrics.counter(
+    "voice_audio_bytes_sent_total", "Audio payload bytes sent to clients", ("company",))
+ADMISSION_REJECTED = metrics.counter(
+    "voice_admission_rejected_total", "Connections turned away, by the cap that was full and whether they queued",
+    ("limit", "stage"))
+ADMISSION_WAIT_SECONDS = metrics.histogram(
+    "voice_admission_wait_seconds", "Time queued connections waited for a session slot")
+SEND_BACKPRESSURE = metrics.counter(
+    "voice_send_backpressure_total", "Answer messages that waited for room in a full send queue", ("company",))
+SLOW_CLIENTS = metrics.counter(
+    "voice_slow_clients_total", "Sessions closed because the client stopped reading", ("company",))
@@ -0,0 +1,176 @@
+import json
+import numpy as np
+import os
+import re
+import time
+from dotenv import load_dotenv
+from typing import Any, Dict, Iterable, List, Optional
+
+load_dotenv()
+
+# Directory holding one snapshot per company: <dir>/<company_id>/{meta.json,embeddings.f32,products.jsonl}
+PRODUCT_INDEX_DIR = os.getenv("PRODUCT_INDEX_DIR", "product_index")
+# Catalogs at least this large get an IVF index instead of brute force
+PRODUCT_INDEX_ANN_THRESHOLD = int(os.getenv("PRODUCT_INDEX_ANN_THRESHOLD", "50000"))
+PRODUCT_INDEX_ANN_PROBES = int(os.getenv("PRODUCT_INDEX_ANN_PROBES", "16"))
+# Seconds between checks for a newer snapshot on disk
+PRODUCT_INDEX_REFRESH_INTERVAL = float(os.getenv("PRODUCT_INDEX_REFRESH_INTERVAL", "30"))
+
+# Fields indexed by the searchFn lambda, minus the embedding itself
+PRODUCT_FIELDS = [
+    'sku', 'companyId', 'name', 'description', 'category', 'brand', 'images',
+    'price', 'currency', 'createdAt', 'updatedAt', 'inStock', 'reviews', 'location'
+]
+
+# Company ids become directory names, so anything that could climb out of PRODUCT_INDEX_DIR is refused
+COMPANY_ID_PATTERN = re.compile(r"[A-Za-z0-9][A-Za-z0-9_.-]{0,127}")
+
+
+def write_snapshot(directory: str, products: Iterable[Dict[str, Any]]):
+    os.makedirs(directory, exist_ok=True)
+    vectors = []
+    with open(os.path.join(directory, "products.jsonl.tmp"), "w") as metadata_file:
+        for product in products:
+            vectors.append(np.asarray(product["embedding"], dtype=np.float32))
+            metadata = {field: product[field] for field in PRODUCT_FIELDS if field in product}
+            metadata_file.write(json.dumps(metadata) + "\n")
+
+    matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+    matrix.tofile(os.path.join(directory, "embeddings.f32.tmp"))
+    meta = {"count": matrix.shape[0], "dimensions": matrix.shape[1], "version": time.time()}
+    with open(os.path.join(directory, "meta.json.tmp"), "w") as meta_file:
+        json.dump(meta, meta_file)
+
+    # meta.json is replaced last, readers key reloads off it
+    os.replace(os.path.join(directory, "products.jsonl.tmp"), os.path.join(directory, "products.jsonl"))
+    os.replace(os.path.join(directory, "embeddings.f32.tmp"), os.path.join(directory, "embeddings.f32"))
+    os.replace(os.path.join(directory, "meta.json.tmp"), os.path.join(directory, "meta.json"))
+
+
+class IvfIndex:
+    def __init__(self, unit_vectors: np.ndarray, probes: int, iterations: int = 10, seed: int = 0):
+        rng = np.random.default_rng(seed)
+        clusters = max(1, int(np.sqrt(len(unit_vectors))))
+        sample = unit_vectors[rng.choice(len(unit_vectors), size=min(len(unit_vectors), clusters * 40), replace=False)]
+        centroids = sample[rng.choice(len(sample), size=clusters, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignments = np.argmax(sample @ centroids.T, axis=1)
+            for cluster in range(clusters):
+                members = sample[assignments == cluster]
+                if len(members):
+                    centroid = members.mean(axis=0)
+                    centroids[cluster] = centroid / (np.linalg.norm(centroid) or 1.0)
+
+        assignments = np.empty(len(unit_vectors), dtype=np.int32)
+        for start in range(0, len(unit_vectors), 65536):
+            assignments[start:start + 65536] = np.argmax(unit_vectors[start:start + 65536] @ centroids.T, axis=1)
+
+        self.centroids = centroids
+        self.probes = min(probes, clusters)
+        order = np.argsort(assignments, kind="stable")
+        bounds = np.searchsorted(assignments[order], np.arange(clusters + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(clusters)]
+
+    def candidates(self, unit_query: np.ndarray) -> np.ndarray:
+        closest = np.argpartition(-(self.centroids @ unit_query), self.probes - 1)[:self.probes]
+        return np.concatenate([self.lists[cluster] for cluster in closest])
+
+
+class ProductIndex:
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json")) as meta_file:
+            meta = json.load(meta_file)
+        self.directory = directory
+        self.version = meta["version"]
+        count, dimensions = meta["count"], meta["dimensions"]
+
+        self.embeddings = np.memmap(
+            os.path.join(directory, "embeddings.f32"), dtype=np.float32, mode="r", shape=(count, dimensions)
+        )
+        with open(os.path.join(directory, "products.jsonl")) as metadata_file:
+            self.products: List[Dict[str, Any]] = [json.loads(line) for line in metadata_file]
+
+        norms = np.linalg.norm(self.embeddings, axis=1)
+        norms[norms == 0] = 1.0
+        self.inverse_norms = (1.0 / norms).astype(np.float32)
+
+        self.ann = None
+        if count >= PRODUCT_INDEX_ANN_THRESHOLD:
+            self.ann = IvfIndex(self.embeddings * self.inverse_norms[:, None], PRODUCT_INDEX_ANN_PROBES)
+
+    def __len__(self):
+        return len(self.products)
+
+    def search(self, query, k: int) -> List[Dict[str, Any]]:
+        if not len(self):
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+
+        if self.ann is not None:
+            rows = self.ann.candidates(query)
+            scores = (self.embeddings[rows] @ query) * self.inverse_norms[rows]
+        else:
+            rows = None
+            scores = (self.embeddings @ query) * self.inverse_norms
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        if rows is not None:
+            indices = rows[top]
+        else:
+            indices = top
+
+        return [
+            {
+                "_id": self.products[index].get("sku"),
+                "_score": float(score),
+                "_source": self.products[index],
+            }
+            for index, score in zip(indices.tolist(), scores[top].tolist())
+        ]
+
+
+class ProductIndexRegistry:
+    _indexes: Dict[str, ProductIndex] = {}
+    _checked_at: Dict[str, float] = {}
+
+    @classmethod
+    def snapshot_directory(cls, company_id: str) -> str:
+        if not COMPANY_ID_PATTERN.fullmatch(company_id) or ".." in company_id:
+            raise ValueError(f"Invalid company id for a product index: {company_id!r}")
+        return os.path.join(PRODUCT_INDEX_DIR, company_id)
+
+    @classmethod
+    def get(cls, company_id: str) -> Optional[ProductIndex]:
+        index = cls._indexes.get(company_id)
+        now = time.monotonic()
+        if index is None or now - cls._checked_at.get(company_id, 0.0) >= PRODUCT_INDEX_REFRESH_INTERVAL:
+            cls._checked_at[company_id] = now
+            index = cls.refresh(company_id)
+        return index
+
+    @classmethod
+    def refresh(cls, company_id: str) -> Optional[ProductIndex]:
+        current = cls._indexes.get(company_id)
+        try:
+            directory = cls.snapshot_directory(company_id)
+            with open(os.path.join(directory, "meta.json")) as meta_file:
+                version = json.load(meta_file)["version"]
+            if current is None or current.version != version:
+                cls._indexes[company_id] = ProductIndex(directory)
+                print(f"Loaded product index for {company_id} ({len(cls._indexes[company_id])} products)")
+        except FileNotFoundError:
+            print(f"No product index snapshot for {company_id} in {PRODUCT_INDEX_DIR}")
+        except Exception as e:
+            print(f"Failed to load product index for {company_id}: {e}")
+        return cls._indexes.get(company_id)
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {
+            company_id: {"products": len(index), "version": index.version, "ann": index.ann is not None}
+            for company_id, index in cls._indexes.items()
+        }
@@ -0,0 +1,99 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+# Fields fetched from OpenSearch for prompting, everything else stays on the server
+PRODUCT_SOURCE_FIELDS = [
+    'sku', 'name', 'description', 'category', 'brand', 'price', 'currency', 'inStock', 'reviews', 'location'
+]
+
+
+class ProductRecord:
+    __slots__ = ("sku", "name", "brand", "category", "price", "currency", "in_stock", "rating", "location",
+                 "description")
+
+    def __init__(self, sku: str, name: str, brand: Optional[str] = None, category: Optional[str] = None,
+                 price: Optional[float] = None, currency: Optional[str] = None, in_stock: Optional[bool] = None,
+                 rating: Optional[float] = None, location: Optional[Dict[str, Any]] = None,
+                 description: Optional[str] = None):
+        self.sku = sku
+        self.name = name
+        self.brand = brand
+        self.category = category
+        self.price = price
+        self.currency = currency
+        self.in_stock = in_stock
+        self.rating = rating
+        self.location = location or {}
+        self.description = description
+
+    @classmethod
+    def from_hit(cls, hit: Dict[str, Any]) -> "ProductRecord":
+        source = hit.get("_source", hit)
+        ratings = [review.get("rating") for review in source.get("reviews") or [] if isinstance(review, dict)]
+        ratings = [rating for rating in ratings if isinstance(rating, (int, float))]
+        return cls(
+            sku=source.get("sku", hit.get("_id")),
+            name=source.get("name", "Unknown"),
+            brand=source.get("brand"),
+            category=source.get("category"),
+            price=source.get("price"),
+            currency=source.get("currency"),
+            in_stock=source.get("inStock"),
+            rating=round(sum(ratings) / len(ratings), 1) if ratings else None,
+            location=source.get("location"),
+            description=source.get("description"),
+        )
+
+    def price_str(self) -> str:
+        if self.price is None:
+            return "price unknown"
+        return f"{self.price} {self.currency or ''}".strip()
+
+    def stock_str(self) -> str:
+        if self.in_stock is None:
+            return "stock unknown"
+        return "in stock" if self.in_stock else "out of stock"
+
+    def location_str(self) -> str:
+        return (
+            f"aisle {self.location.get('aisle', 'Unknown')}, "
+            f"section {self.location.get('section', 'Unknown')}, "
+            f"shelf {self.location.get('shelf', 'Unknown')}"
+        )
+
+    def render_info(self) -> str:
+        parts = [f"{self.name} (sku {self.sku})", self.price_str(), self.stock_str()]
+        if self.brand:
+            parts.append(f"brand {self.brand}")
+        if self.rating is not None:
+            parts.append(f"rated {self.rating}/5")
+        parts.append(self.location_str())
+        if self.description:
+            parts.append(self.description)
+        return " | ".join(parts)
+
+    def render_comparison(self, description_chars: int = 160) -> str:
+        parts = [self.name, self.price_str(), self.stock_str()]
+        if self.brand:
+            parts.append(f"brand {self.brand}")
+        if self.category:
+            parts.append(self.category)
+        if self.rating is not None:
+            parts.append(f"rated {self.rating}/5")
+        if self.description:
+            parts.append(self.description[:description_chars])
+        return " | ".join(parts)
+
+    def render_summary(self) -> str:
+        return f"{self.name} | {self.price_str()} | {self.stock_str()}"
+
+    def render_location(self) -> str:
+        return f"{self.name}: {self.location_str()}"
+
+
+def to_product_records(results: Optional[Iterable[Dict[str, Any]]]) -> List[ProductRecord]:
+    return [ProductRecord.from_hit(hit) for hit in results or []]
+
+
+def render_products(products: Iterable[ProductRecord], style: str = "info") -> str:
+    lines = [getattr(product, f"render_{style}")() for product in products]
+    return "\n".join(f"- {line}" for line in lines) if lines else "No matching products found."
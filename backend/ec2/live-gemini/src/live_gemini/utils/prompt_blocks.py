@@ -0,0 +1,27 @@
+import os
+from dotenv import load_dotenv
+from typing import Callable, Set
+
+load_dotenv()
+
+# "full" resends history and agent descriptions in every prompt, "delta" relies on the live session's own context
+PROMPT_MODE = os.getenv("PROMPT_MODE", "full")
+
+SESSION_HISTORY_NOTE = "(Earlier turns of this conversation are already part of this session.)"
+SESSION_AGENTS_NOTE = "(The same agents described earlier in this session.)"
+
+
+class PromptBlocks:
+    def __init__(self, mode: str = PROMPT_MODE):
+        self.mode = mode
+        self._sent: Set[str] = set()
+
+    def reset(self):
+        # A new live session starts without context, so everything is replayed once
+        self._sent.clear()
+
+    def render(self, key: str, render: Callable[[], str], note: str) -> str:
+        if self.mode == "delta" and key in self._sent:
+            return note
+        self._sent.add(key)
+        return render()
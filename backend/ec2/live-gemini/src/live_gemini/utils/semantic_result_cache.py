@@ -0,0 +1,139 @@
+import asyncio
+import numpy as np
+import os
+import time
+from dotenv import load_dotenv
+from typing import Any, Dict, List, Optional
+
+from .state_store import StateStore
+
+load_dotenv()
+
+# Maximum cosine distance between query vectors for a cached result to be reused
+SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.05"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "256"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "300"))
+# Seconds between checks for invalidations published by other workers
+SEMANTIC_CACHE_SYNC_SECONDS = float(os.getenv("SEMANTIC_CACHE_SYNC_SECONDS", "2"))
+
+INVALIDATION_PREFIX = "semantic_cache_invalidated:"
+
+
+class CompanyResultCache:
+    def __init__(self, dimensions: int, capacity: int):
+        self.vectors = np.zeros((capacity, dimensions), dtype=np.float32)
+        self.ks = np.full(capacity, -1, dtype=np.int32)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.last_used = np.zeros(capacity, dtype=np.float64)
+        self.results: List[Optional[Any]] = [None] * capacity
+        self.size = 0
+
+    def lookup(self, vector: np.ndarray, k: int, max_distance: float, ttl: float) -> Optional[Any]:
+        if self.size == 0:
+            return None
+        now = time.monotonic()
+        candidates = (self.ks[:self.size] == k) & (now - self.created_at[:self.size] < ttl)
+        if not candidates.any():
+            return None
+
+        distances = 1.0 - self.vectors[:self.size] @ vector
+        distances[~candidates] = np.inf
+        best = int(np.argmin(distances))
+        if distances[best] > max_distance:
+            return None
+
+        self.last_used[best] = now
+        return self.results[best]
+
+    def store(self, vector: np.ndarray, k: int, results: Any):
+        if self.size < len(self.ks):
+            slot = self.size
+            self.size += 1
+        else:
+            slot = int(np.argmin(self.last_used))
+        now = time.monotonic()
+        self.vectors[slot] = vector
+        self.ks[slot] = k
+        self.created_at[slot] = now
+        self.last_used[slot] = now
+        self.results[slot] = results
+
+
+class SemanticResultCache:
+    def __init__(self, max_distance: float = SEMANTIC_CACHE_MAX_DISTANCE, capacity: int = SEMANTIC_CACHE_SIZE,
+                 ttl: float = SEMANTIC_CACHE_TTL):
+        self.max_distance = max_distance
+        self.capacity = capacity
+        self.ttl = ttl
+        self._companies: Dict[str, CompanyResultCache] = {}
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "invalidations": 0}
+        self._seen_invalidations: Dict[str, float] = {}
+        self._sync: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _unit(vector) -> Optional[np.ndarray]:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else None
+
+    def get(self, company_id: str, vector, k: int) -> Optional[Any]:
+        cache = self._companies.get(company_id)
+        unit = self._unit(vector)
+        results = None
+        if cache is not None and unit is not None and unit.shape[0] == cache.vectors.shape[1]:
+            results = cache.lookup(unit, k, self.max_distance, self.ttl)
+        self._stats["hits" if results is not None else "misses"] += 1
+        return results
+
+    def put(self, company_id: str, vector, k: int, results: Any):
+        unit = self._unit(vector)
+        if unit is None:
+            return
+        cache = self._companies.get(company_id)
+        if cache is None or cache.vectors.shape[1] != unit.shape[0]:
+            cache = CompanyResultCache(unit.shape[0], self.capacity)
+            self._companies[company_id] = cache
+        cache.store(unit, k, results)
+        self._stats["stores"] += 1
+
+    def invalidate(self, company_id: Optional[str] = None):
+        if company_id is None:
+            self._companies.clear()
+        else:
+            self._companies.pop(company_id, None)
+        self._stats["invalidations"] += 1
+
+    async def invalidate_everywhere(self, company_id: str):
+        # Results are cached per worker, so the invalidation is published for the other workers to pick up
+        self.invalidate(company_id)
+        invalidated_at = time.time()
+        self._seen_invalidations[company_id] = invalidated_at
+        await StateStore.set(f"{INVALIDATION_PREFIX}{company_id}", invalidated_at, ttl=self.ttl)
+
+    def start(self):
+        if StateStore.backend_name() != "memory" and self._sync is None:
+            self._sync = asyncio.create_task(self._sync_invalidations())
+
+    async def stop(self):
+        if self._sync is not None:
+            self._sync.cancel()
+            self._sync = None
+
+    async def _sync_invalidations(self):
+        while True:
+            await asyncio.sleep(SEMANTIC_CACHE_SYNC_SECONDS)
+            for key, invalidated_at in (await StateStore.scan(INVALIDATION_PREFIX)).items():
+                company_id = key[len(INVALIDATION_PREFIX):]
+                if invalidated_at > self._seen_invalidations.get(company_id, 0.0):
+                    self._seen_invalidations[company_id] = invalidated_at
+                    self.invalidate(company_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "companies": len(self._companies),
+            "entries": sum(cache.size for cache in self._companies.values()),
+        }
+
+
+semantic_result_cache = SemanticResultCache()
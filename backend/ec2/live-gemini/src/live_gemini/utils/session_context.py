@@ -0,0 +1,23 @@
+import uuid
+
+from .conversation_memory import ConversationMemory
+
+
+class SessionContext:
+    def __init__(self, session_id: str | None = None):
+        self.session_id = session_id or uuid.uuid4().hex
+        self._store = {}
+        self.clear()
+
+    def set(self, key, value):
+        self._store[key] = value
+
+    def get(self, key, default=None):
+        return self._store.get(key, default)
+
+    def clear(self):
+        conversation_history = self._store.get("conversation_history")
+        if conversation_history is not None:
+            conversation_history.close()
+        self._store.clear()
+        self.set("conversation_history", ConversationMemory())
@@ -0,0 +1,151 @@
+import asyncio
+import base64
+import json
+import os
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from enum import Enum
+from typing import Any, Dict, List, Optional
+
+load_dotenv()
+
+# Directory recordings are written to, recording is disabled when unset
+SESSION_RECORDING_DIR = os.getenv("SESSION_RECORDING_DIR")
+# Record every session rather than only those of companies with "recordSessions" in their config
+SESSION_RECORDING_ALL = os.getenv("SESSION_RECORDING_ALL", "false").lower() == "true"
+# Buffered bytes that trigger a write on the recorder thread
+SESSION_RECORDING_FLUSH_BYTES = int(os.getenv("SESSION_RECORDING_FLUSH_BYTES", "65536"))
+
+# Binary payloads live in a sidecar <name>.bin next to the JSON lines, referenced by offset and length
+BINARY_KEY = "$bin"
+# Older recordings inlined them as base64
+BYTES_KEY = "$b64"
+
+# One thread writes every recording, in submission order, so the event loop never waits on the disk
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="session-recorder")
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Cannot record {type(value).__name__}")
+
+
+def binary_path(path: str) -> str:
+    return os.path.splitext(path)[0] + ".bin"
+
+
+# Appends one timestamped JSON line per event, t is seconds since the session started
+class SessionRecorder:
+    _stats = {"sessions": 0, "events": 0, "bytes": 0, "binary_bytes": 0, "write_errors": 0}
+
+    def __init__(self, path: str):
+        self.path = path
+        self.started_at = time.monotonic()
+        self._lines: List[str] = []
+        self._binary = bytearray()
+        self._buffered = 0
+        self._binary_offset = 0
+        self._files = None
+        self._closed = False
+        _writer.submit(self._open)
+        self._stats["sessions"] += 1
+
+    def _encode(self, value: Any) -> Any:
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            offset = self._binary_offset
+            self._binary += value
+            self._binary_offset += len(value)
+            self._stats["binary_bytes"] += len(value)
+            return {BINARY_KEY: [offset, len(value)]}
+        return _encode(value)
+
+    def record(self, kind: str, **fields: Any):
+        if self._closed:
+            return
+        event = {"t": round(time.monotonic() - self.started_at, 6), "kind": kind, **fields}
+        binary_before = len(self._binary)
+        line = json.dumps(event, separators=(",", ":"), default=self._encode) + "\n"
+        self._lines.append(line)
+        self._buffered += len(line) + len(self._binary) - binary_before
+        self._stats["events"] += 1
+        self._stats["bytes"] += len(line)
+        if self._buffered >= SESSION_RECORDING_FLUSH_BYTES:
+            self._flush()
+
+    def _flush(self):
+        if not self._lines and not self._binary:
+            return
+        lines, binary = self._lines, bytes(self._binary)
+        self._lines, self._binary, self._buffered = [], bytearray(), 0
+        _writer.submit(self._write, lines, binary)
+
+    async def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._flush()
+        await asyncio.wrap_future(_writer.submit(self._close_files))
+
+    # The methods below run on the writer thread
+    def _open(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._files = (open(self.path, "w", encoding="utf-8"), open(binary_path(self.path), "wb"))
+        except Exception as e:
+            self._stats["write_errors"] += 1
+            print(f"Failed to open recording {self.path}: {e}")
+
+    def _write(self, lines: List[str], binary: bytes):
+        if self._files is None:
+            return
+        try:
+            # Audio first, so every offset a written line refers to is already on disk
+            self._files[1].write(binary)
+            self._files[0].writelines(lines)
+        except Exception as e:
+            self._stats["write_errors"] += 1
+            print(f"Failed to write recording {self.path}: {e}")
+
+    def _close_files(self):
+        if self._files is not None:
+            for file in self._files:
+                file.close()
+            self._files = None
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {**cls._stats, "directory": SESSION_RECORDING_DIR, "record_all": SESSION_RECORDING_ALL}
+
+
+def create_recorder(session_id: str, company_info: Optional[Dict[str, Any]]) -> Optional[SessionRecorder]:
+    # Recording is decided by the server and the company config only, never by the client
+    if not SESSION_RECORDING_DIR:
+        return None
+    if not (SESSION_RECORDING_ALL or (company_info or {}).get("recordSessions")):
+        return None
+    return SessionRecorder(os.path.join(SESSION_RECORDING_DIR, f"{session_id}.jsonl"))
+
+
+def load_recording(path: str) -> List[Dict[str, Any]]:
+    binary = b""
+    if os.path.exists(binary_path(path)):
+        with open(binary_path(path), "rb") as binary_file:
+            binary = binary_file.read()
+
+    def decode(value: Dict[str, Any]) -> Any:
+        if len(value) == 1 and BINARY_KEY in value:
+            offset, length = value[BINARY_KEY]
+            return binary[offset:offset + length]
+        if len(value) == 1 and BYTES_KEY in value:
+            return base64.b64decode(value[BYTES_KEY])
+        return value
+
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line, object_hook=decode) for line in file if line.strip()]
@@ -0,0 +1,128 @@
+import asyncio
+import os
+import socket
+import time
+from dotenv import load_dotenv
+from typing import Any, Dict, Optional
+
+from .metrics import metrics
+from .state_store import StateStore
+
+load_dotenv()
+
+# Seconds between worker heartbeats; a worker that misses three is dropped from the totals
+WORKER_HEARTBEAT_SECONDS = float(os.getenv("WORKER_HEARTBEAT_SECONDS", "2"))
+# Upper bound on how long session metadata outlives a worker that died without cleaning up
+SESSION_STATE_TTL = float(os.getenv("SESSION_STATE_TTL", "21600"))
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+# Publishes the sessions this worker holds to the StateStore, so any worker can see per-company totals across
+# every worker sharing the backend. Company totals count slots, the Gemini live connections a session holds
+class SessionRegistry:
+    _sessions: Dict[str, str] = {}
+    _slots: Dict[str, int] = {}
+    _companies: Dict[str, int] = {}
+    _heartbeat: Optional[asyncio.Task] = None
+    _started_at = 0.0
+    _stats = {"registered": 0, "unregistered": 0, "heartbeats": 0}
+
+    @classmethod
+    async def start(cls):
+        cls._started_at = time.time()
+        await cls._publish()
+        if cls._heartbeat is None:
+            cls._heartbeat = asyncio.create_task(cls._beat())
+
+    @classmethod
+    async def stop(cls):
+        if cls._heartbeat is not None:
+            cls._heartbeat.cancel()
+            cls._heartbeat = None
+        for session_id in list(cls._sessions):
+            await cls.unregister(session_id)
+        await StateStore.delete(f"worker:{WORKER_ID}")
+
+    @classmethod
+    async def register(cls, session_id: str, company_id: str, slots: int = 1):
+        cls._sessions[session_id] = company_id
+        cls._slots[session_id] = slots
+        cls._companies[company_id] = cls._companies.get(company_id, 0) + slots
+        cls._stats["registered"] += 1
+        await StateStore.set(
+            f"session:{session_id}",
+            {"company_id": company_id, "worker": WORKER_ID, "slots": slots, "started_at": time.time()},
+            ttl=SESSION_STATE_TTL,
+        )
+        # Republished right away rather than on the next heartbeat so other workers' totals stay current
+        await cls._publish()
+
+    @classmethod
+    async def unregister(cls, session_id: str):
+        company_id = cls._sessions.pop(session_id, None)
+        if company_id is None:
+            return
+        remaining = cls._companies.get(company_id, 0) - cls._slots.pop(session_id, 1)
+        if remaining > 0:
+            cls._companies[company_id] = remaining
+        else:
+            cls._companies.pop(company_id, None)
+        cls._stats["unregistered"] += 1
+        await StateStore.delete(f"session:{session_id}")
+        await cls._publish()
+
+    @classmethod
+    def local_sessions(cls) -> int:
+        return len(cls._sessions)
+
+    @classmethod
+    def local_slots(cls, company_id: Optional[str] = None) -> int:
+        return sum(cls._slots.values()) if company_id is None else cls._companies.get(company_id, 0)
+
+    @classmethod
+    async def totals(cls) -> Dict[str, Any]:
+        # Other workers are counted as of their last heartbeat, this worker as of now
+        workers = await StateStore.scan("worker:")
+        workers[f"worker:{WORKER_ID}"] = cls._snapshot()
+        companies: Dict[str, int] = {}
+        for worker in workers.values():
+            for company_id, count in worker["companies"].items():
+                companies[company_id] = companies.get(company_id, 0) + count
+        return {
+            "workers": len(workers),
+            "sessions": sum(worker["sessions"] for worker in workers.values()),
+            "slots": sum(worker.get("slots", worker["sessions"]) for worker in workers.values()),
+            "companies": companies,
+        }
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {**cls._stats, "worker": WORKER_ID, "sessions": len(cls._sessions), "slots": cls.local_slots(),
+                "companies": dict(cls._companies)}
+
+    @classmethod
+    def _snapshot(cls) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "sessions": len(cls._sessions),
+            "slots": cls.local_slots(),
+            "companies": dict(cls._companies),
+            "started_at": cls._started_at,
+            "updated_at": time.time(),
+        }
+
+    @classmethod
+    async def _publish(cls):
+        cls._stats["heartbeats"] += 1
+        await StateStore.set(f"worker:{WORKER_ID}", cls._snapshot(), ttl=WORKER_HEARTBEAT_SECONDS * 3)
+
+    @classmethod
+    async def _beat(cls):
+        while True:
+            await asyncio.sleep(WORKER_HEARTBEAT_SECONDS)
+            await cls._publish()
+
+
+metrics.gauge("voice_worker_info", "Always 1, identifies the worker process that answered the scrape",
+              lambda: {(WORKER_ID,): 1}, ("worker",))
@@ -0,0 +1,255 @@
+import asyncio
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from importlib.util import find_spec
+from typing import Any, Dict, Optional, Tuple
+
+load_dotenv()
+
+# "memory" keeps state in this worker, "shared" in a SQLite file every worker on the host opens,
+# "redis" in a Redis-compatible server shared by every host
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+# SQLite file for the shared backend, /dev/shm keeps it in RAM
+STATE_PATH = os.getenv(
+    "STATE_PATH",
+    os.path.join("/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir(), "live-gemini-state.db"),
+)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prefixed to every key so several deployments can share one Redis
+STATE_NAMESPACE = os.getenv("STATE_NAMESPACE", "live-gemini")
+
+
+class MemoryStateBackend:
+    name = "memory"
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[Any, Optional[float]]] = {}
+
+    async def open(self):
+        pass
+
+    async def close(self):
+        self._entries.clear()
+
+    async def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._entries[key] = (value, time.time() + ttl if ttl else None)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+
+    async def scan(self, prefix: str) -> Dict[str, Any]:
+        now = time.time()
+        return {key: value for key, (value, expires_at) in list(self._entries.items())
+                if key.startswith(prefix) and (expires_at is None or expires_at > now)}
+
+
+class SharedStateBackend:
+    name = "shared"
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def _run(self, statement, *args):
+        # Another worker holding the write lock would block for up to the busy timeout, so statements run on one
+        # thread per worker, which also keeps the connection to a single thread
+        return await asyncio.get_running_loop().run_in_executor(self._executor, statement, *args)
+
+    async def open(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state-store")
+        await self._run(self._connect)
+
+    def _connect(self):
+        self._db = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE IF NOT EXISTS state (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+
+    async def close(self):
+        if self._executor is not None:
+            if self._db is not None:
+                await self._run(self._db.close)
+                self._db = None
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def get(self, key: str) -> Any:
+        return await self._run(self._get, key)
+
+    def _get(self, key: str) -> Any:
+        row = self._db.execute(
+            "SELECT value FROM state WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)", (key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self._run(
+            self._db.execute,
+            "INSERT OR REPLACE INTO state (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time() + ttl if ttl else None),
+        )
+
+    async def delete(self, key: str):
+        await self._run(self._db.execute, "DELETE FROM state WHERE key = ?", (key,))
+
+    async def scan(self, prefix: str) -> Dict[str, Any]:
+        return await self._run(self._scan, prefix)
+
+    def _scan(self, prefix: str) -> Dict[str, Any]:
+        now = time.time()
+        # Scans run on the heartbeat, which makes them a cheap place to drop rows left by crashed workers
+        self._db.execute("DELETE FROM state WHERE expires_at <= ?", (now,))
+        rows = self._db.execute(
+            "SELECT key, value FROM state WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at > ?)",
+            (prefix, prefix + "\uffff", now),
+        ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+
+class RedisStateBackend:
+    name = "redis"
+
+    def __init__(self, url: str = REDIS_URL):
+        self.url = url
+        self._client = None
+
+    async def open(self):
+        import redis.asyncio
+
+        self._client = redis.asyncio.from_url(self.url)
+        await self._client.ping()
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def get(self, key: str) -> Any:
+        raw = await self._client.get(key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self._client.set(key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str):
+        await self._client.delete(key)
+
+    async def scan(self, prefix: str) -> Dict[str, Any]:
+        keys = [key async for key in self._client.scan_iter(match=f"{prefix}*", count=500)]
+        if not keys:
+            return {}
+        values = await self._client.mget(keys)
+        return {key.decode("utf-8"): json.loads(value) for key, value in zip(keys, values) if value is not None}
+
+
+def _create_backend(name: str):
+    if name == "redis":
+        # Falling back would quietly split state per host, which is what redis was asked for to avoid
+        if find_spec("redis") is None:
+            raise RuntimeError("STATE_BACKEND is redis but the redis package is not installed, "
+                               "install the redis extra: pip install 'live-gemini[redis]'")
+        return RedisStateBackend()
+    if name == "shared":
+        return SharedStateBackend()
+    if name != "memory":
+        raise RuntimeError(f"Unknown STATE_BACKEND {name}, expected memory, shared or redis")
+    return MemoryStateBackend()
+
+
+# State shared by every worker (company configs, session metadata, worker heartbeats, cache invalidations). Values
+# must be JSON serialisable; process-local objects such as clients and credentials stay in GlobalStore. The
+# embedding and semantic result caches deliberately stay in each worker: they are read on every retrieval, where a
+# round trip would cost most of what a hit saves, and only the semantic cache's invalidations are shared. A backend that
+# fails to open stops startup; failures after that are logged and read as misses so they do not fail sessions.
+class StateStore:
+    _backend = MemoryStateBackend()
+    _stats = {"gets": 0, "hits": 0, "sets": 0, "deletes": 0, "scans": 0, "errors": 0}
+
+    @classmethod
+    async def start(cls, backend_name: str = STATE_BACKEND):
+        # A backend that was asked for but cannot be opened stops the worker, running on memory instead would
+        # quietly give each worker its own registry totals and cache invalidations
+        backend = _create_backend(backend_name)
+        try:
+            await backend.open()
+        except Exception as e:
+            raise RuntimeError(f"Failed to open {backend.name} state backend: {e}") from e
+        cls._backend = backend
+
+    @classmethod
+    async def stop(cls):
+        backend, cls._backend = cls._backend, MemoryStateBackend()
+        await backend.close()
+
+    @classmethod
+    def backend_name(cls) -> str:
+        return cls._backend.name
+
+    @classmethod
+    def _key(cls, key: str) -> str:
+        return f"{STATE_NAMESPACE}:{key}"
+
+    @classmethod
+    def _failed(cls, operation: str, key: str, error: Exception):
+        cls._stats["errors"] += 1
+        print(f"State backend {operation} failed for {key}: {error}")
+
+    @classmethod
+    async def get(cls, key: str, default: Any = None) -> Any:
+        cls._stats["gets"] += 1
+        try:
+            value = await cls._backend.get(cls._key(key))
+        except Exception as e:
+            cls._failed("get", key, e)
+            return default
+        if value is None:
+            return default
+        cls._stats["hits"] += 1
+        return value
+
+    @classmethod
+    async def set(cls, key: str, value: Any, ttl: Optional[float] = None):
+        cls._stats["sets"] += 1
+        try:
+            await cls._backend.set(cls._key(key), value, ttl)
+        except Exception as e:
+            cls._failed("set", key, e)
+
+    @classmethod
+    async def delete(cls, key: str):
+        cls._stats["deletes"] += 1
+        try:
+            await cls._backend.delete(cls._key(key))
+        except Exception as e:
+            cls._failed("delete", key, e)
+
+    @classmethod
+    async def scan(cls, prefix: str) -> Dict[str, Any]:
+        cls._stats["scans"] += 1
+        namespace = cls._key("")
+        try:
+            entries = await cls._backend.scan(cls._key(prefix))
+        except Exception as e:
+            cls._failed("scan", prefix, e)
+            return {}
+        return {key[len(namespace):]: value for key, value in entries.items()}
+
+    @classmethod
+    def stats(cls) -> Dict[str, Any]:
+        return {**cls._stats, "backend": cls._backend.name}